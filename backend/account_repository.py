@@ -0,0 +1,286 @@
+"""
+Verstige OS — Trading Account Repository
+One read and write path for trading accounts, whichever store holds them.
+
+Accounts live in two stores. The local SQLAlchemy database is written when
+a TradeLocker account is selected, and Supabase trading_accounts is written
+by the save-account endpoints. Callers used to query trading_platforms and
+then trading_accounts in one or both stores on every request. This module
+reads through both, and caches the resolved account per (user, provider).
+Writes go through here too, so the cached entry is dropped whenever an
+account changes. Platform IDs are cached in supabase_db.
+
+The resolved account is picked by sync time when it is loaded: a local row
+is used only if it was synced after every Supabase row, so a newer or
+deactivated Supabase account shadows it. Both stores record last_sync_at in
+UTC.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from backend.supabase_db import (
+        deactivate_trading_accounts,
+        get_platform_id,
+        get_provider_accounts,
+        save_trading_account,
+        set_auto_execute,
+    )
+except ImportError:  # Run from the backend directory
+    from supabase_db import (
+        deactivate_trading_accounts,
+        get_platform_id,
+        get_provider_accounts,
+        save_trading_account,
+        set_auto_execute,
+    )
+
+try:
+    from backend.database import run_db
+    from backend.models.db_models import TradingAccount, TradingPlatform
+except ImportError:  # Standalone scripts only see the Supabase store
+    run_db = None
+
+# Bounds staleness when another process writes an account
+ACCOUNT_CACHE_TTL = float(os.getenv("ACCOUNT_CACHE_TTL", "300"))
+
+logger = logging.getLogger("AccountRepository")
+
+Key = Tuple[str, str]
+
+_NEVER = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def _local_account_row(account, provider: str) -> dict:
+    """Shapes a SQLAlchemy TradingAccount like a Supabase trading_accounts row."""
+    return {
+        "id": account.id,
+        "user_id": account.user_id,
+        "provider": provider,
+        "platform_id": account.platform_id,
+        "account_number": account.account_number,
+        "account_name": account.account_name,
+        "account_type": account.account_type,
+        "server": account.server,
+        "currency": account.currency,
+        "balance": float(account.balance) if account.balance is not None else None,
+        "equity": float(account.equity) if account.equity is not None else None,
+        "is_active": account.is_active,
+        "encrypted_credentials": account.encrypted_credentials,
+        "last_sync_at": (
+            account.last_sync_at.isoformat() if account.last_sync_at else None
+        ),
+        "store": "local",
+    }
+
+
+def _synced_at(row: dict) -> datetime:
+    """When a row was last written, from whichever timestamp it carries."""
+    value = row.get("last_sync_at") or row.get("updated_at") or row.get("created_at")
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            value = None
+    if not isinstance(value, datetime):
+        return _NEVER
+    # Naive timestamps were written with datetime.now()
+    # Naive timestamps are UTC, as Postgres reads them and SQLite stores them
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _find_local(db, user_id: str, provider: str):
+    return (
+        db.query(TradingAccount)
+        .join(TradingPlatform, TradingAccount.platform_id == TradingPlatform.id)
+        .filter(TradingAccount.user_id == user_id, TradingPlatform.code == provider)
+        .first()
+    )
+
+
+def _get_local(db, user_id: str, provider: str) -> Optional[dict]:
+    account = _find_local(db, user_id, provider)
+    return _local_account_row(account, provider) if account else None
+
+
+def _save_local(db, user_id: str, provider: str, fields: dict, platform: dict):
+    platform_row = (
+        db.query(TradingPlatform).filter(TradingPlatform.code == provider).first()
+    )
+    if not platform_row:
+        platform_row = TradingPlatform(code=provider, **platform)
+        db.add(platform_row)
+        db.flush()
+
+    account = _find_local(db, user_id, provider)
+    if not account:
+        account = TradingAccount(user_id=user_id, platform_id=platform_row.id)
+        db.add(account)
+    for column, value in fields.items():
+        setattr(account, column, value)
+    account.last_sync_at = datetime.now(timezone.utc)
+    db.commit()
+
+
+def _delete_local(db, user_id: str, provider: str):
+    account = _find_local(db, user_id, provider)
+    if account:
+        db.delete(account)
+        db.commit()
+
+
+class AccountRepository:
+    """
+    Read-through, write-invalidated cache of each user's account per provider.
+
+    Lookups for the same key share one load. A load that raced a write is
+    returned to its caller but not cached.
+    """
+
+    def __init__(self, ttl: float = ACCOUNT_CACHE_TTL):
+        self.ttl = ttl
+        # (user_id, provider) -> (expires at, row or None)
+        self._accounts: Dict[Key, Tuple[float, Optional[dict]]] = {}
+        # user_id -> write count, to spot writes during a load
+        self._versions: Dict[str, int] = {}
+        self._locks: Dict[Key, asyncio.Lock] = {}
+
+    async def get_account(
+        self, user_id: str, provider: str = "tradelocker"
+    ) -> Optional[dict]:
+        """
+        Returns the user's account row for a provider, or None.
+
+        Local rows are shaped like Supabase rows, and carry "store": "local".
+        The newest active row of either store wins. If none is active, the
+        newest row is returned, so check "is_active" where it matters.
+        """
+        key = (user_id, provider)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached[1]
+
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            cached = self._cached(key)
+            if cached is not None:
+                return cached[1]
+
+            version = self._versions.get(user_id, 0)
+            row = await self._load(user_id, provider)
+            if self._versions.get(user_id, 0) == version:
+                self._accounts[key] = (time.monotonic() + self.ttl, row)
+            return row
+
+    def _cached(self, key: Key):
+        entry = self._accounts.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry
+        return None
+
+    async def get_active_account(
+        self, user_id: str, provider: str = "tradelocker"
+    ) -> Optional[dict]:
+        """Returns the account to trade on for a provider, or None. Cached."""
+        row = await self.get_account(user_id, provider)
+        if row is None or row.get("is_active") is False:
+            return None
+        return row
+
+    async def _load(self, user_id: str, provider: str) -> Optional[dict]:
+        local, remote = await asyncio.gather(
+            self._load_local(user_id, provider),
+            self._load_remote(user_id, provider),
+        )
+        # Newest first; Supabase wins ties, and a local row counts only if it
+        # was synced after every Supabase row, active or not
+        rows = sorted(remote, key=_synced_at, reverse=True)
+        if local is not None:
+            newest_remote = _synced_at(rows[0]) if rows else _NEVER
+            if not rows or _synced_at(local) > newest_remote:
+                rows.insert(0, local)
+        active = next((row for row in rows if row.get("is_active") is not False), None)
+        return active or (rows[0] if rows else None)
+
+    async def _load_local(self, user_id: str, provider: str) -> Optional[dict]:
+        if run_db is None:
+            return None
+        try:
+            return await run_db(_get_local, user_id, provider)
+        except Exception as e:
+            logger.warning(f"Local account lookup failed for {user_id}: {e}")
+            return None
+
+    async def _load_remote(self, user_id: str, provider: str) -> List[dict]:
+        platform_id = await get_platform_id(provider)
+        return await get_provider_accounts(user_id, provider, platform_id)
+
+    def invalidate(self, user_id: str, provider: Optional[str] = None):
+        """Drops the cached account(s) of a user."""
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        for key in list(self._accounts):
+            if key[0] == user_id and (provider is None or key[1] == provider):
+                del self._accounts[key]
+
+    async def save_account(
+        self,
+        user_id: str,
+        provider: str,
+        payload: dict,
+        platform: Optional[dict] = None,
+    ):
+        """
+        Upserts the user's Supabase account for a provider. The platform row
+        is created from `platform` if it is missing.
+        """
+        platform_id = await get_platform_id(provider, create=platform)
+        if platform_id:
+            payload = {**payload, "platform_id": platform_id}
+        try:
+            await save_trading_account(user_id, provider, payload)
+        finally:
+            self.invalidate(user_id, provider)
+
+    async def save_local_account(
+        self, user_id: str, provider: str, fields: dict, platform: dict
+    ):
+        """Upserts the user's account in the local database, setting the given columns."""
+        try:
+            await run_db(_save_local, user_id, provider, fields, platform)
+        finally:
+            self.invalidate(user_id, provider)
+
+    async def delete_account(self, user_id: str, provider: str):
+        """Removes the local account and deactivates the Supabase one."""
+        try:
+            if run_db is not None:
+                await run_db(_delete_local, user_id, provider)
+            await deactivate_trading_accounts(
+                user_id, provider, await get_platform_id(provider)
+            )
+        finally:
+            self.invalidate(user_id, provider)
+
+    async def set_auto_execute(
+        self, user_id: str, provider: str, enabled: bool
+    ) -> Optional[list]:
+        """
+        Opts the user's accounts on a provider in or out of auto-execution.
+
+        Returns:
+            list: The updated rows, or None if the platform does not exist.
+        """
+        platform_id = await get_platform_id(provider)
+        if not platform_id:
+            return None
+        try:
+            return await set_auto_execute(user_id, platform_id, enabled)
+        finally:
+            self.invalidate(user_id, provider)
+
+
+accounts = AccountRepository()
@@ -0,0 +1,228 @@
+"""
+Verstige OS — Signal Auto-Execution
+Fans a new signal out to every user who opted in to auto-execution.
+
+All followers' accounts are loaded in one query. Their orders then run
+concurrently on the shared TradeLocker sessions. Concurrency is capped per
+broker and per broker server, so a large follower base cannot flood one
+server. Results are yielded as each order finishes, which keeps the time
+for the whole follower base close to the latency of a single order.
+
+Before an order is placed, its (signal, user) pair is claimed in the local
+SQLite file. If a signal job is resumed after a crash, followers claimed by
+the earlier run are skipped, so a signal never places a second order on the
+same account.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+# Same module instance as the swipe path, so sessions are shared
+sys.path.append(os.path.dirname(__file__))
+from tradelocker_execution import (
+    execute_signal_with_credentials,
+    parse_account_credentials,
+)
+
+try:
+    from backend.signal_queue import QUEUE_PATH
+    from backend.write_behind import write_behind
+    from backend.supabase_db import (
+        get_auto_execute_accounts,
+        get_platform_id,
+    )
+except ImportError:  # Run from the backend directory
+    from signal_queue import QUEUE_PATH
+    from write_behind import write_behind
+    from supabase_db import (
+        get_auto_execute_accounts,
+        get_platform_id,
+    )
+
+BROKER_CONCURRENCY = int(os.getenv("AUTO_EXECUTE_BROKER_CONCURRENCY", "50"))
+HOST_CONCURRENCY = int(os.getenv("AUTO_EXECUTE_HOST_CONCURRENCY", "10"))
+# Claims are kept this long; no signal job is resumed later than that
+CLAIM_TTL = 7 * 24 * 3600
+
+logger = logging.getLogger("AutoExecution")
+
+ResultHandler = Callable[[dict], Awaitable[None]]
+
+
+class AutoExecutionEngine:
+    """
+    Runs one signal on every opted-in TradeLocker account.
+
+    A user is opted in when an active trading_accounts row has auto_execute
+    set. Like a swipe, each user's first such account is used. Each user is
+    executed at most once per signal.
+    """
+
+    broker = "tradelocker"
+
+    def __init__(
+        self,
+        broker_concurrency: int = BROKER_CONCURRENCY,
+        host_concurrency: int = HOST_CONCURRENCY,
+        path: str = QUEUE_PATH,
+    ):
+        self.broker_concurrency = broker_concurrency
+        self.host_concurrency = host_concurrency
+        self.path = path
+        self.db: Optional[sqlite3.Connection] = None
+        self._broker_limits: Dict[str, asyncio.Semaphore] = {}
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def open(self):
+        if self.db is not None:
+            return
+
+        self.db = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS auto_executions ("
+            "signal_id TEXT NOT NULL, user_id TEXT NOT NULL, claimed_at REAL NOT NULL, "
+            "PRIMARY KEY (signal_id, user_id))"
+        )
+        self.db.execute(
+            "DELETE FROM auto_executions WHERE claimed_at <= ?",
+            (time.time() - CLAIM_TTL,),
+        )
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def claim(self, signal_id: str, user_ids: List[str]) -> List[str]:
+        """
+        Records that the signal is being executed for these users.
+
+        Returns:
+            List[str]: The users no earlier run of this signal has claimed.
+        """
+        self.open()
+        now = time.time()
+        claimed = []
+        self.db.execute("BEGIN")
+        try:
+            for user_id in user_ids:
+                cursor = self.db.execute(
+                    "INSERT OR IGNORE INTO auto_executions "
+                    "(signal_id, user_id, claimed_at) VALUES (?, ?, ?)",
+                    (signal_id, user_id, now),
+                )
+                if cursor.rowcount:
+                    claimed.append(user_id)
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+        return claimed
+
+    @staticmethod
+    def _limit(
+        limits: Dict[str, asyncio.Semaphore], key: str, size: int
+    ) -> asyncio.Semaphore:
+        if key not in limits:
+            limits[key] = asyncio.Semaphore(size)
+        return limits[key]
+
+    async def get_followers(self) -> List[dict]:
+        platform_id = await get_platform_id(self.broker)
+        if not platform_id:
+            return []
+
+        followers: Dict[str, dict] = {}
+        for row in await get_auto_execute_accounts(platform_id):
+            followers.setdefault(row["user_id"], row)
+        return list(followers.values())
+
+    async def execute_one(self, sig: dict, row: dict) -> dict:
+        """Executes on one follower's account. Failures are returned, not raised."""
+        user_id = row["user_id"]
+        try:
+            creds = parse_account_credentials(row)
+            broker_limit = self._limit(
+                self._broker_limits, self.broker, self.broker_concurrency
+            )
+            host_limit = self._limit(
+                self._host_limits, str(creds["server"]), self.host_concurrency
+            )
+            async with broker_limit, host_limit:
+                result = await execute_signal_with_credentials(user_id, sig, creds)
+            return {
+                "user_id": user_id,
+                "signal_id": str(sig["id"]),
+                "success": True,
+                "lot_size": result["lot_size"],
+                "message": result["message"],
+            }
+        except Exception as e:
+            logger.warning(f"Auto-execution of {sig['id']} failed for {user_id}: {e}")
+            return {
+                "user_id": user_id,
+                "signal_id": str(sig["id"]),
+                "success": False,
+                "message": str(e),
+            }
+
+    async def fan_out(self, sig: dict) -> AsyncIterator[dict]:
+        """Executes a signals row for all followers, yielding results as they complete."""
+        followers = await self.get_followers()
+        claimed = set(self.claim(str(sig["id"]), [row["user_id"] for row in followers]))
+        if len(claimed) < len(followers):
+            logger.info(
+                f"Skipping {len(followers) - len(claimed)} followers already "
+                f"executed for {sig['id']}"
+            )
+        tasks = [
+            asyncio.create_task(self.execute_one(sig, row))
+            for row in followers
+            if row["user_id"] in claimed
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def run(
+        self, sig: dict, on_result: Optional[ResultHandler] = None
+    ) -> List[dict]:
+        """
+        Runs the fan-out to completion and marks the signal executed if any
+        order went through.
+
+        Args:
+            sig (dict): The signals row; needs its "id".
+            on_result (ResultHandler, optional): Awaited with each result as it arrives.
+        """
+        results = []
+        async for result in self.fan_out(sig):
+            results.append(result)
+            if on_result is not None:
+                try:
+                    await on_result(result)
+                except Exception as e:
+                    logger.error(f"Auto-execution result callback raised: {e}")
+
+        executed = sum(1 for r in results if r["success"])
+        if executed:
+            write_behind.set_signal_status(sig["id"], "executed")
+        logger.info(
+            f"Auto-executed {sig['id']} for {executed}/{len(results)} followers"
+        )
+        return results
+
+
+auto_executor = AutoExecutionEngine()
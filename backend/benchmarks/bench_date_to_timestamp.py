@@ -0,0 +1,77 @@
+"""
+Benchmark for backend.utils date parsing.
+
+Compares the original detect-then-parse approach against date_to_timestamp
+(MT fast path + per-source format memo) and dates_to_timestamps (NumPy batch).
+
+Run from the project root:
+    python backend/benchmarks/bench_date_to_timestamp.py
+"""
+
+import sys
+import os
+import random
+import timeit
+from datetime import datetime, timedelta
+
+# Add the project root to sys.path so we can import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.utils.functions import (
+    DATE_FORMATS,
+    date_to_timestamp,
+    dates_to_timestamps,
+    detect_format,
+)
+
+BARS = 1000
+REPEAT = 5
+
+
+def legacy_date_to_timestamp(date_str: str) -> int:
+    date_format = detect_format(date_str, DATE_FORMATS)
+    return int(datetime.strptime(date_str, date_format).timestamp())
+
+
+def make_dates(fmt: str, count: int):
+    start = datetime(2024, 1, 1) + timedelta(minutes=random.randint(0, 10**6))
+    return [(start + timedelta(minutes=i)).strftime(fmt) for i in range(count)]
+
+
+def bench(label: str, func, count: int):
+    best = min(timeit.repeat(func, number=1, repeat=REPEAT))
+    print(f"  {label:<32} {best * 1000:9.3f} ms  {best / count * 1e6:8.3f} us/date")
+
+
+def main():
+    cases = {
+        "MT bars (YYYY.MM.DD HH:MM)": make_dates("%Y.%m.%d %H:%M", BARS),
+        "MT orders (YYYY.MM.DD HH:MM:SS)": make_dates("%Y.%m.%d %H:%M:%S", BARS),
+        "ISO (YYYY-MM-DD HH:MM:SS)": make_dates("%Y-%m-%d %H:%M:%S", BARS),
+    }
+
+    for name, dates in cases.items():
+        expected = [legacy_date_to_timestamp(d) for d in dates]
+        assert [date_to_timestamp(d, source=name) for d in dates] == expected
+        assert dates_to_timestamps(dates, source=name).tolist() == expected
+
+        print(f"{name} x {len(dates)}")
+        bench(
+            "legacy detect_format",
+            lambda: [legacy_date_to_timestamp(d) for d in dates],
+            len(dates),
+        )
+        bench(
+            "date_to_timestamp",
+            lambda: [date_to_timestamp(d, source=name) for d in dates],
+            len(dates),
+        )
+        bench(
+            "dates_to_timestamps (batch)",
+            lambda: dates_to_timestamps(dates, source=name),
+            len(dates),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark for backend.signal_parser.
+
+Times the shared single-pass parser on the provider layouts of the test
+corpus (backend/tests/test_signal_parser.py, which checks the results) and
+compares the per-message cost with the original regex-per-field parser on
+the layout that parser supports.
+
+On that layout the legacy parser is still about 10% faster. Each of its
+searches begins with a fixed word, which the regex engine finds with a fast
+literal scan. The shared pattern has to test every position that could
+start any keyword, and matching each position costs about as much as the
+parsing around it. In exchange it reads every layout in the corpus at the
+same cost per message, while the legacy parser rejects all but one.
+
+Run from the project root:
+    python backend/benchmarks/bench_signal_parser.py
+"""
+
+import sys
+import os
+import timeit
+
+# Add the project root to sys.path so we can import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.signal_parser import parse_signal
+from backend.tests.test_signal_parser import CORPUS, legacy_parse
+
+MESSAGES = 2000
+REPEAT = 15
+
+
+def bench(label: str, func, count: int):
+    best = min(timeit.repeat(func, number=1, repeat=REPEAT))
+    print(f"  {label:<32} {best * 1000:9.3f} ms  {best / count * 1e6:8.3f} us/msg")
+
+
+def main():
+    standard = [CORPUS[0][0]] * MESSAGES
+    print(f"standard layout x {MESSAGES}")
+    bench(
+        "legacy regex-per-field", lambda: [legacy_parse(t) for t in standard], MESSAGES
+    )
+    bench("signal_parser", lambda: [parse_signal(t) for t in standard], MESSAGES)
+
+    mixed = [CORPUS[i % len(CORPUS)][0] for i in range(MESSAGES)]
+    print(f"mixed corpus x {MESSAGES}")
+    bench("signal_parser", lambda: [parse_signal(t) for t in mixed], MESSAGES)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Verstige OS — Bridge IPC Channel
+Persistent local channel carrying MetaApi bridge events to the backend.
+
+The bridge keeps a single connection open to the backend, over a Unix domain
+socket (or localhost TCP where Unix sockets are unavailable). Events are
+buffered and written as length-prefixed frames: a 4-byte big-endian length
+followed by a JSON list of {"type", "data"} events. Whatever has queued up
+since the last write goes out as one frame, so the cost per tick is a list
+append rather than a TCP handshake and HTTP request.
+
+The same framing runs the other way for control commands from the backend
+to the bridge, such as adding or removing a master account.
+
+Only the standard library is used, since the bridge runs against its own
+isolated library path.
+"""
+
+import os
+import json
+import socket
+import struct
+import asyncio
+import logging
+import tempfile
+from collections import deque
+from typing import Awaitable, Callable, List, Optional, Set
+
+SOCKET_PATH = os.getenv(
+    "BRIDGE_SOCKET_PATH", os.path.join(tempfile.gettempdir(), "verstige_bridge.sock")
+)
+TCP_PORT = int(os.getenv("BRIDGE_IPC_PORT", "8765"))  # Without AF_UNIX (Windows)
+MAX_BATCH = 500  # events per frame
+MAX_PENDING = 10000  # oldest events are dropped beyond this while disconnected
+MAX_FRAME = 16 * 1024 * 1024
+RECONNECT_DELAY = 1.0
+
+_HEADER = struct.Struct(">I")
+USE_UNIX_SOCKET = hasattr(socket, "AF_UNIX")
+
+logger = logging.getLogger("BridgeIPC")
+
+EventHandler = Callable[[str, dict], Awaitable[None]]
+
+
+def encode_frame(events: List[dict]) -> bytes:
+    body = json.dumps(events, separators=(",", ":"), default=str).encode()
+    return _HEADER.pack(len(body)) + body
+
+
+async def read_frame(reader: asyncio.StreamReader) -> List[dict]:
+    """Reads one frame. Raises asyncio.IncompleteReadError at end of stream."""
+    (length,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if length > MAX_FRAME:
+        raise ValueError(f"Frame of {length} bytes exceeds {MAX_FRAME}")
+    return json.loads(await reader.readexactly(length))
+
+
+class BridgeChannelServer:
+    """Backend side: accepts bridge connections and dispatches their events."""
+
+    def __init__(self, path: str = SOCKET_PATH, port: int = TCP_PORT):
+        self.path = path
+        self.port = port
+        self.handler: Optional[EventHandler] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.writers: Set[asyncio.StreamWriter] = set()
+
+    async def start(self, handler: EventHandler):
+        self.handler = handler
+        if USE_UNIX_SOCKET:
+            # A socket file left by a previous run would make bind() fail
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self.server = await asyncio.start_unix_server(self._serve, path=self.path)
+            os.chmod(self.path, 0o600)
+            logger.info(f"Bridge channel listening on {self.path}")
+        else:
+            self.server = await asyncio.start_server(
+                self._serve, host="127.0.0.1", port=self.port
+            )
+            logger.info(f"Bridge channel listening on 127.0.0.1:{self.port}")
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+            if USE_UNIX_SOCKET and os.path.exists(self.path):
+                os.unlink(self.path)
+
+    async def send_command(self, command: str, data: dict) -> int:
+        """
+        Sends a control command to every connected bridge.
+
+        Returns:
+            int: The number of bridges the command was written to.
+        """
+        frame = encode_frame([{"type": command, "data": data}])
+        sent = 0
+        for writer in list(self.writers):
+            try:
+                writer.write(frame)
+                await writer.drain()
+                sent += 1
+            except (OSError, ConnectionError) as e:
+                logger.warning(f"Failed to send {command} to bridge: {e}")
+        return sent
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        logger.info("Bridge connected")
+        self.writers.add(writer)
+        try:
+            while True:
+                for event in await read_frame(reader):
+                    try:
+                        await self.handler(
+                            event.get("type", "new_signal"), event.get("data", {})
+                        )
+                    except Exception as e:
+                        logger.error(f"Bridge event {event.get('type')} failed: {e}")
+        except asyncio.IncompleteReadError:
+            logger.info("Bridge disconnected")
+        except Exception as e:
+            logger.error(f"Bridge channel error: {e}")
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+
+class BridgeChannel:
+    """
+    Bridge side: buffers events and streams them to the backend.
+
+    send() never blocks or raises. A background task connects (and
+    reconnects), and writes the buffered events in batches. Commands from the
+    backend are passed to `on_command`, and `on_connect` runs after every
+    (re)connect.
+    """
+
+    def __init__(self, path: str = SOCKET_PATH, port: int = TCP_PORT):
+        self.path = path
+        self.port = port
+        self.on_command: Optional[EventHandler] = None
+        self.on_connect: Optional[Callable[[], None]] = None
+        self.pending: deque = deque(maxlen=MAX_PENDING)
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="bridge-channel")
+
+    def send(self, event_type: str, data: dict):
+        self.pending.append({"type": event_type, "data": data})
+        self._ready.set()
+        self.start()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _connect(self):
+        if USE_UNIX_SOCKET:
+            return await asyncio.open_unix_connection(self.path)
+        return await asyncio.open_connection("127.0.0.1", self.port)
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await self._connect()
+            except OSError as e:
+                logger.warning(f"Backend channel unavailable ({e}), retrying")
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+
+            logger.info("Connected to backend channel")
+            if self.on_connect is not None:
+                self.on_connect()
+
+            # Either side ending means the connection is gone
+            tasks = {
+                asyncio.create_task(self._pump(writer)),
+                asyncio.create_task(self._listen(reader)),
+            }
+            try:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        logger.warning(
+                            f"Backend channel lost ({task.exception()}), reconnecting"
+                        )
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                writer.close()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _listen(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                for command in await read_frame(reader):
+                    if self.on_command is None:
+                        continue
+                    try:
+                        await self.on_command(
+                            command.get("type"), command.get("data", {})
+                        )
+                    except Exception as e:
+                        logger.error(
+                            f"Bridge command {command.get('type')} failed: {e}"
+                        )
+        except asyncio.IncompleteReadError:
+            logger.warning("Backend closed the channel, reconnecting")
+
+    async def _pump(self, writer: asyncio.StreamWriter):
+        while True:
+            if not self.pending:
+                self._ready.clear()
+                await self._ready.wait()
+
+            batch = [
+                self.pending.popleft() for _ in range(min(len(self.pending), MAX_BATCH))
+            ]
+            try:
+                writer.write(encode_frame(batch))
+                await writer.drain()
+            except Exception:
+                # Put the batch back for the next connection
+                self.pending.extendleft(reversed(batch))
+                raise
@@ -1,18 +1,78 @@
-
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
+from starlette.concurrency import run_in_threadpool
 from backend.settings import settings
+import logging
 
 # Database URL should be in settings, for now using a placeholder or sqlite for local dev if not provided
 DATABASE_URL = getattr(settings, "DATABASE_URL", "sqlite:///./verstige_local.db")
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+logger = logging.getLogger("Database")
+
+# Drivers for the async engine; installed separately (aiosqlite / asyncpg)
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def engine_options():
+    if IS_SQLITE:
+        # Sessions are handed to threadpool workers, so connections cross threads
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
 
-engine = create_engine(DATABASE_URL)
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run alongside the writer; NORMAL syncs at checkpoints
+    # only, which is safe under WAL
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+engine = create_engine(DATABASE_URL, **engine_options())
+if IS_SQLITE:
+    event.listen(engine, "connect", set_sqlite_pragmas)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = None
+AsyncSessionLocal = None
+
+def get_async_engine():
+    """Creates the async engine on first use, so the async driver stays optional."""
+    global async_engine, AsyncSessionLocal
+    if async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        url = make_url(DATABASE_URL)
+        url = url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+        async_engine = create_async_engine(url, **engine_options())
+        if IS_SQLITE:
+            event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return async_engine
+
 def init_db():
     from backend.models.db_models import Base
+    from backend.migrations import run_migrations, missing_indexes
+    # create_all only creates missing tables; changes to existing ones are migrations
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    for lookup in missing_indexes(engine):
+        logger.warning(f"No index covers {lookup}")
+
+    # Fill the leaderboard columns for rows that predate them
+    from backend.services.leaderboard_service import LeaderboardService
+    db = SessionLocal()
+    try:
+        LeaderboardService.backfill(db)
+    finally:
+        db.close()
 
 def get_db():
     db = SessionLocal()
@@ -20,3 +80,26 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def run_db(fn, *args, **kwargs):
+    """
+    Runs fn(db, *args, **kwargs) with its own Session in the threadpool, so
+    async routes can use the sync ORM without blocking the event loop.
+    """
+    def call():
+        db = SessionLocal()
+        try:
+            return fn(db, *args, **kwargs)
+        finally:
+            db.close()
+    return await run_in_threadpool(call)
+
+async def close_db():
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
@@ -108,9 +108,14 @@ class BaseHandler(ABC):
         """
         pass
 
-    def on_order_event(self, open_orders, closed_orders):
+    def on_order_event(self, open_orders, created_orders, removed_orders):
         """
         Handle incoming order events.
+
+        Args:
+            open_orders (dict): All currently open orders keyed by order ID.
+            created_orders (list): Orders opened since the previous event.
+            removed_orders (list): Orders closed since the previous event.
         """
         pass
 
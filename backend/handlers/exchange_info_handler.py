@@ -1,3 +1,4 @@
+import json
 import asyncio
 from datetime import datetime
 from typing import Callable, List, Dict, Optional
@@ -22,6 +23,9 @@ RATE_LIMIT = RateLimit(
     count=2,
 )
 
+SORS_DATA = [{"baseAsset": "Step Index", "symbols": ["Step Index"]}]
+SORS_JSON = json.dumps(SORS_DATA, separators=(",", ":"))
+
 
 class ExchangeInfoHandler(BaseHandler):
     """
@@ -37,12 +41,77 @@ class ExchangeInfoHandler(BaseHandler):
         mt_client_params: MTClientParams,
         pubsub_instance: SocketIOServerClient,
     ):
+        # Caches are filled by on_symbols_data, which the socket client may call
+        # as soon as it starts
+        self.symbols_data: Dict[int, SymbolData] = {}
+        self._raw_symbols_data: Optional[dict] = None
+        self._listing: Optional[tuple] = None
+        self._symbols: List[Symbol] = []
+        self._symbols_json: str = "[]"
+
         super().__init__(mt_client_params, pubsub_instance)
         self.logger = Logger(name=__class__.__name__)
-        self.symbols_data: Dict[int, SymbolData] = {}
 
     def on_symbols_data(self, symbols_data):
-        self.logger.debug(f"on_symbols_data: {symbols_data}")
+        """
+        Refreshes the cached symbol table and exchange info when the terminal
+        reports a change in its active symbols.
+
+        Args:
+            symbols_data (dict): Active symbols keyed by symbol ID.
+        """
+        if not isinstance(symbols_data, dict) or symbols_data == self._raw_symbols_data:
+            return
+
+        self.logger.debug(f"on_symbols_data: {len(symbols_data)} symbols changed")
+        self.symbols_data = {
+            symbol_id: SymbolData(**symbol_data)
+            for symbol_id, symbol_data in symbols_data.items()
+        }
+        self._raw_symbols_data = symbols_data
+
+        # Exchange info only depends on the symbol listing, not on spreads or prices
+        listing = tuple(
+            (symbol_data.symbol, symbol_data.currency_base)
+            for symbol_data in self.symbols_data.values()
+        )
+        if listing != self._listing:
+            self._listing = listing
+            self._symbols = [
+                self._build_symbol(symbol_data)
+                for symbol_data in self.symbols_data.values()
+            ]
+            self._symbols_json = json.dumps(
+                [symbol.model_dump(mode="json") for symbol in self._symbols],
+                separators=(",", ":"),
+            )
+
+    @staticmethod
+    def _build_symbol(active_symbol: SymbolData) -> Symbol:
+        return Symbol(
+            symbol=active_symbol.symbol,
+            status="TRADING",
+            baseAsset=active_symbol.symbol,
+            baseAssetPrecision=8,
+            quoteAsset=active_symbol.currency_base,
+            quoteAssetPrecision=8,
+            baseCommissionPrecision=8,
+            quoteCommissionPrecision=8,
+            orderTypes=OrderType.export_all(),
+            icebergAllowed=True,
+            ocoAllowed=True,
+            otoAllowed=True,
+            quoteOrderQtyMarketAllowed=True,
+            allowTrailingStop=False,
+            cancelReplaceAllowed=False,
+            isSpotTradingAllowed=True,
+            isMarginTradingAllowed=True,
+            filters=[],
+            permissions=Permission.export_all(),
+            permissionSets=[Permission.export_all()],
+            defaultSelfTradePreventionMode="NONE",
+            allowedSelfTradePreventionModes=["NONE"],
+        )
 
     async def get_exchange_info(
         self,
@@ -53,6 +122,9 @@ class ExchangeInfoHandler(BaseHandler):
         """
         Retrieves exchange information.
 
+        Symbols come from the cache maintained by on_symbols_data; the terminal is
+        only queried while the cache is still empty.
+
         Args:
             symbol (Optional[str]): Specific symbol to retrieve information for.
             symbols (Optional[List[str]]): List of symbols to retrieve information for.
@@ -61,75 +133,72 @@ class ExchangeInfoHandler(BaseHandler):
         Returns:
             ExchangeInfoResponse: An object containing exchange information.
         """
-        # Mock data for demonstration
+        await self.get_active_symbols()
+
         get_time = get_server_time()
-        timezone = get_time.timezone
-        serverTime = get_time.unix_timestamp
-        rateLimits = []  # Add rate limits if available
-        exchangeFilters = []  # Add exchange filters if available
-        all_symbols = []
-
-        active_symbols = await self.get_active_symbols()
-        if active_symbols is not None:
-            for _, active_symbol in active_symbols.items():
-                symbol = Symbol(
-                    symbol=active_symbol.symbol,
-                    status="TRADING",
-                    baseAsset=active_symbol.symbol,
-                    baseAssetPrecision=8,
-                    quoteAsset=active_symbol.currency_base,
-                    quoteAssetPrecision=8,
-                    baseCommissionPrecision=8,
-                    quoteCommissionPrecision=8,
-                    orderTypes=OrderType.export_all(),
-                    icebergAllowed=True,
-                    ocoAllowed=True,
-                    otoAllowed=True,
-                    quoteOrderQtyMarketAllowed=True,
-                    allowTrailingStop=False,
-                    cancelReplaceAllowed=False,
-                    isSpotTradingAllowed=True,
-                    isMarginTradingAllowed=True,
-                    filters=[],
-                    permissions=Permission.export_all(),
-                    permissionSets=[Permission.export_all()],
-                    defaultSelfTradePreventionMode="NONE",
-                    allowedSelfTradePreventionModes=["NONE"],
-                )
-                all_symbols.append(symbol)
 
         if symbols is not None and len(symbols) > 0:
             # filter symbols
             pass
 
-        sors_data = [{"baseAsset": "Step Index", "symbols": ["Step Index"]}]
+        return ExchangeInfoResponse.model_construct(
+            timezone=get_time.timezone,
+            server_time=get_time.unix_timestamp,
+            rate_limits=[],
+            exchange_filters=[],
+            symbols=self._symbols,
+            sors=SORS_DATA,
+        )
+
+    async def get_exchange_info_json(self) -> str:
+        """
+        Retrieves exchange information as a JSON string.
+
+        The symbol list is serialized once per change, so only the server time is
+        rendered per request.
 
-        return ExchangeInfoResponse(
-            timezone=timezone,
-            server_time=serverTime,
-            rate_limits=rateLimits,
-            exchange_filters=exchangeFilters,
-            symbols=all_symbols,
-            sors=sors_data,
+        Returns:
+            str: The serialized ExchangeInfoResponse.
+        """
+        await self.get_active_symbols()
+
+        get_time = get_server_time()
+        return (
+            f'{{"timezone":{json.dumps(get_time.timezone)},'
+            f'"server_time":{get_time.unix_timestamp},'
+            f'"rate_limits":[],"exchange_filters":[],'
+            f'"symbols":{self._symbols_json},'
+            f'"sors":{SORS_JSON}}}'
         )
 
     async def get_active_symbols(
-        self, symbol: str = ""
+        self, symbol: str = "", refresh: bool = False
     ) -> Optional[Dict[int, SymbolData]]:
         """
         Retrieves active symbols.
 
+        Returns the cached symbol table unless it is empty, a specific symbol is
+        requested, or refresh is set, in which case the terminal is queried.
+
         Args:
             symbol (str): Specific symbol to retrieve information for. Defaults to "".
+            refresh (bool): Force a GET_ACTIVE_SYMBOLS round trip. Defaults to False.
 
         Returns:
             List[SymbolData]: A list of active symbols.
         """
+        if self.symbols_data and not symbol and not refresh:
+            return self.symbols_data
+
+        # The socket client forwards the response to on_symbols_data
         active_symbols = self.socket_client.get_active_symbols(symbol)
         if active_symbols is None:
             return None
 
-        for symbol_id, symbol_data in active_symbols.items():
-            self.symbols_data[symbol_id] = SymbolData(**symbol_data)
+        if symbol:
+            return {
+                symbol_id: SymbolData(**symbol_data)
+                for symbol_id, symbol_data in active_symbols.items()
+            }
 
         return self.symbols_data
@@ -1,9 +1,10 @@
 import asyncio
-from typing import List, Dict, Optional, Tuple, Union
+from typing import List, Dict, Optional, Set, Tuple, Union
 from datetime import datetime, timezone, timedelta
 from backend.models import (
     MTClientParams,
     Events,
+    Rooms,
     SubscribeRequest,
     SubscribeResponse,
     SymbolMarketData,
@@ -16,8 +17,9 @@ from backend.models import (
     HistoricalKlineRequest,
 )
 from backend.internal import SocketIOServerClient, MTSocketClient
-from backend.utils import Logger, date_to_timestamp
+from backend.utils import Logger, dates_to_timestamps
 from .base_handler import BaseHandler
+from .subscription_manager import SubscriptionManager
 
 
 class KlineHandler(BaseHandler):
@@ -30,6 +32,7 @@ class KlineHandler(BaseHandler):
         current_on_tick_data (Optional[TickDataEvent]): Current TickDataEvent instance.
         current_on_bar_data (Optional[BarDataEvent]): Current BarDataEvent instance.
         historical_klines (List[Kline]): List to store historical Kline data.
+        subscriptions (SubscriptionManager): Reference counts of client subscriptions.
     """
 
     def __init__(
@@ -52,6 +55,7 @@ class KlineHandler(BaseHandler):
         self.current_on_tick_data: Optional[TickDataEvent] = None
         self.current_on_bar_data: Optional[BarDataEvent] = None
         self.historical_klines: List[Kline] = []
+        self.subscriptions = SubscriptionManager()
 
     def on_tick(self, symbol: str, bid: float, ask: float) -> None:
         """
@@ -74,7 +78,9 @@ class KlineHandler(BaseHandler):
 
         asyncio.run(
             self.publish_to_subscriber(
-                Events.KlineSubscribeTick, self.current_on_tick_data.model_dump_json()
+                Events.KlineSubscribeTick,
+                self.current_on_tick_data.model_dump_json(),
+                room=Rooms.tick(symbol),
             )
         )
 
@@ -120,7 +126,9 @@ class KlineHandler(BaseHandler):
 
         asyncio.run(
             self.publish_to_subscriber(
-                Events.KlineSubscribeBar, self.current_on_bar_data.model_dump_json()
+                Events.KlineSubscribeBar,
+                self.current_on_bar_data.model_dump_json(),
+                room=Rooms.bar(symbol, time_frame),
             )
         )
 
@@ -137,11 +145,12 @@ class KlineHandler(BaseHandler):
         """
         self.logger.info(f"historic_data: {symbol}, {time_frame}, {len(data)} bars")
 
+        timestamps = dates_to_timestamps(list(data.keys()), source="historic")
         historical_klines = [
             Kline(
                 start_time=None,
                 end_time=None,
-                time=date_to_timestamp(_date),
+                time=timestamp,
                 symbol=symbol,
                 interval=time_frame,
                 open=kline.get("open"),
@@ -151,7 +160,7 @@ class KlineHandler(BaseHandler):
                 volume=kline.get("tick_volume"),
                 is_final=True,
             )
-            for _date, kline in data.items()
+            for timestamp, kline in zip(timestamps.tolist(), data.values())
         ]
 
         asyncio.run(
@@ -161,72 +170,125 @@ class KlineHandler(BaseHandler):
             )
         )
 
-    async def publish_to_subscriber(self, event_type: str, payload: dict) -> None:
+    async def publish_to_subscriber(
+        self, event_type: str, payload: dict, room: Optional[str] = None
+    ) -> None:
         """
         Publishes data to a subscriber.
 
         Args:
             event_type (str): Type of the event to publish.
             payload (dict): Data payload to publish.
+            room (Optional[str]): Room of the interested clients. Defaults to all clients.
         """
-        await self.pubsub.publish(event_type, payload)
+        await self.pubsub.publish(event_type, payload, room=room)
 
-    async def _subscribe_to_symbols(
-        self,
-        symbols_data: Optional[List[SymbolMarketData]] = [
-            SymbolMarketData(
-                symbol="Step Index", time_frame=TimeFrame.M5, mode=DataMode.BAR
-            )
-        ],
-    ) -> List[str]:
+    @staticmethod
+    def get_room(symbol_data: SymbolMarketData) -> str:
         """
-        Subscribe to symbols for receiving bar or tick data.
+        Returns the Socket.IO room that receives data for a symbol subscription.
 
         Args:
-            symbols_data (Optional[List[SymbolMarketData]]): List of symbols to subscribe to.
+            symbol_data (SymbolMarketData): The symbol subscription.
 
         Returns:
-            List[str]: List of subscribed symbols.
+            str: The room name.
+        """
+        if symbol_data.mode == DataMode.TICK:
+            return Rooms.tick(symbol_data.symbol)
+        return Rooms.bar(symbol_data.symbol, symbol_data.time_frame.value)
+
+    def _sync_upstream(self, modes: Set[DataMode]) -> None:
+        """
+        Sends the full set of active subscriptions for the given modes to the terminal.
+
+        SUBSCRIBE_SYMBOLS and SUBSCRIBE_SYMBOLS_BAR_DATA replace the terminal's current
+        list, so sending the remaining set also drops symbols nobody is watching anymore.
+
+        Args:
+            modes (Set[DataMode]): The data modes whose subscription list changed.
         """
-        if symbols_data is None:
-            return []
-
-        subscribed_symbols = []
-        for symbol_data in symbols_data:
-            if (
-                symbol_data.mode != DataMode.TICK
-                and symbol_data.time_frame != TimeFrame.CURRENT
-            ):
-                self.socket_client.subscribe_symbols_bar_data(
-                    [[symbol_data.symbol, symbol_data.time_frame.value]]
-                )
-            else:
-                self.socket_client.subscribe_symbols([symbol_data.symbol])
-            subscribed_symbols.append(symbol_data.symbol)
-
-        return subscribed_symbols
-
-    async def subscribe(self, request: SubscribeRequest) -> SubscribeResponse:
+        if DataMode.TICK in modes:
+            tick_keys = self.subscriptions.get_subscriptions(DataMode.TICK)
+            self.socket_client.subscribe_symbols([key[0] for key in tick_keys])
+
+        if DataMode.BAR in modes:
+            bar_keys = self.subscriptions.get_subscriptions(DataMode.BAR)
+            self.socket_client.subscribe_symbols_bar_data(
+                [[key[0], key[1].value] for key in bar_keys]
+            )
+
+    async def subscribe(
+        self, request: SubscribeRequest, sid: Optional[str] = None
+    ) -> SubscribeResponse:
         """
-        Subscribe to tick data for the provided symbols.
+        Subscribe a client to tick or bar data for the provided symbols.
+
+        The terminal is only contacted when a (symbol, time_frame, mode) gets its
+        first subscriber.
 
         Args:
             request (SubscribeRequest): Request containing symbols data to subscribe to.
+            sid (Optional[str]): Socket.IO session ID of the subscribing client.
 
         Returns:
             SubscribeResponse: Response indicating the subscription status.
         """
         symbols_data = request.symbols_data
-        subscribed_symbols = await self._subscribe_to_symbols(symbols_data)
+        added = self.subscriptions.add(sid, symbols_data)
+        if added:
+            self._sync_upstream({key[2] for key in added})
 
-        all_subscribed = len(subscribed_symbols) == len(symbols_data)
+        subscribed_symbols = [symbol_data.symbol for symbol_data in symbols_data]
         response = {
             "message": f"Subscribed to symbols: {', '.join(subscribed_symbols)}",
             "subscribed": True,
-            "all": all_subscribed,
+            "all": len(subscribed_symbols) == len(symbols_data),
         }
         return SubscribeResponse(**response)
 
+    async def unsubscribe(
+        self, request: SubscribeRequest, sid: Optional[str] = None
+    ) -> SubscribeResponse:
+        """
+        Unsubscribe a client from the provided symbols.
+
+        The terminal subscription is dropped once the last client leaves.
+
+        Args:
+            request (SubscribeRequest): Request containing symbols data to unsubscribe from.
+            sid (Optional[str]): Socket.IO session ID of the unsubscribing client.
+
+        Returns:
+            SubscribeResponse: Response indicating the subscription status.
+        """
+        symbols_data = request.symbols_data
+        removed = self.subscriptions.remove(sid, symbols_data)
+        if removed:
+            self._sync_upstream({key[2] for key in removed})
+
+        unsubscribed_symbols = [symbol_data.symbol for symbol_data in symbols_data]
+        response = {
+            "message": f"Unsubscribed from symbols: {', '.join(unsubscribed_symbols)}",
+            "subscribed": False,
+            "all": True,
+        }
+        return SubscribeResponse(**response)
+
+    async def unsubscribe_client(self, sid: str) -> None:
+        """
+        Drops every subscription held by a client, e.g. when it disconnects.
+
+        Args:
+            sid (str): Socket.IO session ID.
+        """
+        removed = self.subscriptions.remove_client(sid)
+        if removed:
+            self.logger.info(
+                f"{sid} disconnected, dropping upstream subscriptions: {removed}"
+            )
+            self._sync_upstream({key[2] for key in removed})
+
     async def get_historic_data(
         self, kline_request: HistoricalKlineRequest
     ) -> SubscribeResponse:
@@ -0,0 +1,73 @@
+from collections import deque
+from threading import Lock
+from typing import Deque, Dict, List, Optional
+from backend.utils import Logger
+
+# Number of order changes kept for clients resyncing from a sequence number
+DEFAULT_MAX_EVENTS = 1000
+
+
+class OrderEventLog:
+    """
+    Sequenced log of order changes.
+
+    Every created or removed order is appended with a monotonically increasing
+    sequence number, so subscribers receive deltas and can resync from the last
+    sequence number they saw. Only the most recent `max_events` entries are kept;
+    clients that fall further behind must reload the open orders snapshot.
+
+    Attributes:
+        logger (Logger): Logger for logging information and errors.
+        seq (int): Sequence number of the most recent event.
+        events (Deque[dict]): The retained events, oldest first.
+    """
+
+    def __init__(self, max_events: int = DEFAULT_MAX_EVENTS):
+        self.logger = Logger(name=__class__.__name__)
+        self.seq = 0
+        self.events: Deque[dict] = deque(maxlen=max_events)
+        self.lock = Lock()
+
+    def append(self, event_type: str, order: Dict) -> dict:
+        """
+        Records an order change.
+
+        Args:
+            event_type (str): The change type, e.g. "Order:Created" or "Order:Removed".
+            order (Dict): The order data. A shallow copy is stored.
+
+        Returns:
+            dict: The recorded event with its sequence number.
+        """
+        with self.lock:
+            self.seq += 1
+            event = {"seq": self.seq, "event_type": event_type, "order": dict(order)}
+            self.events.append(event)
+            return event
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest retained event, or the next one if empty."""
+        with self.lock:
+            return self.events[0]["seq"] if self.events else self.seq + 1
+
+    def since(self, seq: int) -> Optional[List[dict]]:
+        """
+        Returns the events after a sequence number.
+
+        Args:
+            seq (int): The last sequence number the client has applied.
+
+        Returns:
+            Optional[List[dict]]: The missed events, or None if some of them are no
+            longer retained and the client needs a full snapshot.
+        """
+        with self.lock:
+            if seq >= self.seq:
+                return []
+
+            oldest = self.events[0]["seq"] if self.events else self.seq + 1
+            if seq + 1 < oldest:
+                return None
+
+            return [event for event in self.events if event["seq"] > seq]
@@ -15,6 +15,7 @@ from backend.models import (
 from backend.internal import SocketIOServerClient, MTSocketClient
 from backend.utils import Logger, date_to_timestamp
 from .base_handler import BaseHandler
+from .order_event_log import OrderEventLog
 
 
 class OrderHandler(BaseHandler):
@@ -43,12 +44,14 @@ class OrderHandler(BaseHandler):
                                                  initialize a DWXClient instance.
             pubsub_instance (SocketIOServerClient): The client for Pub/Sub messaging.
         """
+        # Created before the socket client starts, which may emit order events right away
+        self.order_events = OrderEventLog()
+
         super().__init__(mt_client_params, pubsub_instance)
         self.socket_client.verbose_on_order_event = True
 
         self.logger = Logger(name=__class__.__name__)
         self.open_orders: Optional[Dict] = None
-        self.closed_orders: Optional[Dict] = None
 
     async def _handle_order_event(self, latest_order, event: str):
         """
@@ -72,38 +75,71 @@ class OrderHandler(BaseHandler):
         except KeyError:
             pass
 
-    def on_order_event(self, open_orders, closed_orders):
+    def on_order_event(self, open_orders, created_orders, removed_orders):
         """
         Handles outgoing/incoming order events.
 
-        This method receives order event call and performs actions based on the event type.
+        Each created or removed order is appended to the order event log and only
+        those changes are published, tagged with their sequence numbers.
+
+        Args:
+            open_orders (dict): All currently open orders keyed by order ID.
+            created_orders (list): Orders opened since the previous event.
+            removed_orders (list): Orders closed since the previous event.
         """
         self.open_orders = open_orders
-        self.closed_orders = closed_orders
+
+        events = [
+            self.order_events.append(order["event_type"], order)
+            for order in removed_orders + created_orders
+        ]
+        if not events:
+            return
 
         payload = {
+            "seq": self.order_events.seq,
             "open_orders_len": len(self.open_orders),
-            "closed_orders_len": len(self.closed_orders),
-            "open_orders": self.open_orders,
-            "closed_orders": self.closed_orders,
+            "events": events,
         }
         self.logger.debug(f"on_order_event payload: {payload}")
 
         async def main():
-            if len(self.open_orders) > 0:
-                latest_order = list(self.open_orders.values())[-1]
-                self.logger.debug(f"latest_opened_order: {latest_order}")
-                await self._handle_order_event(latest_order, Events.CreateOrder)
+            for order in created_orders:
+                self.logger.debug(f"opened order: {order}")
+                await self._handle_order_event(order, Events.CreateOrder)
 
-            if len(self.closed_orders) > 0:
-                self.logger.debug(f"closed orders: {self.closed_orders}")
-                for closed_order in self.closed_orders:
-                    await self._handle_order_event(closed_order, Events.CloseOrder)
+            for order in removed_orders:
+                self.logger.debug(f"closed order: {order}")
+                await self._handle_order_event(order, Events.CloseOrder)
 
             await self.publish_to_subscriber(Events.Order, payload)
 
         asyncio.run(main())
 
+    async def resync(self, since_seq: Optional[int] = None) -> dict:
+        """
+        Returns the order changes a client missed since a sequence number.
+
+        Falls back to a snapshot of the open orders when the client has no sequence
+        number yet or has fallen behind the retained event window.
+
+        Args:
+            since_seq (Optional[int]): The last sequence number the client applied.
+
+        Returns:
+            dict: Either {"seq", "snapshot": False, "events"} or
+                  {"seq", "snapshot": True, "open_orders"}.
+        """
+        events = self.order_events.since(since_seq) if since_seq is not None else None
+        if events is not None:
+            return {"seq": self.order_events.seq, "snapshot": False, "events": events}
+
+        return {
+            "seq": self.order_events.seq,
+            "snapshot": True,
+            "open_orders": dict(self.socket_client.open_orders),
+        }
+
     async def publish_to_subscriber(self, event_type, payload):
         """
         Publishes an event to the subscriber.
@@ -140,7 +176,7 @@ class OrderHandler(BaseHandler):
             response = {
                 "order_id": str(order_id),
                 "symbol": order["symbol"],
-                "time": date_to_timestamp(order["open_time"]),
+                "time": date_to_timestamp(order["open_time"], source="orders"),
                 "price": str(order["open_price"]),
                 "executed_qty": str(order["lots"]),
                 "side": SideType.from_string(str(order["type"]).upper()),
@@ -173,7 +209,9 @@ class OrderHandler(BaseHandler):
                 "order_id": mt_executed_order["order_id"],
                 "symbol": mt_executed_order["symbol"],
                 "status": mt_executed_order["event_type"],
-                "time": date_to_timestamp(mt_executed_order["open_time"]),
+                "time": date_to_timestamp(
+                    mt_executed_order["open_time"], source="orders"
+                ),
                 "price": str(mt_executed_order["open_price"]),
                 "executed_qty": str(mt_executed_order["lots"]),
                 "side": SideType.from_string(str(mt_executed_order["type"]).upper()),
@@ -217,7 +255,9 @@ class OrderHandler(BaseHandler):
                 "order_id": mt_executed_order["order_id"],
                 "symbol": mt_executed_order["symbol"],
                 "status": mt_executed_order["event_type"],
-                "time": date_to_timestamp(mt_executed_order["open_time"]),
+                "time": date_to_timestamp(
+                    mt_executed_order["open_time"], source="orders"
+                ),
                 "price": str(mt_executed_order["open_price"]),
                 "executed_qty": str(mt_executed_order["lots"]),
                 "side": SideType.from_string(str(mt_executed_order["type"]).upper()),
@@ -263,7 +303,9 @@ class OrderHandler(BaseHandler):
             response = {
                 "order_id": str(mt_executed_order["order_id"]),
                 "symbol": mt_executed_order["symbol"],
-                "time": date_to_timestamp(mt_executed_order["open_time"]),
+                "time": date_to_timestamp(
+                    mt_executed_order["open_time"], source="orders"
+                ),
                 "price": str(mt_executed_order["open_price"]),
                 "executed_qty": str(mt_executed_order["lots"]),
                 "side": SideType.from_string(str(mt_executed_order["type"]).upper()),
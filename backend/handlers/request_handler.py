@@ -91,6 +91,9 @@ class RequestHandler:
         await request_handler.register_handler(
             Events.ModifyOrder, request_handler.modify_order_handler
         )
+        await request_handler.register_handler(
+            Events.ResyncOrders, request_handler.resync_orders_handler
+        )
 
         # Kline
         await request_handler.register_handler(
@@ -99,9 +102,18 @@ class RequestHandler:
         await request_handler.register_handler(
             Events.KlineSubscribeBar, request_handler.add_kline_bar_subscriber
         )
+        await request_handler.register_handler(
+            Events.KlineUnsubscribeTick, request_handler.remove_kline_tick_subscriber
+        )
+        await request_handler.register_handler(
+            Events.KlineUnsubscribeBar, request_handler.remove_kline_bar_subscriber
+        )
         await request_handler.register_handler(
             Events.KlineHistorical, request_handler.get_historical_kline_data
         )
+        await request_handler.server_instance.on_disconnect(
+            request_handler.remove_client
+        )
 
         # Add more event registrations as needed
         request_handler.logger.info("Event handlers setup completed.")
@@ -162,6 +174,28 @@ class RequestHandler:
             self.logger.error(f"Error fetching open orders: {e}")
             return None
 
+    async def resync_orders_handler(self, sid: str, data: dict) -> Optional[dict]:
+        """
+        Handler function for replaying order events a client missed.
+
+        Args:
+            sid (str): Socket.IO session ID.
+            data (dict): Data containing the client's last applied "seq", if any.
+
+        Returns:
+            Optional[dict]: The missed events or an open orders snapshot, None on error.
+        """
+        try:
+            since_seq = (data or {}).get("seq")
+            response = await self.order_handler.resync(
+                int(since_seq) if since_seq is not None else None
+            )
+            await self.server_instance.publish(Events.ResyncOrders, response, room=sid)
+            return response
+        except Exception as e:
+            self.logger.error(f"Error resyncing orders: {e}")
+            return None
+
     async def create_order_handler(
         self, sid: str, data: dict
     ) -> Optional[OrderResponse]:
@@ -240,7 +274,7 @@ class RequestHandler:
 
     async def get_exchange_info_handler(
         self, sid: str, data: dict
-    ) -> Optional[ExchangeInfoResponse]:
+    ) -> Optional[str]:
         """
         Handler function for fetching exchange information.
 
@@ -249,13 +283,11 @@ class RequestHandler:
             data (dict): Data containing request details.
 
         Returns:
-            Optional[ExchangeInfoResponse]: Exchange information if successful, None otherwise.
+            Optional[str]: Serialized exchange information if successful, None otherwise.
         """
         try:
-            exchange_info = await self.exchange_info_handler.get_exchange_info()
-            await self.server_instance.publish(
-                Events.ExchangeInfo, exchange_info.model_dump_json()
-            )
+            exchange_info = await self.exchange_info_handler.get_exchange_info_json()
+            await self.server_instance.publish(Events.ExchangeInfo, exchange_info)
             return exchange_info
         except Exception as e:
             self.logger.error(f"Error fetching exchange info: {e}")
@@ -302,15 +334,19 @@ class RequestHandler:
             symbol.time_frame = TimeFrame.CURRENT
             symbol.mode = DataMode.TICK
 
-        sub_response = await self.kline_handler.subscribe(subscribe_request)
+        sub_response = await self.kline_handler.subscribe(subscribe_request, sid)
         if sub_response.subscribed:
             self.logger.info(
                 f"{sid} added to kline tick subscribers => {sub_response.message} | {sub_response.subscribed} | {sub_response.all}"
             )
             self.connected_clients.add(sid)
+            for symbol in subscribe_request.symbols_data:
+                await self.server_instance.join_room(
+                    sid, self.kline_handler.get_room(symbol)
+                )
 
         await self.server_instance.publish(
-            Events.KlineSubscribeTick, sub_response.model_dump_json()
+            Events.KlineSubscribeTick, sub_response.model_dump_json(), room=sid
         )
         return sub_response
 
@@ -332,18 +368,98 @@ class RequestHandler:
 
             symbol.mode = DataMode.BAR
 
-        sub_response = await self.kline_handler.subscribe(subscribe_request)
+        sub_response = await self.kline_handler.subscribe(subscribe_request, sid)
         if sub_response.subscribed:
             self.logger.info(
                 f"{sid} added to kline bar subscribers => {sub_response.message} | {sub_response.subscribed} | {sub_response.all}"
             )
             self.connected_clients.add(sid)
+            for symbol in subscribe_request.symbols_data:
+                await self.server_instance.join_room(
+                    sid, self.kline_handler.get_room(symbol)
+                )
 
         await self.server_instance.publish(
-            Events.KlineSubscribeBar, sub_response.model_dump_json()
+            Events.KlineSubscribeBar, sub_response.model_dump_json(), room=sid
         )
         return sub_response
 
+    async def remove_kline_tick_subscriber(
+        self, sid: str, data: dict
+    ) -> SubscribeResponse:
+        """
+        Removes a subscriber from kline tick data.
+
+        Args:
+            sid (str): Socket.IO session ID.
+            data (dict): Data containing subscription details.
+
+        Returns:
+            SubscribeResponse: Subscription response.
+        """
+        subscribe_request = SubscribeRequest(**data)
+        for symbol in subscribe_request.symbols_data:
+            symbol.time_frame = TimeFrame.CURRENT
+            symbol.mode = DataMode.TICK
+
+        sub_response = await self.kline_handler.unsubscribe(subscribe_request, sid)
+        self.logger.info(
+            f"{sid} removed from kline tick subscribers => {sub_response.message}"
+        )
+        for symbol in subscribe_request.symbols_data:
+            await self.server_instance.leave_room(
+                sid, self.kline_handler.get_room(symbol)
+            )
+
+        await self.server_instance.publish(
+            Events.KlineUnsubscribeTick, sub_response.model_dump_json(), room=sid
+        )
+        return sub_response
+
+    async def remove_kline_bar_subscriber(
+        self, sid: str, data: dict
+    ) -> SubscribeResponse:
+        """
+        Removes a subscriber from kline bar data.
+
+        Args:
+            sid (str): Socket.IO session ID.
+            data (dict): Data containing subscription details.
+
+        Returns:
+            SubscribeResponse: Subscription response.
+        """
+        subscribe_request = SubscribeRequest(**data)
+        for symbol in subscribe_request.symbols_data:
+            if symbol.time_frame == TimeFrame.CURRENT:
+                symbol.time_frame = TimeFrame.M1
+
+            symbol.mode = DataMode.BAR
+
+        sub_response = await self.kline_handler.unsubscribe(subscribe_request, sid)
+        self.logger.info(
+            f"{sid} removed from kline bar subscribers => {sub_response.message}"
+        )
+        for symbol in subscribe_request.symbols_data:
+            await self.server_instance.leave_room(
+                sid, self.kline_handler.get_room(symbol)
+            )
+
+        await self.server_instance.publish(
+            Events.KlineUnsubscribeBar, sub_response.model_dump_json(), room=sid
+        )
+        return sub_response
+
+    async def remove_client(self, sid: str) -> None:
+        """
+        Releases everything held by a disconnected client.
+
+        Args:
+            sid (str): Socket.IO session ID.
+        """
+        self.connected_clients.discard(sid)
+        await self.kline_handler.unsubscribe_client(sid)
+
     async def get_historical_kline_data(
         self, sid: str, data: dict
     ) -> SubscribeResponse:
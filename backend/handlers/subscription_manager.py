@@ -0,0 +1,153 @@
+from threading import Lock
+from typing import Dict, List, Set, Tuple
+from backend.models import SymbolMarketData, TimeFrame, DataMode
+from backend.utils import Logger
+
+SubscriptionKey = Tuple[str, TimeFrame, DataMode]
+
+
+class SubscriptionManager:
+    """
+    Reference-counts market data subscriptions across connected Socket.IO clients.
+
+    Each subscription is keyed on (symbol, time_frame, mode). The terminal only needs
+    to hear about a key when its first subscriber arrives or its last subscriber leaves,
+    so upstream load scales with distinct symbols rather than with connected clients.
+
+    Attributes:
+        logger (Logger): Logger for logging information and errors.
+        subscribers (Dict[SubscriptionKey, Set[str]]): Session IDs interested in each key.
+        client_subscriptions (Dict[str, Set[SubscriptionKey]]): Keys held by each session ID.
+    """
+
+    def __init__(self):
+        self.logger = Logger(name=__class__.__name__)
+        self.subscribers: Dict[SubscriptionKey, Set[str]] = {}
+        self.client_subscriptions: Dict[str, Set[SubscriptionKey]] = {}
+        self.lock = Lock()
+
+    @staticmethod
+    def make_key(symbol_data: SymbolMarketData) -> SubscriptionKey:
+        """
+        Builds the reference-count key for a symbol subscription.
+
+        Args:
+            symbol_data (SymbolMarketData): The requested symbol subscription.
+
+        Returns:
+            SubscriptionKey: The (symbol, time_frame, mode) key.
+        """
+        if symbol_data.mode == DataMode.TICK:
+            return symbol_data.symbol, TimeFrame.CURRENT, DataMode.TICK
+        return symbol_data.symbol, symbol_data.time_frame, DataMode.BAR
+
+    def add(self, sid: str, symbols_data: List[SymbolMarketData]) -> List[SubscriptionKey]:
+        """
+        Registers a client's interest in the given symbols.
+
+        Args:
+            sid (str): Socket.IO session ID.
+            symbols_data (List[SymbolMarketData]): Symbols the client subscribes to.
+
+        Returns:
+            List[SubscriptionKey]: Keys that gained their first subscriber.
+        """
+        added = []
+        with self.lock:
+            for symbol_data in symbols_data:
+                key = self.make_key(symbol_data)
+                sids = self.subscribers.setdefault(key, set())
+                if not sids:
+                    added.append(key)
+                sids.add(sid)
+                self.client_subscriptions.setdefault(sid, set()).add(key)
+
+        return added
+
+    def remove(
+        self, sid: str, symbols_data: List[SymbolMarketData]
+    ) -> List[SubscriptionKey]:
+        """
+        Drops a client's interest in the given symbols.
+
+        Args:
+            sid (str): Socket.IO session ID.
+            symbols_data (List[SymbolMarketData]): Symbols the client unsubscribes from.
+
+        Returns:
+            List[SubscriptionKey]: Keys that lost their last subscriber.
+        """
+        with self.lock:
+            return self._remove_keys(sid, [self.make_key(s) for s in symbols_data])
+
+    def remove_client(self, sid: str) -> List[SubscriptionKey]:
+        """
+        Drops every subscription held by a client, e.g. when it disconnects.
+
+        Args:
+            sid (str): Socket.IO session ID.
+
+        Returns:
+            List[SubscriptionKey]: Keys that lost their last subscriber.
+        """
+        with self.lock:
+            keys = list(self.client_subscriptions.get(sid, ()))
+            return self._remove_keys(sid, keys)
+
+    def _remove_keys(self, sid: str, keys: List[SubscriptionKey]) -> List[SubscriptionKey]:
+        removed = []
+        client_keys = self.client_subscriptions.get(sid, set())
+        for key in keys:
+            sids = self.subscribers.get(key)
+            if sids is None or sid not in sids:
+                continue
+
+            sids.discard(sid)
+            client_keys.discard(key)
+            if not sids:
+                del self.subscribers[key]
+                removed.append(key)
+
+        if not client_keys:
+            self.client_subscriptions.pop(sid, None)
+
+        return removed
+
+    def get_subscriptions(self, mode: DataMode) -> List[SubscriptionKey]:
+        """
+        Lists the keys with at least one subscriber for the given mode.
+
+        Args:
+            mode (DataMode): TICK or BAR.
+
+        Returns:
+            List[SubscriptionKey]: Active keys, in subscription order.
+        """
+        with self.lock:
+            return [key for key in self.subscribers if key[2] == mode]
+
+    def get_subscribers(self, key: SubscriptionKey) -> Set[str]:
+        """
+        Returns the session IDs subscribed to a key.
+
+        Args:
+            key (SubscriptionKey): The (symbol, time_frame, mode) key.
+
+        Returns:
+            Set[str]: A copy of the subscribed session IDs.
+        """
+        with self.lock:
+            return set(self.subscribers.get(key, ()))
+
+    def get_client_subscriptions(self, sid: str) -> List[SubscriptionKey]:
+        """
+        Returns the keys a client is subscribed to.
+
+        Args:
+            sid (str): Socket.IO session ID.
+
+        Returns:
+            List[SubscriptionKey]: The client's subscriptions.
+        """
+        with self.lock:
+            return list(self.client_subscriptions.get(sid, ()))
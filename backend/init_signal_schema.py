@@ -47,6 +47,9 @@ CREATE TABLE IF NOT EXISTS trade_executions (
   raw_response      JSONB
 );
 
+-- Opt-in flag for signal auto-execution
+ALTER TABLE trading_accounts ADD COLUMN IF NOT EXISTS auto_execute BOOLEAN DEFAULT false;
+
 -- Create index if not exists
 DO $$
 BEGIN
@@ -56,6 +59,14 @@ BEGIN
     IF NOT EXISTS (SELECT 1 FROM pg_class WHERE relname = 'idx_executions_signal') THEN
         CREATE INDEX idx_executions_signal ON trade_executions(signal_id);
     END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_class WHERE relname = 'idx_accounts_auto_execute') THEN
+        CREATE INDEX idx_accounts_auto_execute ON trading_accounts(platform_id)
+            WHERE auto_execute AND is_active;
+    END IF;
+    -- Hot-path account lookups (also kept by backend/migrations.py)
+    IF NOT EXISTS (SELECT 1 FROM pg_class WHERE relname = 'idx_accounts_user_platform') THEN
+        CREATE INDEX idx_accounts_user_platform ON trading_accounts(user_id, platform_id);
+    END IF;
 END
 $$;
 """
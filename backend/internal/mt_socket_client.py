@@ -3,6 +3,7 @@ import time
 import json
 import socket
 import logging
+from collections import deque
 from os.path import join, exists
 from traceback import print_exc
 from threading import Thread, Lock
@@ -14,6 +15,9 @@ from backend.utils import Logger
 # * 8192 * 8192# 8192  # Adjust the buffer size as needed (4096)
 SOCKET_BUFFER_SIZE = 1024 * 4
 
+# Closed orders kept in memory; older ones are dropped
+MAX_CLOSED_ORDERS = 1000
+
 
 class MTSocketClient:
     def __init__(
@@ -82,7 +86,7 @@ class MTSocketClient:
         self._last_symbols_data_str = ""
 
         self.open_orders = {}
-        self.closed_orders = []
+        self.closed_orders = deque(maxlen=MAX_CLOSED_ORDERS)
         self.account_info = {}
         self.market_data = {}
         self.bar_data = {}
@@ -268,6 +272,8 @@ class MTSocketClient:
 
             self._last_open_orders_str = text
             new_event = False
+            created_orders = []
+            removed_orders = []
 
             current_order_ids = set(data["orders"].keys())
             with self.lock:
@@ -281,6 +287,7 @@ class MTSocketClient:
                         order["order_id"] = order_id
                         order["event_type"] = "Order:Removed"
                         self.closed_orders.append(order)
+                        removed_orders.append(order)
                         new_event = True
                         if self.verbose_on_order_event:
                             self.logger.debug(f"Order removed: {order}")
@@ -294,6 +301,7 @@ class MTSocketClient:
                         order["open_time"], "%Y.%m.%d %H:%M:%S"
                     )
                     self.open_orders[order_id] = order
+                    created_orders.append(order)
                     # del self.open_orders[order_id]["order_id"]
                     new_event = True
                     if self.verbose_on_order_event:
@@ -318,8 +326,9 @@ class MTSocketClient:
                         del order["open_time_dt"]
 
                 if self.event_handler is not None and new_event:
+                    created_orders.sort(key=lambda order: order["open_time"])
                     self.event_handler.on_order_event(
-                        self.open_orders, self.closed_orders
+                        self.open_orders, created_orders, removed_orders
                     )
 
                 if self.load_orders_from_file:
@@ -730,14 +739,17 @@ class MTSocketClient:
 
         Active symbols are defined are those symbols whose spread > 0.
         """
-        self.symbols_data = self.send_command("GET_ACTIVE_SYMBOLS", str(symbol))
-        if self.symbols_data is None:
+        symbols_data = self.send_command("GET_ACTIVE_SYMBOLS", str(symbol))
+        if symbols_data is None:
             return None
 
-        if self.event_handler is not None:
-            self.event_handler.on_symbols_data(self.symbols_data)
+        # Only a full listing replaces the known symbols
+        if not symbol:
+            self.symbols_data = symbols_data
+            if self.event_handler is not None:
+                self.event_handler.on_symbols_data(self.symbols_data)
 
-        return self.symbols_data
+        return symbols_data
 
     def subscribe_symbols(self, symbols):
         """Sends a SUBSCRIBE_SYMBOLS command to subscribe to market (tick) data."""
@@ -1,7 +1,7 @@
 import json
 import asyncio
 import socketio
-from typing import Callable, Union
+from typing import Callable, Optional, Union
 from backend.utils import Logger
 
 
@@ -122,6 +122,25 @@ class SocketIOServerClient:
             if self.verbose and self.log:
                 self.log.error(f"Socket.IO 'on' server event error: {e}")
 
+    async def on_disconnect(self, handler: Callable):
+        """
+        Registers a handler called with the session ID when a client disconnects.
+
+        Args:
+            handler (Callable): The handler function to be called on disconnect.
+        """
+        try:
+
+            @self.instance.on("disconnect")
+            async def disconnect_handler(sid, *args):
+                if self.verbose and self.log:
+                    self.log.info(f"Client {sid} disconnected")
+                await handler(sid)
+
+        except Exception as e:
+            if self.verbose and self.log:
+                self.log.error(f"Socket.IO 'disconnect' event error: {e}")
+
     async def on_client_event(self, event: str, handler: Callable):
         """
         Registers an event handler for a specific event in the client.
@@ -170,18 +189,50 @@ class SocketIOServerClient:
             if self.verbose and self.log:
                 self.log.error(f"Socket.IO request error: {e}")
 
-    async def publish(self, event: str, payload: dict):
+    async def publish(self, event: str, payload: dict, room: Optional[str] = None):
         """
         Publishes an event to the server or client.
 
         Args:
             event (str): The event name.
             payload (dict): The event data to be published.
+            room (Optional[str]): Restrict delivery to clients in this room. Defaults to all clients.
         """
-        await self.emit(event, payload)
+        if room is not None:
+            await self.emit(event, payload, room=room)
+        else:
+            await self.emit(event, payload)
         if self.verbose and self.log:
             self.log.info(f"Published event: {event}")
 
+    async def join_room(self, sid: str, room: str):
+        """
+        Adds a client to a room so it receives events published to that room.
+
+        Args:
+            sid (str): Socket.IO session ID.
+            room (str): The room name.
+        """
+        try:
+            await self.instance.enter_room(sid, room)
+        except Exception as e:
+            if self.verbose and self.log:
+                self.log.error(f"Socket.IO enter_room error: {e}")
+
+    async def leave_room(self, sid: str, room: str):
+        """
+        Removes a client from a room.
+
+        Args:
+            sid (str): Socket.IO session ID.
+            room (str): The room name.
+        """
+        try:
+            await self.instance.leave_room(sid, room)
+        except Exception as e:
+            if self.verbose and self.log:
+                self.log.error(f"Socket.IO leave_room error: {e}")
+
     async def subscribe_to_server(self, event: str, handler: Callable):
         """
         Subscribes to a specific event from the server and registers a handler.
@@ -1,43 +1,46 @@
-from fastapi import FastAPI, HTTPException, Body, Depends, Request
+from fastapi import FastAPI, HTTPException, Body, Depends, Request, Header, Response
 from sqlalchemy.orm import Session
-from backend.database import init_db, get_db
-from backend.services.feed_service import FeedService
+from backend.database import init_db, get_db, SessionLocal, close_db
+from backend.services.feed_service import FeedService, feed_counters
 from backend.services.rank_service import RankService
 from backend.services.leaderboard_service import LeaderboardService
 from backend.models.feed_models import PostResponse, CreateUserRequest, RankUpdateRequest, LeaderboardUserResponse, UpdateStatsRequest
 
 from fastapi.middleware.cors import CORSMiddleware
 import socketio
-from typing import Optional, Dict
+from typing import Callable, Optional, Dict
 from pydantic import BaseModel
 import asyncio
 import logging
 import sys
 print(f"DEBUG SYS PATH: {sys.path}")
 import os
-from supabase import create_client, Client
 from dotenv import load_dotenv
 from datetime import datetime
 
-# Initialize Supabase Client for direct operations
 load_dotenv()
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL", ""),
-    os.getenv("SUPABASE_SERVICE_KEY", "") or os.getenv("SUPABASE_KEY", "")
+# Shared async Supabase client for direct operations (never blocks the event loop)
+from backend.supabase_db import (
+    close_supabase,
+    get_user_id,
+    insert_signal,
 )
+from backend.write_behind import write_behind
+# Single lookup/write path for trading accounts across SQLAlchemy and Supabase
+from backend.account_repository import accounts
 
 import sys
 
 from backend.internal import SocketIOServerClient
 from backend.handlers import RequestHandler
-from backend.models import MTClientParams, CreateOrderRequest, SideType, OrderType
+from backend.models import MTClientParams, CreateOrderRequest, SideType, OrderType, Rooms
 from backend.settings import settings
 from backend.dxtrade import DxTradeClient, CopierEngine
 from backend.services.matchtrader_client import MatchTraderClient
 from backend.services.tradelocker_client import TradeLockerClient
 from backend.meta_api_service import meta_api_service
-from backend.models.db_models import TradingAccount, TradingPlatform
 from backend.signal_approval_router import router as signal_router
+from backend.bridge_ipc import BridgeChannelServer
 import json
 
 # Initialize Logger
@@ -67,6 +70,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(signal_router)
@@ -105,6 +109,7 @@ request_handler: Optional[RequestHandler] = None
 # sio is already initialized above
 # sio: Optional[socketio.AsyncServer] = None
 copier_engine: Optional[CopierEngine] = None
+bridge_channel = BridgeChannelServer()
 master_client: Optional[DxTradeClient] = None
 
 @app.on_event("startup")
@@ -167,6 +172,8 @@ async def startup_event():
     # Initialize MetaApi Service (and Bridge)
     try:
         meta_api_service.set_socketio(sio)
+        # Bridge events arrive over a persistent local socket rather than HTTP
+        await bridge_channel.start(meta_api_service.broadcast_signal)
         # Instead of starting the listener here (which hangs due to Socket.IO conflict),
         # we start the bridge process using the isolated library path.
         bridge_script = os.path.join(os.path.dirname(__file__), "meta_api_bridge.py")
@@ -182,8 +189,36 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Failed to init MetaApi: {e}")
 
+    # Workers for queued Telegram signals (persist, broadcast, reply)
+    signal_queue.start(_process_signal_job, on_failed=_on_signal_job_failed)
+    # Batched execution logs and signal statuses (replays any left from the last run)
+    write_behind.start()
+    # Buffered like/comment counters (only when FEED_COUNTER_FLUSH_INTERVAL is set)
+    feed_counters.start(SessionLocal)
+
+    if TELEGRAM_POLLING and TELEGRAM_BOT_TOKEN:
+        telegram_poller.start()
+        logger.info("Telegram long polling started")
+
     logger.info("Backend Startup Complete")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await telegram_poller.stop()
+    await bridge_channel.stop()
+    await meta_api_service.close()
+    await signal_queue.stop()
+    signal_dedupe.close()
+    auto_executor.close()
+    if _telegram_http is not None:
+        await _telegram_http.aclose()
+    await close_tradelocker_http()
+    # Flush buffered executions/statuses before the Supabase client goes away
+    await write_behind.stop()
+    await close_supabase()
+    await feed_counters.stop()
+    await close_db()
+
 
 @app.post("/execute-swipe")
 async def execute_swipe(signal: TradeSignal):
@@ -240,33 +275,16 @@ async def internal_signal(request: Request):
     # ── Path A: Telegram webhook update format ─────────────
     message = payload.get("message") or payload.get("channel_post")
     if message:
+        key = update_key(payload)
+        if signal_dedupe.seen(key):
+            return {"ok": True}
+
         text    = message.get("text", "")
         chat    = message.get("chat", {})
         chat_id = chat.get("id")
         logger.info(f"[Telegram via internal] Parsing: {text[:80]}")
 
-        sig = _parse_telegram_signal(text)
-        if sig:
-            try:
-                signal_id = await _publish_signal_to_supabase(sig)
-                await sio.emit("new_signal", {
-                    "id": signal_id,
-                    "symbol": sig["symbol"],
-                    "direction": sig["direction"],
-                    "entry": sig["entry"],
-                    "stop_loss": sig["stop_loss"],
-                    "take_profit": sig["take_profit"],
-                    "status": "pending",
-                    "source": "telegram",
-                })
-                logger.info(f"[Telegram] Signal saved and broadcast: {sig['direction']} {sig['symbol']}")
-                if chat_id:
-                    await _send_telegram_reply(chat_id,
-                        f"✅ Signal received!\n{sig['direction']} {sig['symbol']}\n"
-                        f"Entry: {sig['entry']} | SL: {sig['stop_loss']} | TP: {sig['take_profit']}")
-            except Exception as e:
-                logger.error(f"[Telegram] Failed to save signal: {e}")
-        else:
+        if not _enqueue_telegram_signal(text, chat_id, dedupe_key=key):
             logger.info("[Telegram] Not a valid signal format, ignoring.")
         return {"ok": True}
 
@@ -279,6 +297,68 @@ async def internal_signal(request: Request):
 
 
 
+@sio.on("subscribe_symbols")
+async def subscribe_symbols(sid, data):
+    """
+    Join the price/position rooms for the symbols a dashboard is displaying.
+    Accepts {"symbols": [...]} or a bare list.
+    """
+    symbols = data.get("symbols", []) if isinstance(data, dict) else (data or [])
+    await meta_api_service.subscribe_client(sid, [str(s) for s in symbols if s])
+    return {"status": "success", "symbols": symbols}
+
+@sio.on("subscribe_executions")
+async def subscribe_executions(sid, data):
+    """
+    Join the caller's room for auto-execution results.
+    Accepts {"token": <Supabase access token>}.
+    """
+    token = data.get("token") if isinstance(data, dict) else data
+    user_id = await get_user_id(token) if token else None
+    if not user_id:
+        return {"status": "error", "message": "Invalid session"}
+    await sio.enter_room(sid, Rooms.user(user_id))
+    return {"status": "success"}
+
+@sio.on("unsubscribe_symbols")
+async def unsubscribe_symbols(sid, data):
+    symbols = data.get("symbols", []) if isinstance(data, dict) else (data or [])
+    await meta_api_service.unsubscribe_client(sid, [str(s) for s in symbols if s])
+    return {"status": "success", "symbols": symbols}
+
+
+# ── Bridge master control ────────────────────────────────
+BRIDGE_CONTROL_KEY = os.getenv("VERSTIGE_API_SECRET")
+
+class BridgeMasterRequest(BaseModel):
+    account_id: str  # MetaApi account UUID, login or name
+
+def verify_bridge_key(x_api_key: str = Header(...)):
+    if not BRIDGE_CONTROL_KEY or x_api_key != BRIDGE_CONTROL_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    return x_api_key
+
+async def _send_bridge_command(command: str, data: dict):
+    if not await bridge_channel.send_command(command, data):
+        raise HTTPException(status_code=503, detail="MetaApi bridge not connected")
+
+@app.get("/api/bridge/masters")
+async def list_bridge_masters(_: str = Depends(verify_bridge_key)):
+    """Master accounts the MetaApi bridge is following."""
+    return {"masters": meta_api_service.bridge_masters}
+
+@app.post("/api/bridge/masters")
+async def add_bridge_master(req: BridgeMasterRequest, _: str = Depends(verify_bridge_key)):
+    """Start following another master account in the running bridge."""
+    await _send_bridge_command("add_master", {"account_id": req.account_id})
+    return {"status": "success", "message": f"Adding master {req.account_id}"}
+
+@app.delete("/api/bridge/masters/{account_id}")
+async def remove_bridge_master(account_id: str, _: str = Depends(verify_bridge_key)):
+    await _send_bridge_command("remove_master", {"account_id": account_id})
+    return {"status": "success", "message": f"Removing master {account_id}"}
+
+
 @app.post("/api/test-signal")
 async def test_signal():
     """
@@ -362,10 +442,14 @@ async def telegram_signal_webhook(signal: TelegramSignal):
     """
     if not sio:
         raise HTTPException(status_code=503, detail="Socket.IO not initialized")
+
+    key = content_key(signal.model_dump())
+    if not signal_dedupe.mark(key, ttl=CONTENT_TTL):
+        return {"status": "success", "message": "Duplicate signal ignored"}
     
     # Format for frontend
     signal_data = {
-        "id": int(asyncio.get_event_loop().time() * 1000), # Simple unique ID from timestamp
+        "id": str(_uuid.uuid4()),
         "provider": signal.provider,
         "providerRank": signal.provider_rank,
         "pair": signal.pair.upper(),
@@ -383,22 +467,35 @@ async def telegram_signal_webhook(signal: TelegramSignal):
     }
     
     # Broadcast to all connected clients
-    await sio.emit("new_signal", signal_data)
+    try:
+        await sio.emit("new_signal", signal_data)
+    except Exception:
+        # Let the sender's retry through
+        signal_dedupe.forget(key)
+        raise
     
     logger.info(f"Broadcasted Telegram Signal: {signal.pair} {signal.action}")
     return {"status": "success", "message": "Signal broadcasted"}
 
 
 # ── Telegram Webhook (production path — registered with Telegram API) ──────────
-import re as _re, uuid as _uuid
+import uuid as _uuid
+import httpx as _httpx
 from datetime import timezone as _tz
+from backend.signal_parser import parse_signal
+from backend.signal_queue import signal_queue
+from backend.signal_dedupe import CONTENT_TTL, content_key, signal_dedupe, update_key
+from backend.telegram_poller import TelegramPoller
+from backend.auto_execution import auto_executor
+from tradelocker_execution import close_http as close_tradelocker_http
 
 TELEGRAM_BOT_TOKEN  = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+TELEGRAM_POLLING = os.getenv("TELEGRAM_POLLING", "").lower() in ("1", "true", "yes")
 
 def _parse_telegram_signal(text: str):
     """
-    Parse signals in this format:
+    Parse a Telegram signal with the shared single-pass parser, e.g.:
       BUY XAUUSD
       Entry: 2345.50
       SL: 2330.00
@@ -406,48 +503,19 @@ def _parse_telegram_signal(text: str):
       Risk: 1%
       TF: H1
       Notes: Optional note
+    Provider variants (emoji markers, TP1/TP2 lists, entry ranges) are
+    registered in backend.signal_parser.
     """
-    text = text.strip()
-    direction = "BUY" if _re.search(r"\bBUY\b", text, _re.I) else None
-    if not direction:
-        direction = "SELL" if _re.search(r"\bSELL\b", text, _re.I) else None
-    if not direction:
-        return None
-
-    m = _re.search(r"(?:BUY|SELL)\s+(\S+)", text, _re.I)
-    symbol = m.group(1).upper() if m else None
-    if not symbol:
-        return None
-
-    def _extract(pat):
-        m = _re.search(pat, text, _re.I)
-        return float(m.group(1)) if m else None
-
-    entry = _extract(r"entry[:\s]+([0-9]+(?:\.[0-9]+)?)")
-    sl    = _extract(r"sl[:\s]+([0-9]+(?:\.[0-9]+)?)")
-    tp    = _extract(r"tp[:\s]+([0-9]+(?:\.[0-9]+)?)")
-    risk  = _extract(r"risk[:\s]+([0-9]+(?:\.[0-9]+)?)%?") or 1.0
-    tf_m  = _re.search(r"tf[:\s]+(M\d+|H\d+|D\d?|W\d?)", text, _re.I)
-    notes_m = _re.search(r"notes?[:\s]+(.+)", text, _re.I)
-
-    if not all([entry, sl, tp]):
-        return None
+    sig = parse_signal(text.strip())
+    return sig.to_dict() if sig else None
 
-    return {
-        "symbol": symbol,
-        "direction": direction,
-        "entry": entry,
-        "stop_loss": sl,
-        "take_profit": tp,
-        "risk_percent": risk,
-        "timeframe": tf_m.group(1).upper() if tf_m else None,
-        "notes": notes_m.group(1).strip() if notes_m else None,
-        "source": "telegram",
-    }
-
-async def _publish_signal_to_supabase(sig: dict) -> str:
-    """Insert a parsed signal into Supabase signals table and return its ID."""
-    signal_id = str(_uuid.uuid4())
+async def _publish_signal_to_supabase(sig: dict, signal_id: Optional[str] = None) -> str:
+    """
+    Insert a parsed signal into Supabase signals table and return its ID.
+    Passing a signal_id makes the write idempotent, so queue retries are safe.
+    """
+    upsert = signal_id is not None
+    signal_id = signal_id or str(_uuid.uuid4())
     now = datetime.now(_tz.utc).isoformat()
 
     if sig["direction"] == "BUY":
@@ -475,18 +543,139 @@ async def _publish_signal_to_supabase(sig: dict) -> str:
         "created_at":   now,
     }
 
-    result = supabase.table("signals").insert(record).execute()
+    await insert_signal(record, upsert=upsert)
     logger.info(f"[Telegram] Signal inserted to Supabase: {sig['direction']} {sig['symbol']}")
     return signal_id
 
+_telegram_http: Optional[_httpx.AsyncClient] = None
+
 async def _send_telegram_reply(chat_id: int, text: str):
     """Send a confirmation reply back to the Telegram chat."""
+    global _telegram_http
     if not TELEGRAM_BOT_TOKEN:
         return
-    import httpx as _httpx
+    if _telegram_http is None:
+        # Reused across replies so each one skips the TLS handshake
+        _telegram_http = _httpx.AsyncClient(timeout=10)
     url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    async with _httpx.AsyncClient() as client:
-        await client.post(url, json={"chat_id": chat_id, "text": text})
+    resp = await _telegram_http.post(url, json={"chat_id": chat_id, "text": text})
+    resp.raise_for_status()
+
+def _enqueue_telegram_signal(text: str, chat_id: Optional[int],
+                             dedupe_key: Optional[str] = None) -> bool:
+    """
+    Parse a Telegram message and, if it is a signal, queue it for the workers.
+    The dedupe key is recorded in the same transaction as the job, so an
+    update only counts as seen once it is safely queued.
+    Returns False for messages that are not signals.
+    """
+    sig = _parse_telegram_signal(text)
+    if not sig:
+        return False
+    guard = None
+    if dedupe_key is not None:
+        guard = lambda db: signal_dedupe.mark(dedupe_key, db=db)
+    signal_queue.enqueue({
+        "signal": sig,
+        "signal_id": str(_uuid.uuid4()),
+        "chat_id": chat_id,
+        "done": [],
+    }, guard=guard)
+    return True
+
+async def _process_signal_job(job: dict, checkpoint: Callable[[], None]):
+    """
+    Queue worker: persist, broadcast and confirm a Telegram signal, then
+    auto-execute it for opted-in followers.
+    Completed steps are recorded in job["done"] and checkpointed, so a retry
+    or a restart after a crash resumes after them.
+    """
+    sig, signal_id, chat_id, done = job["signal"], job["signal_id"], job.get("chat_id"), job["done"]
+
+    if "persist" not in done:
+        await _publish_signal_to_supabase(sig, signal_id)
+        done.append("persist")
+        checkpoint()
+
+    if "broadcast" not in done:
+        # Also broadcast via Socket.IO for real-time update to connected dashboards
+        await sio.emit("new_signal", {
+            "id": signal_id,
+            "symbol": sig["symbol"],
+            "direction": sig["direction"],
+            "entry": sig["entry"],
+            "stop_loss": sig["stop_loss"],
+            "take_profit": sig["take_profit"],
+            "status": "pending",
+            "source": "telegram",
+        })
+        done.append("broadcast")
+        checkpoint()
+        logger.info(f"[Telegram] Signal saved and broadcast: {sig['direction']} {sig['symbol']}")
+
+    if chat_id and "reply" not in done:
+        await _send_telegram_reply(chat_id,
+            f"✅ Signal received!\n{sig['direction']} {sig['symbol']}\n"
+            f"Entry: {sig['entry']} | SL: {sig['stop_loss']} | TP: {sig['take_profit']}")
+        done.append("reply")
+        checkpoint()
+
+    if "auto_execute" not in done:
+        # Last, so followers' orders don't hold up the broadcast and reply.
+        # A resumed job skips followers the earlier run already claimed.
+        await _auto_execute_signal({**sig, "id": signal_id})
+        done.append("auto_execute")
+        checkpoint()
+
+async def _auto_execute_signal(record: dict):
+    """
+    Fan a new signal out to opted-in users, streaming each result to its user.
+    Per-order failures are reported to their users; anything else raises, so
+    the signal job retries the fan-out.
+    """
+    async def stream(result: dict):
+        await sio.emit("auto_execution", result, room=Rooms.user(result["user_id"]))
+
+    await auto_executor.run(record, on_result=stream)
+
+async def _on_signal_job_failed(job: dict, error: Exception):
+    logger.error(f"[Telegram] Failed to publish signal: {error}")
+    chat_id = job.get("chat_id")
+    if chat_id and "persist" not in job["done"]:
+        await _send_telegram_reply(chat_id, f"❌ Failed to save signal: {str(error)}")
+
+def _ingest_telegram_update(update: dict):
+    """
+    Shared by the webhook and the in-process poller: dedupe the update and
+    queue it if it is a signal.
+    """
+    message = update.get("message") or update.get("channel_post")
+    if not message:
+        return
+
+    # Telegram re-delivers updates it thinks timed out
+    key = update_key(update)
+    if signal_dedupe.seen(key):
+        return
+
+    text    = message.get("text", "")
+    chat    = message.get("chat", {})
+    chat_id = chat.get("id")
+
+    logger.info(f"[Telegram] Received message: {text[:80]}")
+
+    # Persist, broadcast and reply happen in the signal queue workers, so
+    # Telegram gets its answer without waiting on Supabase
+    if not _enqueue_telegram_signal(text, chat_id, dedupe_key=key):
+        logger.info(f"[Telegram] Message not a valid signal, ignoring.")
+
+async def _poll_telegram_update(update: dict):
+    _ingest_telegram_update(update)
+
+# Long-poll getUpdates inside this process instead of receiving webhooks
+# (TELEGRAM_POLLING=1). The poller is a task on the app's event loop, not a
+# loop of its own. Only one of the two modes can be active per bot.
+telegram_poller = TelegramPoller(_poll_telegram_update, token=TELEGRAM_BOT_TOKEN)
 
 @app.post("/api/telegram/webhook")
 async def telegram_webhook(request: Request):
@@ -502,42 +691,7 @@ async def telegram_webhook(request: Request):
             raise HTTPException(status_code=403, detail="Invalid webhook secret")
 
     body = await request.json()
-    message = body.get("message") or body.get("channel_post")
-    if not message:
-        return {"ok": True}
-
-    text    = message.get("text", "")
-    chat    = message.get("chat", {})
-    chat_id = chat.get("id")
-
-    logger.info(f"[Telegram] Received message: {text[:80]}")
-
-    sig = _parse_telegram_signal(text)
-    if sig:
-        try:
-            signal_id = await _publish_signal_to_supabase(sig)
-            # Also broadcast via Socket.IO for real-time update to connected dashboards
-            await sio.emit("new_signal", {
-                "id": signal_id,
-                "symbol": sig["symbol"],
-                "direction": sig["direction"],
-                "entry": sig["entry"],
-                "stop_loss": sig["stop_loss"],
-                "take_profit": sig["take_profit"],
-                "status": "pending",
-                "source": "telegram",
-            })
-            if chat_id:
-                await _send_telegram_reply(chat_id,
-                    f"✅ Signal received!\n{sig['direction']} {sig['symbol']}\n"
-                    f"Entry: {sig['entry']} | SL: {sig['stop_loss']} | TP: {sig['take_profit']}")
-        except Exception as e:
-            logger.error(f"[Telegram] Failed to publish signal: {e}")
-            if chat_id:
-                await _send_telegram_reply(chat_id, f"❌ Failed to save signal: {str(e)}")
-    else:
-        logger.info(f"[Telegram] Message not a valid signal, ignoring.")
-
+    _ingest_telegram_update(body)
     return {"ok": True}
 
 
@@ -873,8 +1027,10 @@ async def tradelocker_authenticate(creds: TradeLockerAuthRequest):
 
 from datetime import datetime
 
+TRADELOCKER_PLATFORM = {"name": "TradeLocker", "api_endpoint": "https://live.tradelocker.com/backend-api"}
+
 @app.post("/api/tradelocker/select-account")
-async def tradelocker_select_account(req: TradeLockerAccountSelectRequest, db: Session = Depends(get_db)):
+async def tradelocker_select_account(req: TradeLockerAccountSelectRequest):
     try:
         session_id = req.email
         client = _normalize_session_url(tradelocker_sessions.get(session_id))
@@ -888,17 +1044,9 @@ async def tradelocker_select_account(req: TradeLockerAccountSelectRequest, db: S
             analytics = client.get_account_analytics()
             history = client.get_history()
             
-            # Persistence Logic
+            # Persistence Logic (off the event loop)
             try:
-                # 1. Get/Create Platform
-                platform = db.query(TradingPlatform).filter(TradingPlatform.code == 'tradelocker').first()
-                if not platform:
-                    platform = TradingPlatform(name="TradeLocker", code="tradelocker", api_endpoint="https://live.tradelocker.com/backend-api")
-                    db.add(platform)
-                    db.commit()
-                    db.refresh(platform)
-                
-                # 2. Prepare Credentials (include broker_url so re-auth uses the right server)
+                # Include broker_url so re-auth uses the right server
                 creds = {
                     "email": client.email,
                     "password": client.password,
@@ -909,32 +1057,18 @@ async def tradelocker_select_account(req: TradeLockerAccountSelectRequest, db: S
                     "account_id": client.account_id,
                     "acc_num": client.acc_num
                 }
-                
-                # 3. Update/Create Account
-                account = db.query(TradingAccount).filter(
-                    TradingAccount.user_id == req.user_id,
-                    TradingAccount.platform_id == platform.id
-                ).first()
-                
-                if not account:
-                    account = TradingAccount(
-                        user_id=req.user_id,
-                        platform_id=platform.id,
-                        account_name=f"TradeLocker {client.acc_num}",
-                        account_number=str(client.acc_num) if client.acc_num else "Unknown",
-                        account_type="LIVE" if "live" in client.base_url else "DEMO",
-                        currency="USD",
-                        server=client.server
-                    )
-                    db.add(account)
-                
-                account.balance = balance.get('balance')
-                account.equity = balance.get('equity')
-                account.margin = balance.get('margin_used')
-                account.free_margin = balance.get('free_margin')
-                account.encrypted_credentials = json.dumps(creds)
-                account.last_sync_at = datetime.now()
-                db.commit()
+                await accounts.save_local_account(req.user_id, "tradelocker", {
+                    "account_name": f"TradeLocker {client.acc_num}",
+                    "account_number": str(client.acc_num) if client.acc_num else "Unknown",
+                    "account_type": "LIVE" if "live" in client.base_url else "DEMO",
+                    "currency": "USD",
+                    "server": client.server,
+                    "balance": balance.get('balance'),
+                    "equity": balance.get('equity'),
+                    "margin": balance.get('margin_used'),
+                    "free_margin": balance.get('free_margin'),
+                    "encrypted_credentials": json.dumps(creds)
+                }, TRADELOCKER_PLATFORM)
             except Exception as db_e:
                 logger.error(f"Failed to persist account: {db_e}")
                 # Don't fail the request if persistence fails, but log it
@@ -963,11 +1097,9 @@ async def tradelocker_account_data(email: str, user_id: Optional[str] = None):
     if not client and user_id:
         logger.info(f"Session missing for {email}, attempting re-auth using user_id {user_id}")
         try:
-            # Look up account in Supabase
-            acc_res = supabase.table("trading_accounts").select("*").eq("user_id", user_id).eq("provider", "tradelocker").execute()
-            if acc_res.data:
-                sb_row = acc_res.data[0]
-                creds_json = sb_row.get("encrypted_credentials", "{}")
+            sb_row = await accounts.get_account(user_id, "tradelocker")
+            if sb_row:
+                creds_json = sb_row.get("encrypted_credentials") or "{}"
                 creds = json.loads(creds_json)
                 stored_email = creds.get('email')
                 stored_password = creds.get('password')
@@ -992,7 +1124,7 @@ async def tradelocker_account_data(email: str, user_id: Optional[str] = None):
                         client = new_client
                         logger.info(f"Re-authentication successful for {stored_email}")
             else:
-                logger.warning(f"No trading_account found in Supabase for user_id={user_id}")
+                logger.warning(f"No trading_account found for user_id={user_id}")
         except Exception as auth_err:
             logger.error(f"Auto re-auth failed: {auth_err}")
 
@@ -1036,18 +1168,7 @@ async def tradelocker_save_account(req: TradeLockerSaveRequest):
     try:
         logger.info(f"Saving TradeLocker account for user {req.user_id} directly to Supabase")
         
-        # 1. Get/Create Platform row (for platform_id FK)
-        plat_res = supabase.table("trading_platforms").select("id").eq("code", "tradelocker").execute()
-        if not plat_res.data:
-            # Create it — use correct column name from schema
-            plat_res = supabase.table("trading_platforms").insert({
-                "name": "TradeLocker", "code": "tradelocker",
-                "api_base_url": "https://live.tradelocker.com/backend-api"
-            }).execute()
-
-        platform_id = plat_res.data[0]['id'] if plat_res.data else None
-
-        # 2. Prepare Credentials (include acc_num and broker_url for session rehydration after restart)
+        # 1. Prepare Credentials (include acc_num and broker_url for session rehydration after restart)
         # Pull acc_num from active in-memory session if available
         active_client = tradelocker_sessions.get(req.email)
         acc_num = active_client.acc_num if active_client else None
@@ -1061,15 +1182,10 @@ async def tradelocker_save_account(req: TradeLockerSaveRequest):
             "broker_url": broker_url
         }
 
-        # 3. Upsert Account — only columns confirmed to exist in trading_accounts schema
+        # 2. Upsert Account — only columns confirmed to exist in trading_accounts schema
         # Schema columns: id, user_id, provider, account_id, account_name, encrypted_credentials,
         #                  server, is_active, platform_id, email, balance, equity, currency,
         #                  account_type, created_at, updated_at, last_sync_at
-        existing = supabase.table("trading_accounts").select("id") \
-            .eq("user_id", req.user_id) \
-            .eq("provider", "tradelocker") \
-            .execute()
-
         payload = {
             "user_id": req.user_id,
             "provider": "tradelocker",
@@ -1083,16 +1199,14 @@ async def tradelocker_save_account(req: TradeLockerSaveRequest):
             "account_type": req.account_type,
             "encrypted_credentials": json.dumps(creds),
             "is_active": True,
-            "last_sync_at": datetime.now().isoformat(),
+            "last_sync_at": datetime.now(_tz.utc).isoformat(),
         }
-        if platform_id:
-            payload["platform_id"] = platform_id
 
-        if existing.data:
-            row_id = existing.data[0]['id']
-            supabase.table("trading_accounts").update(payload).eq("id", row_id).execute()
-        else:
-            supabase.table("trading_accounts").insert(payload).execute()
+        # platform_id FK is filled in, creating the platform row if missing
+        await accounts.save_account(req.user_id, "tradelocker", payload, platform={
+            "name": "TradeLocker",
+            "api_base_url": "https://live.tradelocker.com/backend-api"
+        })
 
         logger.info(f"Successfully saved account for user {req.user_id}")
         return {"status": "success", "message": "Account saved successfully to Supabase"}
@@ -1107,17 +1221,7 @@ async def dxtrade_save_account(req: DxTradeSaveRequest):
     try:
         logger.info(f"Saving DXTrade account for user {req.user_id} directly to Supabase")
         
-        # 1. Get/Create Platform row
-        plat_res = supabase.table("trading_platforms").select("id").eq("code", "dxtrade").execute()
-        if not plat_res.data:
-            plat_res = supabase.table("trading_platforms").insert({
-                "name": "DXTrade", "code": "dxtrade",
-                "api_base_url": "https://trader.liquidcharts.com"
-            }).execute()
-
-        platform_id = plat_res.data[0]['id'] if plat_res.data else None
-
-        # 2. Prepare Credentials
+        # 1. Prepare Credentials
         creds = {
             "username": req.username,
             "password": req.password,
@@ -1126,12 +1230,7 @@ async def dxtrade_save_account(req: DxTradeSaveRequest):
             "account_id": req.account_id
         }
 
-        # 3. Upsert Account
-        existing = supabase.table("trading_accounts").select("id") \
-            .eq("user_id", req.user_id) \
-            .eq("provider", "dxtrade") \
-            .execute()
-
+        # 2. Upsert Account (platform row is created if missing)
         payload = {
             "user_id": req.user_id,
             "provider": "dxtrade",
@@ -1143,16 +1242,14 @@ async def dxtrade_save_account(req: DxTradeSaveRequest):
             "equity": req.equity,
             "currency": req.currency,
             "account_type": "live" if "live" in req.vendor.lower() else "demo",
-            "platform_id": platform_id,
             "is_active": True,
             "encrypted_credentials": json.dumps(creds)
         }
 
-        if existing.data:
-            row_id = existing.data[0]['id']
-            supabase.table("trading_accounts").update(payload).eq("id", row_id).execute()
-        else:
-            supabase.table("trading_accounts").insert(payload).execute()
+        await accounts.save_account(req.user_id, "dxtrade", payload, platform={
+            "name": "DXTrade",
+            "api_base_url": "https://trader.liquidcharts.com"
+        })
 
         logger.info(f"Successfully saved DXTrade account for user {req.user_id}")
         return {"status": "success", "message": "DXTrade account saved successfully"}
@@ -1205,15 +1302,32 @@ def simulate_rank_update(req: RankUpdateRequest, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/rank/reevaluate")
+def reevaluate_ranks(db: Session = Depends(get_db), _: str = Depends(verify_bridge_key)):
+    """Re-rank every user against the current thresholds (season reset / threshold change)."""
+    try:
+        changes = RankService.reevaluate_ranks(db)
+        return {"status": "success", "updated": len(changes), "changes": changes}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/feed", response_model=list[PostResponse])
-def get_feed_posts(skip: int = 0, limit: int = 50, db: Session = Depends(get_db)):
-    """Retrieve community feed posts."""
+def get_feed_posts(skip: int = 0, limit: int = 50, before: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Retrieve community feed posts, newest first.
+    Pass the X-Next-Cursor header of a page as `before` to fetch the next one.
+    """
     try:
-        posts = FeedService.get_posts(db, skip, limit)
-        return posts
+        # Pre-serialized, usually from the in-memory page cache
+        body, next_cursor = FeedService.get_feed_page(db, skip, limit, before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/api/leaderboard", response_model=list[LeaderboardUserResponse])
 def get_leaderboard(category: str = "ALL", db: Session = Depends(get_db)):
     """Get the filtered leaderboard."""
@@ -1259,19 +1373,12 @@ def add_post_comment(post_id: str, payload: dict = Body(...), db: Session = Depe
 # --- TradeLocker Status & Disconnect ---
 
 @app.get("/api/tradelocker/status")
-async def tradelocker_status(user_id: str, db: Session = Depends(get_db)):
+async def tradelocker_status(user_id: str):
     try:
-        platform = db.query(TradingPlatform).filter(TradingPlatform.code == 'tradelocker').first()
-        if not platform:
-             return {"connected": False}
+        account = await accounts.get_account(user_id, "tradelocker")
         
-        account = db.query(TradingAccount).filter(
-            TradingAccount.user_id == user_id,
-            TradingAccount.platform_id == platform.id
-        ).first()
-        
-        if account and account.encrypted_credentials:
-            creds = json.loads(account.encrypted_credentials)
+        if account and account.get("is_active") is not False and account.get("encrypted_credentials"):
+            creds = json.loads(account["encrypted_credentials"])
             # Rehydrate session if missing
             session_id = creds.get('email')
             if session_id and session_id not in tradelocker_sessions:
@@ -1301,9 +1408,9 @@ async def tradelocker_status(user_id: str, db: Session = Depends(get_db)):
 
             return {
                 "connected": True, 
-                "account_id": account.account_number, 
+                "account_id": account.get("account_number") or account.get("account_id"), 
                 "email": creds.get('email'),
-                "balance": float(account.balance) if account.balance else 0
+                "balance": float(account["balance"]) if account.get("balance") else 0
             }
             
         return {"connected": False}
@@ -1312,15 +1419,9 @@ async def tradelocker_status(user_id: str, db: Session = Depends(get_db)):
         return {"connected": False}
 
 @app.post("/api/tradelocker/disconnect")
-async def tradelocker_disconnect(req: TradeLockerDisconnectRequest, db: Session = Depends(get_db)):
+async def tradelocker_disconnect(req: TradeLockerDisconnectRequest):
     try:
-        platform = db.query(TradingPlatform).filter(TradingPlatform.code == 'tradelocker').first()
-        if platform:
-            db.query(TradingAccount).filter(
-                TradingAccount.user_id == req.user_id,
-                TradingAccount.platform_id == platform.id
-            ).delete()
-            db.commit()
+        await accounts.delete_account(req.user_id, "tradelocker")
         return {"status": "disconnected"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))# --- Master Account & Copy Trading ---
@@ -1395,14 +1496,13 @@ def get_master_signals(db: Session = Depends(get_db)):
     return {"status": "success", "signals": signals}
 
 @app.post("/api/tradelocker/execute")
-async def execute_copy_trade(payload: dict = Body(...), db: Session = Depends(get_db)):
+async def execute_copy_trade(payload: dict = Body(...)):
     """Execute a copied signal on the user's connected account.
     
     Multi-strategy session resolution:
     1. In-memory session via email (fastest)
-    2. SQLAlchemy DB account lookup -> in-memory session
-    3. Supabase account lookup -> in-memory session
-    4. Full re-authentication using stored credentials
+    2. Account repository lookup (cached; newest active row of either store) -> in-memory session
+    3. Full re-authentication using stored credentials
     """
     user_id = payload.get("user_id")
     signal_id = payload.get("signal_id")
@@ -1443,72 +1543,25 @@ async def execute_copy_trade(payload: dict = Body(...), db: Session = Depends(ge
         logger.info(f"[Execute] ✅ Strategy 1: Using in-memory session for {email} (base_url={client.base_url})")
 
 
-    # --- Strategy 2: SQLAlchemy DB account lookup ---
-    if not client:
-        try:
-            platform = db.query(TradingPlatform).filter(TradingPlatform.code == 'tradelocker').first()
-            if platform:
-                account = db.query(TradingAccount).filter(
-                    TradingAccount.user_id == user_id,
-                    TradingAccount.platform_id == platform.id
-                ).first()
-                if account and account.encrypted_credentials:
-                    creds = json.loads(account.encrypted_credentials)
-                    stored_email = creds.get('email')
-                    if stored_email and stored_email in tradelocker_sessions:
-                        client = tradelocker_sessions[stored_email]
-                        logger.info(f"[Execute] Found session via SQLAlchemy DB for email: {stored_email}")
-        except Exception as db_err:
-            logger.warning(f"[Execute] SQLAlchemy DB lookup failed: {db_err}")
-
-    # --- Strategy 3: Supabase account lookup ---
+    # --- Strategy 2: Account repository lookup (cached; newest active row of either store) ---
     if not client:
         try:
-            # Try platform_id FK lookup first
-            plat_res = supabase.table("trading_platforms").select("id").eq("code", "tradelocker").execute()
-            sb_row = None
-
-            if plat_res.data:
-                platform_id = plat_res.data[0]['id']
-                acc_res = (
-                    supabase.table("trading_accounts")
-                    .select("*")
-                    .eq("user_id", user_id)
-                    .eq("platform_id", platform_id)
-                    .execute()
-                )
-                if acc_res.data:
-                    sb_row = acc_res.data[0]
-                    logger.info(f"[Execute] Supabase lookup via platform_id found account")
-
-            # Fallback: try provider field directly (more reliable)
-            if not sb_row:
-                acc_res2 = (
-                    supabase.table("trading_accounts")
-                    .select("*")
-                    .eq("user_id", user_id)
-                    .eq("provider", "tradelocker")
-                    .execute()
-                )
-                if acc_res2.data:
-                    sb_row = acc_res2.data[0]
-                    logger.info(f"[Execute] Supabase lookup via provider='tradelocker' found account")
-
-            if sb_row:
-                creds = json.loads(sb_row.get("encrypted_credentials", "{}"))
+            account = await accounts.get_active_account(user_id, "tradelocker")
+            if account and account.get("encrypted_credentials"):
+                creds = json.loads(account["encrypted_credentials"])
                 stored_email = creds.get('email')
                 if stored_email and stored_email in tradelocker_sessions:
                     client = tradelocker_sessions[stored_email]
-                    logger.info(f"[Execute] ✅ Strategy 3: Reused in-memory session found via Supabase lookup for {stored_email}")
+                    logger.info(f"[Execute] ✅ Strategy 2: Reused in-memory session found via account lookup for {stored_email}")
                 elif stored_email:
-                    logger.info(f"[Execute] Strategy 3: Got creds from Supabase for {stored_email} — will re-auth in Strategy 4")
+                    logger.info(f"[Execute] Strategy 2: Got stored creds for {stored_email} — will re-auth in Strategy 3")
             else:
-                logger.warning(f"[Execute] Strategy 3: No account found in Supabase for user {user_id}")
-        except Exception as sb_err:
-            logger.warning(f"[Execute] Supabase lookup failed: {sb_err}")
+                logger.warning(f"[Execute] Strategy 2: No active account found for user {user_id}")
+        except Exception as lookup_err:
+            logger.warning(f"[Execute] Account lookup failed: {lookup_err}")
 
 
-    # --- Strategy 4: Re-authenticate using stored credentials ---
+    # --- Strategy 3: Re-authenticate using stored credentials ---
     if not client and creds:
         try:
             stored_email = creds.get('email')
@@ -1559,12 +1612,9 @@ async def execute_copy_trade(payload: dict = Body(...), db: Session = Depends(ge
     if result.get('status') == 'error':
         raise HTTPException(status_code=400, detail=result.get('message', 'Execution failed'))
 
-    # Non-blocking: update signal status in Supabase
+    # Non-blocking: signal status is batched into Supabase by the write-behind buffer
     if signal_id:
-        try:
-            supabase.table("signals").update({"status": "executed"}).eq("id", str(signal_id)).execute()
-        except Exception:
-            pass  # Non-critical
+        write_behind.set_signal_status(signal_id, "executed")
 
     logger.info(f"[Execute] Success: {action} {symbol} {lot_size} lots for user {user_id} | orderId={result.get('orderId')} | raw={str(result.get('data',''))[:200]}")
     return {"status": "success", "orderId": result.get('orderId'), "symbol": symbol, "action": action, "lots": lot_size}
@@ -2,10 +2,11 @@ import os
 import sys
 import asyncio
 import logging
-import httpx
 from datetime import datetime, timedelta
+from typing import Dict, Optional
 from metaapi_cloud_sdk import MetaApi
 from dotenv import load_dotenv
+from bridge_ipc import BridgeChannel
 
 # Re-resolve lib path if needed for isolated environment
 # sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'bridge_lib'))
@@ -13,38 +14,67 @@ from dotenv import load_dotenv
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'), override=True)
 
 token = os.getenv("META_API_TOKEN")
-master_account_id = os.getenv("MASTER_ACCOUNT_ID")
-backend_url = "http://localhost:8000/api/internal/signal"
+# Comma-separated UUIDs, logins or names of the masters to follow
+master_account_ids = [m.strip() for m in os.getenv("MASTER_ACCOUNT_IDS", os.getenv("MASTER_ACCOUNT_ID", "")).split(",") if m.strip()]
+# Persistent batched channel to the backend (replaces one HTTP POST per event)
+channel = BridgeChannel()
+# Latest prices are sent as one snapshot at this cadence (seconds)
+price_flush_interval = float(os.getenv("PRICE_FLUSH_INTERVAL", "0.1"))
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("MetaApiBridge")
 
 class SynchronizationListener:
+    def __init__(self, master_id: str):
+        self.master_id = master_id
+        # symbol -> latest price; a burst of ticks collapses to one entry per symbol
+        self.latest_prices = {}
 
+    def send(self, event_type: str, data: dict):
+        """Queue an event for the backend, tagged with this listener's master."""
+        data["master"] = self.master_id
+        channel.send(event_type, data)
+
+    def record_price(self, price: dict):
+        symbol = price.get('symbol')
+        if symbol:
+            self.latest_prices[symbol] = {
+                "symbol": symbol,
+                "bid": price.get('bid'),
+                "ask": price.get('ask'),
+                "time": price.get('time')
+            }
+
+    async def flush_prices(self):
+        """Send the latest price of every updated symbol as one snapshot, at a fixed cadence."""
+        while True:
+            await asyncio.sleep(price_flush_interval)
+            if self.latest_prices:
+                prices, self.latest_prices = self.latest_prices, {}
+                self.send("price_snapshot", {"prices": list(prices.values())})
+
+    @staticmethod
+    def build_result(deal: dict) -> dict:
+        net_profit = float(deal.get('profit', 0)) + float(deal.get('swap', 0)) + float(deal.get('commission', 0))
+        
+        return {
+            "id": deal.get('positionId'), # Link back to the opened position ID
+            "pair": deal.get('symbol'),
+            "type": str(deal.get('type', '')), # DEAL_TYPE_BUY/SELL
+            "entryPrice": str(deal.get('price', 0)), # This is actually exit price for entry_out
+            "closePrice": str(deal.get('price', 0)),
+            "netProfit": net_profit,
+            "pips": 0, # Calculate if possible or leave for frontend
+            "lotSize": deal.get('volume', 0.01),
+            "timestamp": str(deal.get('time')),
+            "provider": "Verstige AI"
+        }
 
     async def process_result(self, deal: dict):
         logger.info(f"Processing Result: {deal}")
         try:
-             async with httpx.AsyncClient() as client:
-                net_profit = float(deal.get('profit', 0)) + float(deal.get('swap', 0)) + float(deal.get('commission', 0))
-                
-                payload = {
-                    "type": "signal_result", # Explicit event type
-                    "data": {
-                        "id": deal.get('positionId'), # Link back to the opened position ID
-                        "pair": deal.get('symbol'),
-                        "type": str(deal.get('type', '')), # DEAL_TYPE_BUY/SELL
-                        "entryPrice": str(deal.get('price', 0)), # This is actually exit price for entry_out
-                        "closePrice": str(deal.get('price', 0)),
-                        "netProfit": net_profit,
-                        "pips": 0, # Calculate if possible or leave for frontend
-                        "lotSize": deal.get('volume', 0.01),
-                        "timestamp": str(deal.get('time')),
-                        "provider": "Verstige AI"
-                    }
-                }
-                response = await client.post(backend_url, json=payload)
-                logger.info(f"Result sent to backend: {response.status_code}")
+            self.send("signal_result", self.build_result(deal))
+            logger.info("Result queued for backend")
         except Exception as e:
             logger.error(f"Failed to send result: {e}")
 
@@ -69,59 +99,35 @@ class SynchronizationListener:
     async def on_position_updated(self, instance_index: str, position: dict):
         """Forward live position P&L updates to the dashboard."""
         try:
-            async with httpx.AsyncClient() as client:
-                payload = {
-                    "type": "position_update",
-                    "data": {
-                        "id": position.get('id'),
-                        "symbol": position.get('symbol'),
-                        "profit": position.get('profit', 0),           # Realized component
-                        "unrealizedProfit": position.get('unrealizedProfit', position.get('profit', 0)),
-                        "currentPrice": position.get('currentPrice', 0),
-                        "swap": position.get('swap', 0),
-                        "commission": position.get('commission', 0)
-                    }
-                }
-                await client.post(backend_url, json=payload, timeout=0.5)
+            self.send("position_update", {
+                "id": position.get('id'),
+                "symbol": position.get('symbol'),
+                "profit": position.get('profit', 0),           # Realized component
+                "unrealizedProfit": position.get('unrealizedProfit', position.get('profit', 0)),
+                "currentPrice": position.get('currentPrice', 0),
+                "swap": position.get('swap', 0),
+                "commission": position.get('commission', 0)
+            })
         except Exception:
             pass  # Don't block the stream on update failures
     async def on_symbol_price_updated(self, instance_index: str, price: dict):
-        try:
-            symbol = price.get('symbol')
-            if symbol:  # Forward all symbol price updates
-                async with httpx.AsyncClient() as client:
-                    payload = {
-                        "type": "price_update",
-                        "data": {
-                            "symbol": price.get('symbol'),
-                            "bid": price.get('bid'),
-                            "ask": price.get('ask'),
-                            "time": price.get('time')
-                        }
-                    }
-                    # Fire and forget - verify if we need to await this or if it blocks too much.
-                    # For a bridge, we might want to batch these or use a background task.
-                    # For MVP, we send directly but maybe with a timeout to avoid lagging.
-                    await client.post(backend_url, json=payload, timeout=0.5)
-        except Exception:
-            pass # Ignore price update fail to keep stream alive
+        self.record_price(price)
+
+    async def on_symbol_prices_updated(self, instance_index: str, prices: list, *args, **kwargs):
+        # Bulk callback: many symbols per call during volatile bursts
+        for price in prices or []:
+            self.record_price(price)
 
-    async def on_symbol_prices_updated(self, *args, **kwargs): pass
     async def on_account_information_updated(self, instance_index: str, account: dict):
         logger.info(f"Account Updated: {account}")
         try:
-            async with httpx.AsyncClient() as client:
-                payload = {
-                    "type": "account_update",
-                    "data": {
-                        "balance": account.get('balance'),
-                        "equity": account.get('equity'),
-                        "margin": account.get('margin'),
-                        "freeMargin": account.get('freeMargin'),
-                        "marginLevel": account.get('marginLevel')
-                    }
-                }
-                await client.post(backend_url, json=payload)
+            self.send("account_update", {
+                "balance": account.get('balance'),
+                "equity": account.get('equity'),
+                "margin": account.get('margin'),
+                "freeMargin": account.get('freeMargin'),
+                "marginLevel": account.get('marginLevel')
+            })
         except Exception as e:
             logger.error(f"Failed to broadcast account update: {e}")
     async def on_deals_synchronized(self, *args, **kwargs): logger.info("Deals Synchronized")
@@ -135,101 +141,167 @@ class SynchronizationListener:
     async def on_disconnected(self, *args, **kwargs): logger.info("Bridge Disconnected from MetaApi")
     async def on_error(self, error: Exception): logger.error(f"Bridge Error: {error}")
 
+    @staticmethod
+    def build_signal(data: dict) -> dict:
+        # Detect type from Order or Deal
+        raw_type = str(data.get('type', ''))
+        if 'BUY' in raw_type.upper():
+            action = 'BUY'
+        elif 'SELL' in raw_type.upper():
+            action = 'SELL'
+        else: 
+             # Fallback for positions where type might be numerical or different
+             if str(data.get('type')) == '0': action = 'BUY' # POSITION_TYPE_BUY
+             elif str(data.get('type')) == '1': action = 'SELL' # POSITION_TYPE_SELL
+             else: action = 'BUY' # Default
+
+        # Price field varies between Order (openPrice) and Deal (price)
+        price = str(data.get('openPrice') or data.get('price', 0))
+        symbol = data.get('symbol', 'Unknown')
+        
+        # Determine Category
+        category = "FOREX"
+        u_symbol = symbol.upper()
+        if "XAU" in u_symbol or "GOLD" in u_symbol: category = "GOLD"
+        elif "BTC" in u_symbol or "ETH" in u_symbol or "CRYPTO" in u_symbol or "ETHEREUM" in u_symbol: category = "CRYPTO"
+        elif "US30" in u_symbol or "SPX" in u_symbol or "NAS" in u_symbol or "INDICE" in u_symbol: category = "INDICES"
+        
+        # Enhanced payload with potential P&L for open positions if available in update
+        return {
+            "id": data.get('id'),
+            "pair": symbol,
+            "action": action,
+            "price": price,
+            "sl": str(data.get('stopLoss', 0)),
+            "tp1": str(data.get('takeProfit', 0)),
+            "lotSize": data.get('volume', 0.01),
+            "provider": "Verstige Master", # Set provider name
+            "providerRank": "Elite",
+            "category": category,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "profit": data.get('profit', 0) # Include current profit if available
+        }
+
     async def process_signal(self, data: dict, signal_type: str):
         logger.info(f"Processing {signal_type}: {data}")
         try:
-            async with httpx.AsyncClient() as client:
-                # Detect type from Order or Deal
-                raw_type = str(data.get('type', ''))
-                if 'BUY' in raw_type.upper():
-                    action = 'BUY'
-                elif 'SELL' in raw_type.upper():
-                    action = 'SELL'
-                else: 
-                     # Fallback for positions where type might be numerical or different
-                     if str(data.get('type')) == '0': action = 'BUY' # POSITION_TYPE_BUY
-                     elif str(data.get('type')) == '1': action = 'SELL' # POSITION_TYPE_SELL
-                     else: action = 'BUY' # Default
-
-                # Price field varies between Order (openPrice) and Deal (price)
-                price = str(data.get('openPrice') or data.get('price', 0))
-                symbol = data.get('symbol', 'Unknown')
-                
-                # Determine Category
-                category = "FOREX"
-                u_symbol = symbol.upper()
-                if "XAU" in u_symbol or "GOLD" in u_symbol: category = "GOLD"
-                elif "BTC" in u_symbol or "ETH" in u_symbol or "CRYPTO" in u_symbol or "ETHEREUM" in u_symbol: category = "CRYPTO"
-                elif "US30" in u_symbol or "SPX" in u_symbol or "NAS" in u_symbol or "INDICE" in u_symbol: category = "INDICES"
-                
-                # Enhanced payload with potential P&L for open positions if available in update
-                payload = {
-                    "type": "new_signal", # Explicit event type
-                    "data": {
-                        "id": data.get('id'),
-                        "pair": symbol,
-                        "action": action,
-                        "price": price,
-                        "sl": str(data.get('stopLoss', 0)),
-                        "tp1": str(data.get('takeProfit', 0)),
-                        "lotSize": data.get('volume', 0.01),
-                        "provider": "Verstige Master", # Set provider name
-                        "providerRank": "Elite",
-                        "category": category,
-                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "profit": data.get('profit', 0) # Include current profit if available
-                    }
-                }
-                response = await client.post(backend_url, json=payload)
-                logger.info(f"Signal sent to backend: {response.status_code}")
+            self.send("new_signal", self.build_signal(data))
+            logger.info("Signal queued for backend")
         except Exception as e:
             logger.error(f"Failed to send signal to backend: {e}")
     async def on_deal_updated(self, *args, **kwargs): logger.info(f"Deal Updated: {args} {kwargs}")
 
-async def main():
-    if not token or not master_account_id:
-        logger.error("Missing META_API_TOKEN or MASTER_ACCOUNT_ID")
-        return
+class MasterBridge:
+    """
+    Follows many master accounts in one process: a single MetaApi client and
+    backend channel, with a streaming connection and listener per master.
+    Masters can be added and removed at runtime by backend commands. A master
+    that fails to start is dropped and reported, so it can be added again, and
+    an account added under a second identifier (UUID and login) is streamed
+    once.
+    """
 
-    api = MetaApi(token=token, opts={
-        'clientApiUrl': 'https://mt-client-api-v1.london.agiliumtrade.ai',
-        'provisioningApiUrl': 'https://mt-provisioning-api-v1.agiliumtrade.ai'
-    })
-    try:
-        # Check if master_account_id looks like a UUID or a login
-        account_id = master_account_id
+    def __init__(self, api: MetaApi):
+        self.api = api
+        # identifier -> {"task", "account_id", "connection", "listener", "flush_task"}
+        self.masters: Dict[str, dict] = {}
+        # resolved account_id -> identifier it is followed under
+        self.accounts: Dict[str, str] = {}
+
+    async def resolve_account_id(self, identifier: str) -> Optional[str]:
         # UUID is 36 chars. Login or Name is usually shorter. 
-        if len(master_account_id) < 36:
-             # Assume it's a login number or name, try to find it
-             logger.info(f"Looking up account by login/name: {master_account_id}")
-             try:
-                 accounts = await api.metatrader_account_api.get_accounts_with_infinite_scroll_pagination()
-                 logger.info(f"Retrieved {len(accounts)} accounts from MetaApi.")
-             except Exception as lookup_err:
-                 logger.error(f"Error retrieving accounts: {lookup_err}")
-                 return
-
-             # precise match or match within name/login string
-             found = next((a for a in accounts if str(a.login) in master_account_id or master_account_id in a.name or a.name == master_account_id), None)
-             if found:
-                 account_id = found.id
-                 logger.info(f"Foun account ID {account_id} for {master_account_id}")
-             else:
-                 logger.error(f"Account with identifier {master_account_id} not found in MetaApi account list.")
-                 return
-
-        account = await api.metatrader_account_api.get_account(account_id)
-        if account.state != 'DEPLOYED' and account.state != 'CONNECTED':
-            await account.deploy()
-        
-        await account.wait_connected()
-        connection = account.get_streaming_connection()
-        await connection.connect()
-        await connection.wait_synchronized()
-        
-        listener = SynchronizationListener()
-        connection.add_synchronization_listener(listener)
-        
+        if len(identifier) >= 36:
+            return identifier
+
+        # Assume it's a login number or name, try to find it
+        logger.info(f"Looking up account by login/name: {identifier}")
+        accounts = await self.api.metatrader_account_api.get_accounts_with_infinite_scroll_pagination()
+        logger.info(f"Retrieved {len(accounts)} accounts from MetaApi.")
+
+        # precise match or match within name/login string
+        found = next((a for a in accounts if str(a.login) in identifier or identifier in a.name or a.name == identifier), None)
+        if not found:
+            logger.error(f"Account with identifier {identifier} not found in MetaApi account list.")
+            return None
+        logger.info(f"Found account ID {found.id} for {identifier}")
+        return found.id
+
+    def add_master(self, identifier: str):
+        if identifier in self.masters or identifier in self.accounts:
+            return
+        entry = {}
+        self.masters[identifier] = entry
+        entry["task"] = asyncio.create_task(self._start_master(identifier, entry))
+
+    async def remove_master(self, identifier: str):
+        identifier = self.accounts.get(identifier, identifier)
+        entry = self.masters.get(identifier)
+        if entry is None:
+            return
+        if entry.get("task") is not None:
+            entry["task"].cancel()
+        await self._release(identifier, entry)
+        logger.info(f"Stopped following master: {identifier}")
+
+    async def _release(self, identifier: str, entry: dict):
+        """Forgets a master and closes whatever of it had started."""
+        if self.masters.get(identifier) is entry:
+            del self.masters[identifier]
+        if self.accounts.get(entry.get("account_id")) == identifier:
+            del self.accounts[entry["account_id"]]
+        if entry.get("flush_task") is not None:
+            entry["flush_task"].cancel()
+        connection = entry.get("connection")
+        if connection is not None:
+            try:
+                connection.remove_synchronization_listener(entry["listener"])
+                await connection.close()
+            except Exception as e:
+                logger.error(f"Error closing master {identifier}: {e}")
+
+    async def _start_master(self, identifier: str, entry: dict):
+        try:
+            account_id = await self.resolve_account_id(identifier)
+            if not account_id:
+                self.masters.pop(identifier, None)
+                self.report()
+                return
+            if account_id in self.accounts:
+                logger.info(
+                    f"Master {identifier} is account {account_id}, "
+                    f"already followed as {self.accounts[account_id]}"
+                )
+                self.masters.pop(identifier, None)
+                self.report()
+                return
+            entry["account_id"] = account_id
+            self.accounts[account_id] = identifier
+
+            account = await self.api.metatrader_account_api.get_account(account_id)
+            if account.state != 'DEPLOYED' and account.state != 'CONNECTED':
+                await account.deploy()
+            
+            await account.wait_connected()
+            connection = account.get_streaming_connection()
+            await connection.connect()
+            await connection.wait_synchronized()
+            
+            listener = SynchronizationListener(identifier)
+            connection.add_synchronization_listener(listener)
+            entry["connection"], entry["listener"] = connection, listener
+            entry["flush_task"] = asyncio.create_task(listener.flush_prices())
+
+            await self._replay(account, listener)
+            logger.info(f"Bridge connected and listening for master: {identifier}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Bridge Error for master {identifier}: {e}")
+            # Drop it so report() stops listing it and it can be added again
+            await self._release(identifier, entry)
+            self.report()
+
+    async def _replay(self, account, listener: SynchronizationListener):
         # Sync recent history and OPEN POSITIONS
         try:
             logger.info("Syncing recent history and open positions via RPC...")
@@ -240,9 +312,6 @@ async def main():
             # 1. Sync Open Positions (Active Trades)
             positions = await rpc.get_positions()
             logger.info(f"Found {len(positions)} open positions.")
-            for position in positions:
-                # Treat open positions as "Signals" so they show up in the dashboard
-                await listener.process_signal(position, "Existing Position")
 
             # 2. Sync Recent History (Missed Closures)
             deals_resp = await rpc.get_deals_by_time_range(
@@ -253,20 +322,55 @@ async def main():
             
             deals = deals_resp.get('deals', [])
             logger.info(f"Checking {len(deals)} recent deals for missed closures.")
-            for deal in deals:
-                entry_type = deal.get('entryType')
-                if entry_type in ['DEAL_ENTRY_OUT', 'DEAL_ENTRY_OUT_BY']:
-                    await listener.process_result(deal)
+            closures = [d for d in deals if d.get('entryType') in ['DEAL_ENTRY_OUT', 'DEAL_ENTRY_OUT_BY']]
+
+            # One replay event instead of a request (and broadcast) per position/deal.
+            # Open positions are treated as "Signals" so they show up in the dashboard.
+            listener.send("bridge_replay", {
+                "signals": [listener.build_signal(p) for p in positions],
+                "results": [listener.build_result(d) for d in closures],
+            })
+            logger.info(f"Replayed {len(positions)} positions and {len(closures)} closures")
         except Exception as e:
             logger.error(f"History/Position sync failed: {e}")
 
-        logger.info(f"Bridge connected and listening for master: {master_account_id}")
-        
-        while True:
-            await asyncio.sleep(60) # Keep process alive
-            
-    except Exception as e:
-        logger.error(f"Bridge Error: {e}")
+    def report(self):
+        """Tell the backend which masters are followed."""
+        channel.send("bridge_masters", {"masters": list(self.masters)})
+
+    async def handle_command(self, command: str, data: dict):
+        identifier = str(data.get("account_id", "")).strip()
+        if command == "add_master" and identifier:
+            self.add_master(identifier)
+        elif command == "remove_master" and identifier:
+            await self.remove_master(identifier)
+        elif command != "list_masters":
+            logger.warning(f"Unknown bridge command: {command} {data}")
+        self.report()
+
+async def main():
+    if not token:
+        logger.error("Missing META_API_TOKEN")
+        return
+
+    api = MetaApi(token=token, opts={
+        'clientApiUrl': 'https://mt-client-api-v1.london.agiliumtrade.ai',
+        'provisioningApiUrl': 'https://mt-provisioning-api-v1.agiliumtrade.ai'
+    })
+    bridge = MasterBridge(api)
+
+    # Connect to the backend while MetaApi is still synchronizing
+    channel.on_command = bridge.handle_command
+    channel.on_connect = bridge.report
+    channel.start()
+
+    if not master_account_ids:
+        logger.warning("No MASTER_ACCOUNT_IDS configured; waiting for add_master commands")
+    for identifier in master_account_ids:
+        bridge.add_master(identifier)
+
+    while True:
+        await asyncio.sleep(60) # Keep process alive
 
 if __name__ == "__main__":
     asyncio.run(main())
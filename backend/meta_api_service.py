@@ -1,9 +1,11 @@
 import os
+import time
 import asyncio
 import logging
 from metaapi_cloud_sdk import MetaApi
 from dotenv import load_dotenv
 from typing import Dict, Optional
+from backend.models.events import Rooms
 
 # Resolve .env path relative to this file
 env_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -15,6 +17,79 @@ logger = logging.getLogger("MetaApiService")
 if not token:
     logger.error("META_API_TOKEN not found in .env")
 
+# RPC connections idle for longer than this are closed
+RPC_IDLE_TIMEOUT = float(os.getenv("METAAPI_RPC_IDLE_TIMEOUT", "600"))
+RPC_HEALTH_INTERVAL = float(os.getenv("METAAPI_RPC_HEALTH_INTERVAL", "60"))
+RPC_HEALTH_TIMEOUT = 10
+
+class RpcConnectionPool:
+    """
+    Keeps one connected, synchronized RPC connection per account so trades
+    skip get_account/connect/wait_synchronized. A background task pings
+    each connection, replaces broken ones and closes idle ones.
+    """
+
+    def __init__(self, api, idle_timeout: float = RPC_IDLE_TIMEOUT):
+        self.api = api
+        self.idle_timeout = idle_timeout
+        self.connections: Dict[str, dict] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._monitor: Optional[asyncio.Task] = None
+
+    async def get(self, account_id: str):
+        entry = self.connections.get(account_id)
+        if entry is None:
+            # Concurrent trades on a cold account share one connect
+            async with self._locks.setdefault(account_id, asyncio.Lock()):
+                entry = self.connections.get(account_id)
+                if entry is None:
+                    entry = {"connection": await self._connect(account_id)}
+                    self.connections[account_id] = entry
+
+        entry["last_used"] = time.monotonic()
+        if self._monitor is None or self._monitor.done():
+            self._monitor = asyncio.create_task(self._monitor_connections())
+        return entry["connection"]
+
+    async def _connect(self, account_id: str):
+        account = await self.api.metatrader_account_api.get_account(account_id)
+        connection = account.get_rpc_connection()
+        await connection.connect()
+        await connection.wait_synchronized()
+        logger.info(f"RPC connection ready for {account_id}")
+        return connection
+
+    async def discard(self, account_id: str):
+        entry = self.connections.pop(account_id, None)
+        if entry is not None:
+            try:
+                await entry["connection"].close()
+            except Exception as e:
+                logger.warning(f"Error closing RPC connection for {account_id}: {e}")
+
+    async def _monitor_connections(self):
+        while self.connections:
+            await asyncio.sleep(RPC_HEALTH_INTERVAL)
+            now = time.monotonic()
+            for account_id, entry in list(self.connections.items()):
+                if now - entry.get("last_used", now) > self.idle_timeout:
+                    logger.info(f"Closing idle RPC connection for {account_id}")
+                    await self.discard(account_id)
+                    continue
+                try:
+                    await asyncio.wait_for(entry["connection"].get_server_time(), RPC_HEALTH_TIMEOUT)
+                except Exception as e:
+                    # Dropped now; the next trade reconnects
+                    logger.warning(f"RPC health check failed for {account_id}: {e}")
+                    await self.discard(account_id)
+
+    async def close(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        for account_id in list(self.connections):
+            await self.discard(account_id)
+
 class SynchronizationListener:
     def __init__(self, sio_callback):
         self.sio_callback = sio_callback
@@ -62,6 +137,9 @@ class MetaApiService:
         self.master_account_id = os.getenv("MASTER_ACCOUNT_ID", "031aaffb-f6be-4cad-814b-6dcbabdf1334")
         self.master_connection = None
         self.sio = None
+        self.rpc_pool = RpcConnectionPool(self.api)
+        # Masters the bridge process reports it is following
+        self.bridge_masters = []
 
     def set_socketio(self, sio):
         self.sio = sio
@@ -107,9 +185,80 @@ class MetaApiService:
             await asyncio.sleep(5) 
 
     async def broadcast_signal(self, event, data):
-        if self.sio:
+        if not self.sio:
+            return
+
+        if event == "price_snapshot":
+            await self.broadcast_price_snapshot(data.get("prices", []))
+            return
+        if event == "bridge_replay":
+            await self.broadcast_replay(data)
+            return
+        if event == "bridge_masters":
+            self.bridge_masters = data.get("masters", [])
+            return
+
+        # Market data only goes to clients watching the symbol; everything else is global
+        room = self.get_market_data_room(event, data)
+        if room is not None:
+            await self.sio.emit(event, data, room=room)
+        else:
             await self.sio.emit(event, data)
 
+    async def broadcast_replay(self, replay):
+        """
+        Apply the bridge's startup replay in one pass: dedupe by ID, drop
+        signals whose position already closed, and broadcast the result as a
+        single signal_replay message.
+        """
+        results = {}
+        for result in replay.get("results", []):
+            results[str(result.get("id"))] = result
+        signals = {}
+        for signal in replay.get("signals", []):
+            signal_id = str(signal.get("id"))
+            if signal_id not in results:
+                signals[signal_id] = signal
+
+        state = {"signals": list(signals.values()), "results": list(results.values())}
+        logger.info(f"Bridge replay: {len(state['signals'])} open signals, {len(state['results'])} results")
+        await self.sio.emit("signal_replay", state)
+
+    async def broadcast_price_snapshot(self, prices):
+        """
+        Emit a batch of prices as one message. It goes to every client
+        watching at least one of the symbols, and each client receives it once.
+        """
+        rooms = [Rooms.price(p["symbol"]) for p in prices if p.get("symbol")]
+        if rooms:
+            await self.sio.emit("price_snapshot", {"prices": prices}, room=rooms)
+
+    @staticmethod
+    def get_market_data_room(event, data):
+        symbol = data.get("symbol") if isinstance(data, dict) else None
+        if not symbol:
+            return None
+        if event == "price_update":
+            return Rooms.price(symbol)
+        if event == "position_update":
+            return Rooms.position(symbol)
+        return None
+
+    async def subscribe_client(self, sid, symbols):
+        """Join a client to the price and position rooms of the given symbols."""
+        if not self.sio:
+            return
+        for symbol in symbols:
+            await self.sio.enter_room(sid, Rooms.price(symbol))
+            await self.sio.enter_room(sid, Rooms.position(symbol))
+
+    async def unsubscribe_client(self, sid, symbols):
+        if not self.sio:
+            return
+        for symbol in symbols:
+            await self.sio.leave_room(sid, Rooms.price(symbol))
+            await self.sio.leave_room(sid, Rooms.position(symbol))
+
     async def verify_connection(self):
         try:
             accounts = await self.api.metatrader_account_api.get_accounts()
@@ -118,29 +267,37 @@ class MetaApiService:
             return {"status": "error", "message": str(e)}
 
     async def execute_trade(self, account_id: str, signal_data: dict):
-        try:
-            account = await self.api.metatrader_account_api.get_account(account_id)
-            connection = account.get_rpc_connection()
-            await connection.connect()
-            await connection.wait_synchronized()
+        symbol = signal_data.get('pair')
+        action = signal_data.get('action')
+        volume = signal_data.get('volume', 0.01)
+        stop_loss = signal_data.get('sl')
+        take_profit = signal_data.get('tp')
 
-            symbol = signal_data.get('pair')
-            action = signal_data.get('action')
-            volume = signal_data.get('volume', 0.01)
-            stop_loss = signal_data.get('sl')
-            take_profit = signal_data.get('tp')
+        if action not in ('BUY', 'SELL'):
+            return {"status": "error", "message": "Invalid action"}
 
+        try:
+            connection = await self.rpc_pool.get(account_id)
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+        try:
             if action == 'BUY':
                 result = await connection.create_market_buy_order(symbol, volume, stop_loss, take_profit)
-            elif action == 'SELL':
-                result = await connection.create_market_sell_order(symbol, volume, stop_loss, take_profit)
             else:
-                return {"status": "error", "message": "Invalid action"}
+                result = await connection.create_market_sell_order(symbol, volume, stop_loss, take_profit)
 
             return {"status": "success", "order": result}
         except Exception as e:
+            # A broker rejection (TradeException) leaves the connection usable; anything
+            # else may be a broken connection. Not retried, the order may have reached the broker.
+            if type(e).__name__ != "TradeException":
+                await self.rpc_pool.discard(account_id)
             return {"status": "error", "message": str(e)}
 
+    async def close(self):
+        await self.rpc_pool.close()
+
 
 
     async def provision_account(self, login, password, server, name):
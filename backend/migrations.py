@@ -0,0 +1,203 @@
+"""
+Verstige OS — Schema Migrations
+Versioned, idempotent schema changes for the SQLAlchemy database.
+
+init_db runs create_all (which only creates missing tables) and then any
+migration newer than the version recorded in schema_migrations. Each
+migration runs in its own transaction and is written so it also applies
+cleanly to a database that create_all just built. It works on both SQLite
+and Postgres. missing_indexes() reports hot-path lookups that have no
+covering index.
+
+Run directly to migrate and print the index report:
+    python -m backend.migrations
+"""
+
+import sys
+import logging
+from typing import Callable, List, Sequence, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger("Migrations")
+
+# (table, leading columns) every hot-path query filters or sorts on
+REQUIRED_INDEXES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("trading_accounts", ("user_id", "platform_id")),
+    ("trading_platforms", ("code",)),
+    ("posts", ("created_at",)),
+    ("post_comments", ("post_id",)),
+    ("post_likes", ("post_id", "user_id")),
+    ("users", ("total_impact",)),
+]
+
+
+def _index_columns(conn: Connection, table: str) -> List[Tuple[str, ...]]:
+    """Column lists of every index on table, including unique constraints and the primary key."""
+    inspector = inspect(conn)
+    columns = [tuple(ix["column_names"]) for ix in inspector.get_indexes(table)]
+    columns += [
+        tuple(uc["column_names"]) for uc in inspector.get_unique_constraints(table)
+    ]
+    pk = inspector.get_pk_constraint(table).get("constrained_columns")
+    if pk:
+        columns.append(tuple(pk))
+    return columns
+
+
+def _unique_columns(conn: Connection, table: str) -> List[Tuple[str, ...]]:
+    """Column lists of the unique indexes, unique constraints and primary key of table."""
+    inspector = inspect(conn)
+    columns = [
+        tuple(ix["column_names"])
+        for ix in inspector.get_indexes(table)
+        if ix.get("unique")
+    ]
+    columns += [
+        tuple(uc["column_names"]) for uc in inspector.get_unique_constraints(table)
+    ]
+    pk = inspector.get_pk_constraint(table).get("constrained_columns")
+    if pk:
+        columns.append(tuple(pk))
+    return columns
+
+
+def _is_covered(conn: Connection, table: str, columns: Sequence[str]) -> bool:
+    # An index serves the lookup if the lookup's columns lead it
+    columns = tuple(columns)
+    return any(ix[: len(columns)] == columns for ix in _index_columns(conn, table))
+
+
+def add_column(conn: Connection, table: str, column: str, ddl_type: str):
+    if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+def create_index(
+    conn: Connection, name: str, table: str, columns: Sequence[str], unique=False
+):
+    """
+    Creates the index unless an existing one already leads with the same
+    columns. A unique index is only skipped if the table already enforces
+    uniqueness on exactly those columns.
+    """
+    if unique:
+        if tuple(columns) in _unique_columns(conn, table):
+            return
+    elif _is_covered(conn, table, columns):
+        return
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    conn.execute(
+        text(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+    )
+
+
+def _leaderboard_columns(conn: Connection):
+    add_column(conn, "users", "total_impact", "DECIMAL(18, 2)")
+    add_column(conn, "users", "is_sales", "BOOLEAN")
+    add_column(conn, "users", "is_trading", "BOOLEAN")
+    create_index(conn, "ix_users_total_impact", "users", ["total_impact"])
+    create_index(conn, "ix_users_sales_impact", "users", ["is_sales", "total_impact"])
+    create_index(
+        conn, "ix_users_trading_impact", "users", ["is_trading", "total_impact"]
+    )
+
+
+def _feed_indexes(conn: Connection):
+    create_index(conn, "ix_posts_created_at_id", "posts", ["created_at", "id"])
+    # Duplicate likes from before the unique index would make it fail
+    conn.execute(
+        text(
+            "DELETE FROM post_likes WHERE id NOT IN "
+            "(SELECT MIN(id) FROM post_likes GROUP BY post_id, user_id)"
+        )
+    )
+    create_index(
+        conn,
+        "ux_post_likes_post_user",
+        "post_likes",
+        ["post_id", "user_id"],
+        unique=True,
+    )
+
+
+def _hot_path_indexes(conn: Connection):
+    # Every execute/status call looks accounts up by (user_id, platform_id)
+    create_index(
+        conn,
+        "ix_trading_accounts_user_platform",
+        "trading_accounts",
+        ["user_id", "platform_id"],
+    )
+    create_index(conn, "ix_trading_platforms_code", "trading_platforms", ["code"])
+    create_index(conn, "ix_post_comments_post_id", "post_comments", ["post_id"])
+
+
+# Append only; never renumber or edit a migration that has shipped
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "leaderboard_columns", _leaderboard_columns),
+    (2, "feed_indexes", _feed_indexes),
+    (3, "hot_path_indexes", _hot_path_indexes),
+]
+
+
+def current_version(engine: Engine) -> int:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+                "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+            )
+        )
+        version = conn.execute(text("SELECT MAX(version) FROM schema_migrations"))
+        return version.scalar() or 0
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    Applies pending migrations in order.
+
+    Returns:
+        List[int]: The versions applied by this call.
+    """
+    applied = []
+    version = current_version(engine)
+    for number, name, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name) VALUES (:v, :n)"),
+                {"v": number, "n": name},
+            )
+        logger.info(f"Applied migration {number} ({name})")
+        applied.append(number)
+    return applied
+
+
+def missing_indexes(engine: Engine) -> List[str]:
+    """Returns the REQUIRED_INDEXES lookups with no covering index, as "table(columns)"."""
+    missing = []
+    with engine.connect() as conn:
+        tables = set(inspect(conn).get_table_names())
+        for table, columns in REQUIRED_INDEXES:
+            if table in tables and not _is_covered(conn, table, columns):
+                missing.append(f"{table}({', '.join(columns)})")
+    return missing
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from backend.database import engine, init_db
+
+    init_db()
+    print(f"Schema version: {current_version(engine)}")
+    missing = missing_indexes(engine)
+    for lookup in missing:
+        print(f"Missing index: {lookup}")
+    if missing:
+        sys.exit(1)
+    print("All hot-path indexes present")
@@ -1,5 +1,5 @@
 
-from sqlalchemy import create_engine, Column, String, Boolean, DateTime, DECIMAL, ForeignKey, Text, UniqueConstraint, Integer 
+from sqlalchemy import create_engine, Column, String, Boolean, DateTime, DECIMAL, ForeignKey, Text, UniqueConstraint, Integer, Index 
 from sqlalchemy.types import TypeDecorator, CHAR
 import uuid
 
@@ -94,8 +94,19 @@ class User(Base):
     roles = Column(Text, default='["Member"]') # JSON string
     trend = Column(Text, default="+0%")
 
+    # Denormalized from the metrics and roles above so the leaderboard can
+    # filter and sort in SQL; kept in sync by LeaderboardService.update_stats
+    total_impact = Column(DECIMAL(18, 2), default=0, index=True)
+    is_sales = Column(Boolean, default=False)
+    is_trading = Column(Boolean, default=False)
+
     posts = relationship("Post", back_populates="user", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index('ix_users_sales_impact', 'is_sales', 'total_impact'),
+        Index('ix_users_trading_impact', 'is_trading', 'total_impact'),
+    )
+
 
 class Post(Base):
     __tablename__ = 'posts'
@@ -114,6 +125,11 @@ class Post(Base):
     likes = relationship("PostLike", back_populates="post", cascade="all, delete-orphan")
     comments = relationship("PostComment", back_populates="post", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Feed order; keyset pagination seeks on (created_at, id)
+        Index('ix_posts_created_at_id', 'created_at', 'id'),
+    )
+
 class PostLike(Base):
     __tablename__ = 'post_likes'
     
@@ -125,6 +141,11 @@ class PostLike(Base):
     post = relationship("Post", back_populates="likes")
     user = relationship("User")
 
+    __table_args__ = (
+        # One like per user per post; toggling is a single insert or delete
+        Index('ux_post_likes_post_user', 'post_id', 'user_id', unique=True),
+    )
+
 class PostComment(Base):
     __tablename__ = 'post_comments'
     
@@ -136,3 +157,7 @@ class PostComment(Base):
     
     post = relationship("Post", back_populates="comments")
     user = relationship("User")
+
+    __table_args__ = (
+        Index('ix_post_comments_post_id', 'post_id'),
+    )
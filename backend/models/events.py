@@ -20,9 +20,36 @@ class Events:
     ModifyOrder = "Event:Order:Modify"
     GetOpenOrders = "Event:Order:Get:Open"
     GetCloseOrders = "Event:Order:Get:Close"
+    ResyncOrders = "Event:Order:Resync"
 
     # Account
     Account = "Event:Account:All"
 
     # Exchange Info
     ExchangeInfo = "Event:ExchangeInfo:All"
+
+
+class Rooms:
+    """
+    Socket.IO room names used to scope market data to interested clients.
+    """
+
+    @staticmethod
+    def tick(symbol: str) -> str:
+        return f"Room:Kline:Tick:{symbol}"
+
+    @staticmethod
+    def bar(symbol: str, time_frame: str) -> str:
+        return f"Room:Kline:Bar:{symbol}:{time_frame}"
+
+    @staticmethod
+    def price(symbol: str) -> str:
+        return f"Room:Price:{symbol}"
+
+    @staticmethod
+    def position(symbol: str) -> str:
+        return f"Room:Position:{symbol}"
+
+    @staticmethod
+    def user(user_id: str) -> str:
+        return f"Room:User:{user_id}"
@@ -1,9 +1,153 @@
+from sqlalchemy import or_, and_, update, delete, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload
 from backend.models.db_models import Post, User, PostLike, PostComment
-from typing import Optional, List
+from backend.models.feed_models import PostResponse
+from collections import OrderedDict
+from typing import Optional, List, Tuple
+import os
 import json
+import uuid
+import asyncio
+import logging
+import threading
 from datetime import datetime
 
+# When set, like/comment counter changes are summed in memory and written
+# every this many seconds, so a viral post's row is not updated per click
+COUNTER_FLUSH_INTERVAL = float(os.getenv("FEED_COUNTER_FLUSH_INTERVAL", "0"))
+# Serialized feed pages kept in memory (least recently used are evicted)
+FEED_CACHE_SIZE = int(os.getenv("FEED_CACHE_SIZE", "64"))
+
+logger = logging.getLogger("FeedService")
+
+class CounterBuffer:
+    """
+    Pending likes_count/comments_count deltas per post. Reads add the
+    pending deltas to the stored counts; flush() applies them as one
+    atomic UPDATE per post.
+    """
+
+    def __init__(self, interval: float = COUNTER_FLUSH_INTERVAL):
+        self.interval = interval
+        self.deltas = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._session_factory = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def add(self, post_id: str, likes: int = 0, comments: int = 0):
+        with self._lock:
+            pending = self.deltas.setdefault(post_id, [0, 0])
+            pending[0] += likes
+            pending[1] += comments
+
+    def pending(self, post_id: str) -> Tuple[int, int]:
+        with self._lock:
+            return tuple(self.deltas.get(post_id, (0, 0)))
+
+    def flush(self, db: Session):
+        with self._lock:
+            snapshot = {post_id: tuple(d) for post_id, d in self.deltas.items()}
+        if not snapshot:
+            return
+
+        for post_id, (likes, comments) in snapshot.items():
+            db.execute(update(Post).where(Post.id == post_id).values(
+                likes_count=func.coalesce(Post.likes_count, 0) + likes,
+                comments_count=func.coalesce(Post.comments_count, 0) + comments
+            ))
+        db.commit()
+
+        # Only now drop what was written; a failed flush keeps every delta
+        with self._lock:
+            for post_id, (likes, comments) in snapshot.items():
+                pending = self.deltas[post_id]
+                pending[0] -= likes
+                pending[1] -= comments
+                if pending == [0, 0]:
+                    del self.deltas[post_id]
+        for post_id in snapshot:
+            feed_cache.invalidate(post_id)
+
+    def _flush_with_session(self):
+        db = self._session_factory()
+        try:
+            self.flush(db)
+        finally:
+            db.close()
+
+    def start(self, session_factory):
+        """Starts the periodic flush on the running event loop, if buffering is enabled."""
+        self._session_factory = session_factory
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._session_factory is not None:
+            await asyncio.to_thread(self._flush_with_session)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self._flush_with_session)
+            except Exception as e:
+                logger.error(f"Feed counter flush failed: {e}")
+
+class FeedPageCache:
+    """
+    Read-through cache of serialized feed pages, keyed by (skip, limit, before).
+
+    Each page remembers the posts on it, so a like or comment drops only the
+    pages showing that post, while a new post drops every page. A page read
+    from the database is only stored if nothing was invalidated while it was
+    being read, so a stale page is never cached.
+    """
+
+    def __init__(self, max_pages: int = FEED_CACHE_SIZE):
+        self.max_pages = max_pages
+        # key -> (body, next cursor, post ids)
+        self.pages = OrderedDict()
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            page = self.pages.get(key)
+            if page is None:
+                return None, self.version
+            self.pages.move_to_end(key)
+            return page, self.version
+
+    def put(self, key, version: int, body: bytes, next_cursor: Optional[str], post_ids):
+        with self._lock:
+            if version != self.version or self.max_pages <= 0:
+                return
+            self.pages[key] = (body, next_cursor, frozenset(post_ids))
+            while len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+
+    def invalidate(self, post_id: Optional[str] = None):
+        """Drops the pages showing post_id, or every page if it is None."""
+        with self._lock:
+            self.version += 1
+            if post_id is None:
+                self.pages.clear()
+                return
+            for key in [k for k, page in self.pages.items() if post_id in page[2]]:
+                del self.pages[key]
+
+feed_counters = CounterBuffer()
+feed_cache = FeedPageCache()
+
 class FeedService:
     @staticmethod
     def create_post(db: Session, user_id: str, type: str, content: str = None, meta_data: dict = None) -> Post:
@@ -22,52 +166,125 @@ class FeedService:
         db.add(new_post)
         db.commit()
         db.refresh(new_post)
+        feed_cache.invalidate()
         return new_post
 
     @staticmethod
-    def get_posts(db: Session, skip: int = 0, limit: int = 50) -> List[Post]:
-        return db.query(Post).options(joinedload(Post.user)).order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
+    def get_posts(db: Session, skip: int = 0, limit: int = 50, before: Optional[str] = None) -> List[Post]:
+        query = db.query(Post).options(joinedload(Post.user))
+        if before:
+            # Keyset: seek past the cursor on the (created_at, id) index, so
+            # every page costs the same however deep the scroll
+            created_at, post_id = FeedService.decode_cursor(before)
+            query = query.filter(or_(
+                Post.created_at < created_at,
+                and_(Post.created_at == created_at, Post.id < post_id)
+            ))
+        elif skip:
+            query = query.offset(skip)
+        return query.order_by(Post.created_at.desc(), Post.id.desc()).limit(limit).all()
+
+    @staticmethod
+    def get_feed_page(db: Session, skip: int = 0, limit: int = 50, before: Optional[str] = None) -> Tuple[bytes, Optional[str]]:
+        """
+        Returns a feed page as serialized PostResponse JSON, plus the cursor
+        for the next page (None on the last page). Served from feed_cache when possible.
+        """
+        key = (skip, limit, before)
+        page, version = feed_cache.get(key)
+        if page is not None:
+            return page[0], page[1]
+
+        posts = FeedService.get_posts(db, skip, limit, before)
+        body = json.dumps([PostResponse.model_validate(p, from_attributes=True).model_dump(mode="json") for p in posts]).encode()
+        next_cursor = FeedService.encode_cursor(posts[-1]) if len(posts) == limit else None
+        feed_cache.put(key, version, body, next_cursor, [p.id for p in posts])
+        return body, next_cursor
+
+    @staticmethod
+    def encode_cursor(post: Post) -> str:
+        return f"{post.created_at.isoformat()}|{post.id}"
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        # Raises ValueError for a malformed cursor
+        created_at, sep, post_id = cursor.partition("|")
+        if not sep or not post_id:
+            raise ValueError(f"Invalid feed cursor: {cursor}")
+        return datetime.fromisoformat(created_at), post_id
+
+    @staticmethod
+    def _add_to_counts(db: Session, post_id: str, likes: int = 0, comments: int = 0) -> Optional[Tuple[int, int]]:
+        """
+        Adds to a post's counters atomically in SQL (or in the counter buffer)
+        and returns the new (likes_count, comments_count); None if there is no such post.
+        """
+        if feed_counters.enabled:
+            row = db.query(Post.likes_count, Post.comments_count).filter(Post.id == post_id).first()
+            if row is None:
+                return None
+            pending_likes, pending_comments = feed_counters.pending(post_id)
+            return (row[0] or 0) + pending_likes + likes, (row[1] or 0) + pending_comments + comments
+
+        values = {}
+        if likes:
+            values["likes_count"] = func.coalesce(Post.likes_count, 0) + likes
+        if comments:
+            values["comments_count"] = func.coalesce(Post.comments_count, 0) + comments
+        stmt = update(Post).where(Post.id == post_id).values(**values).returning(Post.likes_count, Post.comments_count)
+        return db.execute(stmt).first()
 
     @staticmethod
     def toggle_like(db: Session, user_id: str, post_id: str) -> dict:
-        existing = db.query(PostLike).filter(PostLike.user_id == user_id, PostLike.post_id == post_id).first()
-        post = db.query(Post).filter(Post.id == post_id).first()
-        if not post:
+        # Unlike if a like exists, otherwise like
+        removed = db.execute(delete(PostLike).where(PostLike.user_id == user_id, PostLike.post_id == post_id)).rowcount
+        delta = -1 if removed else 1
+
+        counts = FeedService._add_to_counts(db, post_id, likes=delta)
+        if counts is None:
+            db.rollback()
             return {"status": "error", "message": "Post not found"}
-            
-        if existing:
-            db.delete(existing)
-            post.likes_count = max(0, (post.likes_count or 0) - 1)
-            liked = False
-        else:
-            new_like = PostLike(user_id=user_id, post_id=post_id)
-            db.add(new_like)
-            post.likes_count = (post.likes_count or 0) + 1
-            liked = True
-            
+
+        if not removed:
+            db.add(PostLike(user_id=user_id, post_id=post_id))
+            try:
+                db.flush()
+            except IntegrityError:
+                # A concurrent request liked it first; the count already has it
+                db.rollback()
+                likes_count = db.query(Post.likes_count).filter(Post.id == post_id).scalar() or 0
+                return {"status": "success", "liked": True, "likes_count": likes_count + feed_counters.pending(post_id)[0]}
+
         db.commit()
-        db.refresh(post)
-        return {"status": "success", "liked": liked, "likes_count": post.likes_count}
+        if feed_counters.enabled:
+            feed_counters.add(post_id, likes=delta)
+        else:
+            feed_cache.invalidate(post_id)
+        return {"status": "success", "liked": not removed, "likes_count": counts[0]}
 
     @staticmethod
     def add_comment(db: Session, user_id: str, post_id: str, content: str) -> dict:
-        post = db.query(Post).filter(Post.id == post_id).first()
-        if not post:
+        counts = FeedService._add_to_counts(db, post_id, comments=1)
+        if counts is None:
+            db.rollback()
             return {"status": "error", "message": "Post not found"}
-            
-        new_comment = PostComment(user_id=user_id, post_id=post_id, content=content)
-        db.add(new_comment)
-        post.comments_count = (post.comments_count or 0) + 1
-        
+
+        # Set in Python so nothing has to be reloaded after the commit
+        comment_id = str(uuid.uuid4())
+        created_at = datetime.now()
+        db.add(PostComment(id=comment_id, user_id=user_id, post_id=post_id, content=content, created_at=created_at))
         db.commit()
-        db.refresh(post)
+        if feed_counters.enabled:
+            feed_counters.add(post_id, comments=1)
+        else:
+            feed_cache.invalidate(post_id)
         return {
             "status": "success", 
-            "comments_count": post.comments_count,
+            "comments_count": counts[1],
             "comment": {
-                "id": new_comment.id,
+                "id": comment_id,
                 "user_id": user_id,
                 "content": content,
-                "created_at": new_comment.created_at
+                "created_at": created_at
             }
         }
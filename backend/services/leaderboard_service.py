@@ -1,70 +1,119 @@
 from sqlalchemy.orm import Session
 from backend.models.db_models import User
 from decimal import Decimal
+import threading
 import json
 
+# Top-N per (category, limit), as response dicts. Routes run in the threadpool,
+# so access goes through a lock; the version stops a query that raced an
+# invalidation from caching its stale result.
+_cache = {}
+_cache_version = 0
+_cache_lock = threading.Lock()
+
 class LeaderboardService:
     @staticmethod
     def get_leaderboard(db: Session, category: str = "ALL", limit: int = 10):
-        users = db.query(User).all()
-        
-        filtered = []
-        for u in users:
-            try:
-                u_roles = json.loads(u.roles) if u.roles else []
-            except:
-                u_roles = []
-                
-            if category == "ALL":
-                filtered.append(u)
-            elif category == "SALES" and "Sales" in u_roles:
-                filtered.append(u)
-            elif category == "TRADING" and "Trading" in u_roles:
-                filtered.append(u)
-            elif category == "DUAL" and "Sales" in u_roles and "Trading" in u_roles:
-                filtered.append(u)
-                
-        # Sort by total impact
-        def get_total(u):
-            return (u.sales_revenue or 0) + (u.trading_yield or 0)
-            
-        filtered.sort(key=get_total, reverse=True)
-        
-        return filtered[:limit]
+        key = (category, limit)
+        with _cache_lock:
+            if key in _cache:
+                return _cache[key]
+            version = _cache_version
+
+        query = db.query(User)
+        if category == "SALES":
+            query = query.filter(User.is_sales.is_(True))
+        elif category == "TRADING":
+            query = query.filter(User.is_trading.is_(True))
+        elif category == "DUAL":
+            query = query.filter(User.is_sales.is_(True), User.is_trading.is_(True))
+        elif category != "ALL":
+            return []
+
+        users = query.order_by(User.total_impact.desc(), User.id).limit(limit).all()
+        leaderboard = [LeaderboardService.to_response(u) for u in users]
+
+        with _cache_lock:
+            if version == _cache_version:
+                _cache[key] = leaderboard
+        return leaderboard
+
+    @staticmethod
+    def to_response(user: User) -> dict:
+        return {
+            "id": user.id,
+            "username": user.username,
+            "rank": user.rank,
+            "avatar_url": user.avatar_url,
+            "sales_revenue": float(user.sales_revenue or 0),
+            "trading_yield": float(user.trading_yield or 0),
+            "roles": user.roles or "[]",
+            "trend": user.trend,
+        }
+
+    @staticmethod
+    def invalidate():
+        global _cache_version
+        with _cache_lock:
+            _cache.clear()
+            _cache_version += 1
+
+    @staticmethod
+    def sync_columns(user: User):
+        # Mirror the metrics and roles into the indexed leaderboard columns
+        try:
+            roles = json.loads(user.roles) if user.roles else []
+        except:
+            roles = []
+        user.is_sales = "Sales" in roles
+        user.is_trading = "Trading" in roles
+        user.total_impact = Decimal(str(user.sales_revenue or 0)) + Decimal(str(user.trading_yield or 0))
+
+    @staticmethod
+    def backfill(db: Session):
+        # Only rows created before the leaderboard columns existed are NULL
+        users = db.query(User).filter(User.total_impact.is_(None)).all()
+        for user in users:
+            LeaderboardService.sync_columns(user)
+        if users:
+            db.commit()
+            LeaderboardService.invalidate()
 
     @staticmethod
     def update_stats(db: Session, username: str, sales: float = None, trading: float = None, trend: str = None):
         user = db.query(User).filter(User.username == username).first()
         if not user:
             return None
-            
+
         if sales is not None:
             user.sales_revenue = Decimal(str(sales))
         if trading is not None:
             user.trading_yield = Decimal(str(trading))
         if trend:
             user.trend = trend
-            
+
         # Update roles based on stats logic (simple auto-tagging)
         try:
             current_roles = json.loads(user.roles) if user.roles else []
         except:
             current_roles = []
-            
+
         new_roles = set(current_roles)
         # Ensure 'Member' is always there? Or cleaner roles.
-        
+
         if (user.sales_revenue or 0) > 0:
             new_roles.add("Sales")
         if (user.trading_yield or 0) > 0:
             new_roles.add("Trading")
-            
+
         user.roles = json.dumps(list(new_roles))
-        
+        LeaderboardService.sync_columns(user)
+
         # Check for rank promotion
         from backend.services.rank_service import RankService
         RankService.check_rank_update(db, user)
-            
+
         db.commit()
         db.refresh(user)
+        LeaderboardService.invalidate()
         return user
@@ -1,9 +1,79 @@
+from sqlalchemy import case, or_, update, insert
 from sqlalchemy.orm import Session
-from backend.models.db_models import User
-from backend.services.feed_service import FeedService
-from typing import Optional
+from backend.models.db_models import User, Post
+from backend.services.feed_service import FeedService, feed_cache
+from backend.services.leaderboard_service import LeaderboardService
+from typing import Optional, List
+from datetime import datetime
+import uuid
+import json
 
 class RankService:
+    # Defined Thresholds (Sales, Trading), highest rank first
+    RANKS = [
+        ("Executive", 100000.0, 50000.0),
+        ("Director", 50000.0, 25000.0),
+        ("Manager", 10000.0, 5000.0),
+        ("Associate", 0.0, 0.0)
+    ]
+
+    @staticmethod
+    def rank_for(sales: float, trading: float) -> str:
+        for r_name, s_thresh, t_thresh in RankService.RANKS:
+            if sales >= s_thresh or trading >= t_thresh:
+                return r_name
+        return "Associate"
+
+    @staticmethod
+    def rank_expression():
+        """SQL CASE equivalent of rank_for over the users table."""
+        sales = User.sales_revenue
+        trading = User.trading_yield
+        return case(
+            *[(or_(sales >= s_thresh, trading >= t_thresh), r_name) for r_name, s_thresh, t_thresh in RankService.RANKS[:-1]],
+            else_="Associate"
+        )
+
+    @staticmethod
+    def reevaluate_ranks(db: Session) -> List[dict]:
+        """
+        Re-ranks every user against RANKS, e.g. after a season reset or a
+        threshold change. Ranks are computed in one query, changed users are
+        updated in one bulk UPDATE and their rank_achievement posts are
+        bulk-inserted, all in a single transaction.
+
+        Returns:
+            List[dict]: {"user_id", "from", "to"} for each user whose rank changed.
+        """
+        new_rank = RankService.rank_expression()
+        changed = db.query(User.id, User.rank, new_rank.label("new_rank")).filter(
+            or_(User.rank.is_(None), User.rank != new_rank)
+        ).all()
+        if not changed:
+            return []
+
+        db.execute(update(User), [{"id": user_id, "rank": to_rank} for user_id, _, to_rank in changed])
+
+        now = datetime.now()
+        db.execute(insert(Post), [
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "type": "rank_achievement",
+                "content": f"Just achieved {to_rank} rank! \N{PARTY POPPER}",
+                "meta_data": json.dumps({"from": from_rank, "to": to_rank, "color": "#ffd700"}),
+                "created_at": now,
+                "likes_count": 0,
+                "comments_count": 0
+            }
+            for user_id, from_rank, to_rank in changed
+        ])
+        db.commit()
+
+        LeaderboardService.invalidate()
+        feed_cache.invalidate()
+        return [{"user_id": user_id, "from": from_rank, "to": to_rank} for user_id, from_rank, to_rank in changed]
+
     @staticmethod
     def update_user_rank(db: Session, user_id: str, new_rank: str) -> Optional[User]:
         user = db.query(User).filter(User.id == user_id).first()
@@ -15,6 +85,7 @@ class RankService:
             user.rank = new_rank
             db.commit()
             db.refresh(user)
+            LeaderboardService.invalidate()
             
             # Trigger Post
             # Meta data for frontend "from -> to" visual
@@ -45,26 +116,15 @@ class RankService:
         db.add(new_user)
         db.commit()
         db.refresh(new_user)
+        LeaderboardService.invalidate()
         return new_user
 
     @staticmethod
     def check_rank_update(db: Session, user: User) -> Optional[User]:
-        # Defined Thresholds (Sales, Trading)
-        ranks = [
-            ("Executive", 100000.0, 50000.0),
-            ("Director", 50000.0, 25000.0),
-            ("Manager", 10000.0, 5000.0),
-            ("Associate", 0.0, 0.0)
-        ]
-        
         current_sales = float(user.sales_revenue or 0)
         current_trading = float(user.trading_yield or 0)
         
-        new_rank = "Associate"
-        for r_name, s_thresh, t_thresh in ranks:
-            if current_sales >= s_thresh or current_trading >= t_thresh:
-                new_rank = r_name
-                break
+        new_rank = RankService.rank_for(current_sales, current_trading)
         
         if new_rank != user.rank:
             # Re-use update_user_rank which handles the post creation
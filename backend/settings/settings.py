@@ -11,6 +11,10 @@ class Settings(BaseSettings):
     
     # Database (Default to local SQLite if not provided)
     DATABASE_URL: str = "sqlite:///./verstige_local.db"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
     
     # Supabase (API)
     SUPABASE_URL: str = ""
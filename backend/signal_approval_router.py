@@ -3,9 +3,8 @@
 Verstige OS — Signal Approval Router
 Add to your FastAPI app: app.include_router(router)
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Body
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from supabase import create_client, Client
 import os
 import sys
 
@@ -13,29 +12,30 @@ import sys
 sys.path.append(os.path.dirname(__file__))
 from tradelocker_execution import execute_signal_for_user
 
+try:
+    from backend.supabase_db import get_user_id
+    from backend.write_behind import write_behind
+    from backend.account_repository import accounts
+except ImportError:  # Run from the backend directory
+    from supabase_db import get_user_id
+    from write_behind import write_behind
+    from account_repository import accounts
+
 router = APIRouter(prefix="/api/signals", tags=["signals"])
 security = HTTPBearer()
 
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"), 
-    os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_KEY")
-)
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     token = credentials.credentials
     try:
         print(f"DEBUG AUTH: Received token: {token[:20]}...") 
-        user_resp = supabase.auth.get_user(token)
+        user_id = await get_user_id(token)
         
-        # Check if user_resp has a user object directly or in data
-        user = user_resp.user if hasattr(user_resp, 'user') else None
-        
-        if not user:
-            print(f"DEBUG AUTH: Supabase returned no user. Full Resp: {user_resp}")
+        if not user_id:
+            print("DEBUG AUTH: Supabase returned no user")
             raise HTTPException(status_code=401, detail="Invalid session - No user found")
             
-        print(f"DEBUG AUTH: Authenticated user ID: {user.id}")
-        return user.id
+        print(f"DEBUG AUTH: Authenticated user ID: {user_id}")
+        return user_id
     except Exception as e:
         print(f"DEBUG AUTH FAILED: {str(e)}")
         # If it's already an HTTPException, re-raise it
@@ -43,6 +43,24 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             raise e
         raise HTTPException(status_code=401, detail=f"Unauthorized: {str(e)}")
 
+@router.post("/auto-execute")
+async def toggle_auto_execute(
+    enabled: bool = Body(..., embed=True),
+    user_id: str = Depends(get_current_user),
+):
+    """Opt in to (or out of) executing every new signal on your TradeLocker account."""
+    try:
+        rows = await accounts.set_auto_execute(user_id, "tradelocker", enabled)
+        if rows is None:
+            raise HTTPException(status_code=400, detail="TradeLocker platform not found")
+        if not rows:
+            raise HTTPException(status_code=400, detail="No TradeLocker account linked")
+        return {"success": True, "auto_execute": enabled}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update auto-execute: {str(e)}")
+
 @router.post("/{signal_id}/approve")
 async def approve_signal(
     signal_id: str,
@@ -63,7 +81,8 @@ async def reject_signal(
     user_id: str = Depends(get_current_user),
 ):
     try:
-        supabase.table("signals").update({"status": "rejected"}).eq("id", signal_id).execute()
+        # Queued with execution statuses so the last decision wins
+        write_behind.set_signal_status(signal_id, "rejected")
         return {"success": True, "message": "Signal rejected"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to reject signal: {str(e)}")
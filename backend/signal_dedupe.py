@@ -0,0 +1,176 @@
+"""
+Verstige OS — Signal Ingestion Dedupe
+Drops re-delivered updates before they reach the queue, Supabase or Socket.IO.
+
+Telegram re-delivers updates when a webhook is slow, and the poller can
+forward the same update twice after an error. Each update is reduced to a
+key (chat + message, update ID, or a content hash). Recent keys are held in
+a bounded in-memory LRU, which answers almost every check in O(1). Behind it,
+a SQLite table keeps the dedupe window across restarts.
+
+Checking and recording are separate steps, so a key is only recorded once
+its update has been handled. The queued path records the key in the same
+transaction as the signal_jobs row (both tables live in QUEUE_PATH). An
+update whose enqueue fails is therefore not dropped when it is delivered
+again.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+from backend.signal_queue import QUEUE_PATH
+
+MAX_KEYS = int(os.getenv("SIGNAL_DEDUPE_MAX_KEYS", "10000"))
+# How long a Telegram update is remembered
+UPDATE_TTL = float(os.getenv("SIGNAL_DEDUPE_TTL", str(24 * 3600)))
+# Identical payloads without message IDs are only duplicates if close together
+CONTENT_TTL = float(os.getenv("SIGNAL_DEDUPE_CONTENT_TTL", "300"))
+PRUNE_EVERY = 1000  # inserts between deletes of expired rows
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS signal_dedupe ("
+    "key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+)
+
+logger = logging.getLogger("SignalDedupe")
+
+
+def update_key(update: dict) -> str:
+    """
+    Dedupe key for a Telegram update: chat + message ID when present (stable
+    across webhook and poller delivery), else the update ID, else a hash.
+    """
+    message = update.get("message") or update.get("channel_post") or {}
+    chat_id = (message.get("chat") or {}).get("id")
+    message_id = message.get("message_id")
+    if chat_id is not None and message_id is not None:
+        return f"msg:{chat_id}:{message_id}"
+    if update.get("update_id") is not None:
+        return f"upd:{update['update_id']}"
+    return content_key(update)
+
+
+def content_key(payload) -> str:
+    """Dedupe key from a hash of the payload itself."""
+    raw = json.dumps(payload, sort_keys=True, default=str).encode()
+    return "sha:" + hashlib.sha1(raw).hexdigest()
+
+
+class SignalDeduplicator:
+    """
+    Bounded LRU of recently seen keys over a persisted expiry window.
+
+    Keys map to their expiry time. A key is a duplicate while it has not
+    expired; an expired key counts as new and starts a fresh window.
+    """
+
+    def __init__(self, path: str = QUEUE_PATH, max_keys: int = MAX_KEYS):
+        self.path = path
+        self.max_keys = max_keys
+        self.recent: "OrderedDict[str, float]" = OrderedDict()
+        self.db: Optional[sqlite3.Connection] = None
+        self._inserts = 0
+
+    def open(self):
+        if self.db is not None:
+            return
+
+        self.db = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(SCHEMA)
+
+    def seen(self, key: str) -> bool:
+        """
+        Checks a key without recording it.
+
+        Returns:
+            bool: True if the key was already recorded and has not expired.
+        """
+        now = time.time()
+        expires_at = self.recent.get(key)
+        if expires_at is None or expires_at <= now:
+            self.open()
+            row = self.db.execute(
+                "SELECT expires_at FROM signal_dedupe WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[0] <= now:
+                return False
+            expires_at = row[0]
+
+        self._remember(key, expires_at)
+        logger.info(f"Dropped duplicate update {key}")
+        return True
+
+    def mark(
+        self, key: str, ttl: float = UPDATE_TTL, db: Optional[sqlite3.Connection] = None
+    ) -> bool:
+        """
+        Records a key unless it is still within its window.
+
+        Pass a connection to the same SQLite file as `db` to record the key in
+        that connection's open transaction, together with the work the key
+        guards. The key then only reaches the in-memory LRU once `seen` reads
+        it back, so a rolled-back transaction leaves nothing behind.
+
+        Returns:
+            bool: False if the key is a duplicate.
+        """
+        remember = db is None
+        if remember:
+            self.open()
+            db = self.db
+        else:
+            # Opening our own connection would wait on the caller's write lock
+            db.execute(SCHEMA)
+
+        now = time.time()
+        # Insert the key, or restart the window of an expired one; a fresh
+        # duplicate leaves the row untouched (rowcount 0)
+        cursor = db.execute(
+            "INSERT INTO signal_dedupe (key, expires_at) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at "
+            "WHERE signal_dedupe.expires_at <= ?",
+            (key, now + ttl, now),
+        )
+        if cursor.rowcount == 0:
+            logger.info(f"Dropped duplicate update {key}")
+            return False
+
+        self._inserts += 1
+        if self._inserts % PRUNE_EVERY == 0:
+            self._prune(db, now)
+        if remember:
+            self._remember(key, now + ttl)
+        return True
+
+    def forget(self, key: str):
+        """Drops a key, e.g. when the work it guarded failed."""
+        self.recent.pop(key, None)
+        self.open()
+        self.db.execute("DELETE FROM signal_dedupe WHERE key = ?", (key,))
+
+    def _remember(self, key: str, expires_at: float):
+        self.recent[key] = expires_at
+        self.recent.move_to_end(key)
+        while len(self.recent) > self.max_keys:
+            self.recent.popitem(last=False)
+
+    def _prune(self, db: sqlite3.Connection, now: float):
+        db.execute("DELETE FROM signal_dedupe WHERE expires_at <= ?", (now,))
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+signal_dedupe = SignalDeduplicator()
@@ -0,0 +1,434 @@
+"""
+Verstige OS — Signal Parser
+Single-pass parser for trade signals posted to Telegram channels.
+
+The message is scanned once with a precompiled tokenizer. Provider formats
+are pluggable: each SignalFormat contributes its own vocabulary (keywords,
+emoji markers) and an optional hook to adjust or reject what was parsed.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Fields a keyword can map to
+BUY, SELL, ENTRY, SL, TP, RISK, TF, NOTES = (
+    "buy",
+    "sell",
+    "entry",
+    "sl",
+    "tp",
+    "risk",
+    "tf",
+    "notes",
+)
+
+TIMEFRAME_RE = re.compile(r"(?:M\d+|H\d+|D\d?|W\d?|MN\d?)", re.I)
+
+# Words that can sit next to the direction but are never the instrument
+SYMBOL_STOPWORDS = frozenset(
+    {
+        "NOW",
+        "AT",
+        "ZONE",
+        "MARKET",
+        "LIMIT",
+        "ORDER",
+        "SIGNAL",
+        "SIGNALS",
+        "NEW",
+        "VIP",
+        "FREE",
+        "ALERT",
+        "TRADE",
+        "SETUP",
+        "THE",
+        "AND",
+        "FROM",
+        "AREA",
+        "PIPS",
+        "LOTS",
+        "LOT",
+    }
+)
+
+
+@dataclass
+class ParsedSignal:
+    symbol: str
+    direction: str  # "BUY" or "SELL"
+    entry: float
+    stop_loss: float
+    take_profits: List[float]
+    entry_range: Optional[Tuple[float, float]] = None
+    risk_percent: float = 1.0
+    timeframe: Optional[str] = None
+    notes: Optional[str] = None
+    format: Optional[str] = None
+    source: str = "telegram"
+
+    @property
+    def take_profit(self) -> float:
+        return self.take_profits[0]
+
+    def to_dict(self) -> dict:
+        return {
+            "symbol": self.symbol,
+            "direction": self.direction,
+            "entry": self.entry,
+            "stop_loss": self.stop_loss,
+            "take_profit": self.take_profit,
+            "take_profits": list(self.take_profits),
+            "entry_range": list(self.entry_range) if self.entry_range else None,
+            "risk_percent": self.risk_percent,
+            "timeframe": self.timeframe,
+            "notes": self.notes,
+            "format": self.format,
+            "source": self.source,
+        }
+
+
+@dataclass
+class SignalFormat:
+    """
+    A provider's message vocabulary.
+
+    aliases maps a keyword or emoji (case-insensitive, whitespace-insensitive)
+    to one of BUY, SELL, ENTRY, SL, TP, RISK, TF or NOTES. finalize, if set,
+    receives signals whose first keyword came from this format and may return
+    an adjusted signal or None to reject it.
+    """
+
+    name: str
+    aliases: Dict[str, str]
+    finalize: Optional[Callable[[ParsedSignal], Optional[ParsedSignal]]] = None
+
+
+STANDARD_FORMAT = SignalFormat(
+    name="standard",
+    aliases={
+        "buy": BUY,
+        "buy limit": BUY,
+        "buy stop": BUY,
+        "long": BUY,
+        "sell": SELL,
+        "sell limit": SELL,
+        "sell stop": SELL,
+        "short": SELL,
+        "entry": ENTRY,
+        "entry price": ENTRY,
+        "entry zone": ENTRY,
+        "price": ENTRY,
+        "@": ENTRY,
+        "sl": SL,
+        "stop loss": SL,
+        "stop": SL,
+        "tp": TP,
+        "take profit": TP,
+        "target": TP,
+        "risk": RISK,
+        "tf": TF,
+        "timeframe": TF,
+        "time frame": TF,
+        "note": NOTES,
+        "notes": NOTES,
+    },
+)
+
+EMOJI_FORMAT = SignalFormat(
+    name="emoji",
+    aliases={
+        "🟢": BUY,
+        "📈": BUY,
+        "🔴": SELL,
+        "📉": SELL,
+        "📍": ENTRY,
+        "🔵": ENTRY,
+        "🛑": SL,
+        "⛔": SL,
+        "❌": SL,
+        "🎯": TP,
+        "💰": TP,
+    },
+)
+
+DEFAULT_FORMATS = [STANDARD_FORMAT, EMOJI_FORMAT]
+
+
+NUMBER = r"\d+(?:\.\d+)?(?:\s*[-–~]\s*\d+(?:\.\d+)?)?"
+NUMBER_RE = re.compile(NUMBER)
+SPACE = r"[^\S\n]"
+
+
+def _alias_key(alias: str) -> str:
+    """Lookup key for a keyword: lowercase, no whitespace."""
+    return "".join(alias.lower().split())
+
+
+def _alias_pattern(alias: str) -> str:
+    pattern = r"\s*".join(re.escape(word) for word in alias.lower().split())
+    if alias[-1].isalnum():
+        pattern += r"(?![^\W\d_])"
+    return pattern
+
+
+def _alternation(aliases: List[str], others: Sequence[str] = ()) -> str:
+    # Longest first so "stop loss" wins over "stop" and "buy limit" over "buy".
+    # A keyword that begins a longer keyword in another group gives way to it.
+    patterns = []
+    for alias in sorted(aliases, key=len, reverse=True):
+        key = _alias_key(alias)
+        longer = [
+            other
+            for other in others
+            if len(_alias_key(other)) > len(key) and _alias_key(other).startswith(key)
+        ]
+        pattern = _alias_pattern(alias)
+        if longer:
+            pattern = f"(?!{_alternation(longer)}){pattern}"
+        patterns.append(pattern)
+    return "|".join(patterns)
+
+
+def _to_number(raw: str) -> Tuple[float, Optional[Tuple[float, float]]]:
+    """Parses "2345.5" or a range such as "2345-2350" into (value, range)."""
+    try:
+        return float(raw), None
+    except ValueError:
+        pass
+
+    for sep in "-–~":
+        if sep in raw:
+            low, high = (float(part) for part in raw.split(sep, 1))
+            low, high = min(low, high), max(low, high)
+            return (low + high) / 2, (low, high)
+    raise ValueError(f"Invalid number: {raw}")
+
+
+class SignalParser:
+    """
+    Parses free-form signal messages in a single pass over the text.
+
+    The keywords of every registered format, each followed by the values it
+    takes, are compiled into one pattern with a named-group branch per kind
+    of field. Each match carries a keyword together with its values and the
+    scan resumes past them, so the text is read once and Python only runs per
+    field rather than per character or per token.
+
+    Layout rules shared by every format:
+      - the first BUY/SELL keyword sets the direction;
+      - the symbol is the first word after the direction, or else the last
+        word before it ("XAUUSD BUY");
+      - a number right after the direction/symbol ("@ 2345") is the entry,
+        unless an ENTRY keyword gives one;
+      - TP keywords also collect numbers joined by "/", ",", "|" or "&"
+        ("TP: 2360 / 2375"), but not a bare number after them ("50 pips");
+        an index before the value ("TP1", "TP 2:") is skipped;
+      - ranges such as "2345-2350" set entry_range and use the midpoint;
+      - NOTES takes the rest of its line.
+    """
+
+    def __init__(self, formats: Optional[List[SignalFormat]] = None):
+        self.formats: List[SignalFormat] = []
+        self._aliases: Dict[str, Tuple[str, SignalFormat]] = {}
+        self._signal_re: Optional[re.Pattern] = None
+        for signal_format in formats if formats is not None else DEFAULT_FORMATS:
+            self.register_format(signal_format)
+
+    def register_format(self, signal_format: SignalFormat) -> None:
+        """
+        Adds a provider format. Keywords already claimed by an earlier format
+        keep their original meaning.
+        """
+        self.formats.append(signal_format)
+        for alias, field_name in signal_format.aliases.items():
+            entry = self._aliases.setdefault(
+                _alias_key(alias), (field_name, signal_format)
+            )
+            # The keyword as written, so most lookups skip normalizing
+            self._aliases.setdefault(alias.lower(), entry)
+        self._compile()
+
+    def _compile(self) -> None:
+        by_field: Dict[str, List[str]] = {}
+        for signal_format in self.formats:
+            for alias, field_name in signal_format.aliases.items():
+                if self._aliases[_alias_key(alias)][0] == field_name:
+                    by_field.setdefault(field_name, []).append(alias)
+
+        groups = {
+            "direction": (BUY, SELL),
+            "field": (ENTRY, SL, TP, RISK),
+            "timeframe": (TF,),
+            "notes": (NOTES,),
+        }
+        group_aliases = {
+            group: [alias for name in names for alias in by_field.get(name, [])]
+            for group, names in groups.items()
+        }
+        aliases = [alias for group in group_aliases.values() for alias in group]
+        every = _alternation(aliases)
+        keywords = {
+            group: _alternation(
+                members, [alias for alias in aliases if alias not in members]
+            )
+            for group, members in group_aliases.items()
+        }
+        stopwords = "|".join(word.lower() for word in SYMBOL_STOPWORDS)
+        sep = rf"{SPACE}*[:=]?{SPACE}*"
+
+        # Each keyword is followed by what it reads, matched in the same search
+        tails = {
+            # BUY [NOW] XAUUSD [@ 2345]
+            "direction": (
+                rf"(?:{SPACE}+(?:{stopwords})(?![^\W\d_]))*"
+                rf"(?:{SPACE}+(?!(?:{every}))(?P<symbol>#?[^\W\d_][\w/]*))?"
+                rf"(?:{SPACE}*(?:@|at\b)?{SPACE}*(?P<price>{NUMBER}))?"
+            ),
+            # Entry: 2345 | TP1 2360 | Take Profit 2: 2375 / 2390
+            "field": (
+                rf"(?:\d(?!\d)|{SPACE}\d(?=[:)]))?{sep}[:)]?{sep}(?P<value>{NUMBER})?"
+                rf"(?P<more>(?:{SPACE}*[/,|&]{SPACE}*{NUMBER})+)?"
+            ),
+            "timeframe": rf"{sep}(?P<tf_value>\w+)?",
+            "notes": rf"{sep}(?P<note>[^\n]*)",
+        }
+        # Every branch is always present so match.groups() has a fixed layout
+        branches = "|".join(
+            f"(?P<{group}>{keywords[group] or '(?!)'}){tails[group]}"
+            for group in groups
+        )
+        # The lookahead rules out most positions with one set lookup before
+        # any branch is tried; the lookbehind skips keywords inside a word,
+        # e.g. "sl" in "isle". Matched against lowercased text: re.I is
+        # several times slower.
+        first_chars = "".join(sorted({alias.lower()[0] for alias in aliases}))
+        self._signal_re = re.compile(
+            rf"(?=[{re.escape(first_chars)}])(?<![^\W\d_])(?:{branches})"
+            if first_chars
+            else "(?!)"
+        )
+
+    def parse(self, text: str, source: str = "telegram") -> Optional[ParsedSignal]:
+        """
+        Parses a message into a signal.
+
+        Returns:
+            Optional[ParsedSignal]: The signal, or None if the message lacks a
+            direction, symbol, entry, stop loss or take profit.
+        """
+        if not text:
+            return None
+
+        direction = symbol = price_after_direction = None
+        direction_start = 0
+        entry = stop_loss = risk = timeframe = notes = None
+        entry_range = None
+        take_profits: List[float] = []
+        signal_format = None
+        aliases = self._aliases
+
+        lowered = text.lower()
+        # Lowercasing can change the length of some non-ASCII text
+        original = text if len(lowered) == len(text) else lowered
+
+        for match in self._signal_re.finditer(lowered):
+            # Groups in pattern order: one branch per kind of keyword
+            (
+                direction_kw,
+                word,
+                price,
+                value_kw,
+                raw,
+                more,
+                timeframe_kw,
+                timeframe_value,
+                notes_kw,
+                _,
+            ) = match.groups()
+
+            if value_kw is not None:
+                field_name, alias_format = (
+                    aliases.get(value_kw) or aliases[_alias_key(value_kw)]
+                )
+                if signal_format is None:
+                    signal_format = alias_format
+                if raw is None:
+                    continue
+
+                value, value_range = _to_number(raw)
+                if field_name == TP:
+                    take_profits.append(value)
+                    if more:
+                        take_profits.extend(
+                            _to_number(v)[0] for v in NUMBER_RE.findall(more)
+                        )
+                elif field_name == ENTRY:
+                    if entry is None:
+                        entry, entry_range = value, value_range
+                elif field_name == SL:
+                    if stop_loss is None:
+                        stop_loss = value_range[0] if value_range else value
+                elif field_name == RISK:
+                    risk = value
+
+            elif direction_kw is not None:
+                if direction is None:
+                    field_name = (
+                        aliases.get(direction_kw) or aliases[_alias_key(direction_kw)]
+                    )[0]
+                    direction = "BUY" if field_name == BUY else "SELL"
+                    direction_start = match.start()
+                if symbol is None and word:
+                    symbol = word.lstrip("#").replace("/", "").upper()
+                if price_after_direction is None:
+                    price_after_direction = price
+
+            elif timeframe_kw is not None:
+                if timeframe_value and TIMEFRAME_RE.fullmatch(timeframe_value):
+                    timeframe = timeframe_value.upper()
+
+            else:
+                notes = original[slice(*match.span("note"))].strip() or None
+
+        if entry is None and price_after_direction:
+            # An ENTRY keyword, wherever it is, beats a number after the direction
+            entry, entry_range = _to_number(price_after_direction)
+
+        if symbol is None and direction is not None:
+            # "XAUUSD BUY": take the closest word before the direction
+            for word in reversed(lowered[:direction_start].split()):
+                word = word.strip(":,.-").lstrip("#").replace("/", "").upper()
+                if len(word) >= 3 and word.isalnum() and word not in SYMBOL_STOPWORDS:
+                    symbol = word
+                    break
+
+        if not (direction and symbol and entry and stop_loss and take_profits):
+            return None
+        if not take_profits[0]:
+            return None
+
+        signal = ParsedSignal(
+            symbol=symbol,
+            direction=direction,
+            entry=entry,
+            stop_loss=stop_loss,
+            take_profits=take_profits,
+            entry_range=entry_range,
+            risk_percent=risk or 1.0,
+            timeframe=timeframe,
+            notes=notes,
+            format=signal_format.name if signal_format else None,
+            source=source,
+        )
+        if signal_format is not None and signal_format.finalize is not None:
+            return signal_format.finalize(signal)
+        return signal
+
+
+default_parser = SignalParser()
+
+
+def parse_signal(text: str, source: str = "telegram") -> Optional[ParsedSignal]:
+    """Parses a message with the default provider formats."""
+    return default_parser.parse(text, source)
@@ -0,0 +1,243 @@
+"""
+Verstige OS — Signal Ingestion Queue
+Durable local queue between the signal webhooks and their slow side effects.
+
+Webhooks append the update to a SQLite table (WAL mode) and answer straight
+away. A pool of asyncio workers then runs persistence, broadcast and replies
+with retries, so a slow Supabase or Telegram API never holds up the webhook
+and queued jobs survive a restart.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+QUEUE_PATH = os.getenv("SIGNAL_QUEUE_PATH", "./signal_queue.db")
+WORKERS = int(os.getenv("SIGNAL_QUEUE_WORKERS", "4"))
+MAX_ATTEMPTS = int(os.getenv("SIGNAL_QUEUE_MAX_ATTEMPTS", "5"))
+RETRY_BASE_DELAY = 1.0  # seconds, doubled per attempt
+RETRY_MAX_DELAY = 60.0
+POLL_INTERVAL = 1.0
+
+logger = logging.getLogger("SignalQueue")
+
+# Called with the job and a checkpoint that saves the job's progress
+JobHandler = Callable[[dict, Callable[[], None]], Awaitable[None]]
+FailedHandler = Callable[[dict, Exception], Awaitable[None]]
+
+
+class SignalQueue:
+    """
+    SQLite-backed job queue with an asyncio worker pool.
+
+    Jobs are JSON dicts. The handler may record progress in the job (e.g.
+    which steps already ran) and call the checkpoint it is given to save the
+    job at once. A retry, or a restart after a crash, then skips the steps
+    that succeeded. Jobs that still fail after `max_attempts` are kept with
+    status "failed" for inspection.
+
+    All SQLite access happens on the event loop thread; each statement is a
+    short local write, and claims never interleave across workers.
+    """
+
+    def __init__(self, path: str = QUEUE_PATH, max_attempts: int = MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.db: Optional[sqlite3.Connection] = None
+        self.handler: Optional[JobHandler] = None
+        self.on_failed: Optional[FailedHandler] = None
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def open(self):
+        if self.db is not None:
+            return
+
+        self.db = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only risks the last commits on power loss, not on a crash
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS signal_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_error TEXT
+            )
+            """)
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS ix_signal_jobs_ready "
+            "ON signal_jobs (status, next_attempt_at)"
+        )
+        # Jobs claimed before a crash or restart are picked up again
+        self.db.execute(
+            "UPDATE signal_jobs SET status = 'pending' WHERE status = 'processing'"
+        )
+
+    def enqueue(
+        self, job: dict, guard: Optional[Callable[[sqlite3.Connection], bool]] = None
+    ) -> Optional[int]:
+        """
+        Appends a job and wakes a worker.
+
+        Args:
+            job (dict): The job payload.
+            guard (Callable, optional): Called with the queue's connection
+                inside the insert's transaction, e.g. to record a dedupe key
+                atomically with the job. If it returns False, nothing is queued.
+
+        Returns:
+            Optional[int]: The job ID, or None if the guard refused the job.
+        """
+        self.open()
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            if guard is not None and not guard(self.db):
+                self.db.execute("ROLLBACK")
+                return None
+            cursor = self.db.execute(
+                "INSERT INTO signal_jobs (payload, next_attempt_at, created_at) VALUES (?, ?, ?)",
+                (json.dumps(job), now, now),
+            )
+            self.db.execute("COMMIT")
+        except BaseException:
+            if self.db.in_transaction:
+                self.db.execute("ROLLBACK")
+            raise
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return cursor.lastrowid
+
+    def pending_count(self) -> int:
+        self.open()
+        return self.db.execute(
+            "SELECT COUNT(*) FROM signal_jobs WHERE status IN ('pending', 'processing')"
+        ).fetchone()[0]
+
+    def start(
+        self,
+        handler: JobHandler,
+        on_failed: Optional[FailedHandler] = None,
+        workers: int = WORKERS,
+    ):
+        """Starts the worker pool on the running event loop."""
+        self.open()
+        self.handler = handler
+        self.on_failed = on_failed
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"signal-queue-{i}")
+            for i in range(workers)
+        ]
+        logger.info(
+            f"Signal queue started with {workers} workers, {self.pending_count()} pending"
+        )
+
+    async def stop(self):
+        """Stops the workers. Unfinished jobs stay queued for the next start."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        if self.db is not None:
+            self.db.execute(
+                "UPDATE signal_jobs SET status = 'pending' WHERE status = 'processing'"
+            )
+            self.db.close()
+            self.db = None
+
+    def _claim(self):
+        row = self.db.execute(
+            "SELECT id, payload, attempts FROM signal_jobs "
+            "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT 1",
+            (time.time(),),
+        ).fetchone()
+        if row is None:
+            return None
+
+        self.db.execute(
+            "UPDATE signal_jobs SET status = 'processing' WHERE id = ?", (row[0],)
+        )
+        return row[0], json.loads(row[1]), row[2]
+
+    def _next_wait(self) -> float:
+        row = self.db.execute(
+            "SELECT MIN(next_attempt_at) FROM signal_jobs WHERE status = 'pending'"
+        ).fetchone()
+        if row[0] is None:
+            return POLL_INTERVAL
+        return min(max(row[0] - time.time(), 0.0), POLL_INTERVAL)
+
+    async def _work(self):
+        while True:
+            claimed = self._claim()
+            if claimed is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self._next_wait()
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id, job, attempts = claimed
+            try:
+                await self.handler(job, lambda: self._checkpoint(job_id, job))
+            except asyncio.CancelledError:
+                self._retry(job_id, job, attempts, "cancelled", count=False)
+                raise
+            except Exception as e:
+                await self._fail(job_id, job, attempts + 1, e)
+            else:
+                self.db.execute("DELETE FROM signal_jobs WHERE id = ?", (job_id,))
+
+    def _checkpoint(self, job_id: int, job: dict):
+        self.db.execute(
+            "UPDATE signal_jobs SET payload = ? WHERE id = ?", (json.dumps(job), job_id)
+        )
+
+    def _retry(self, job_id: int, job: dict, attempts: int, error: str, count=True):
+        delay = 0.0
+        if count:
+            delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+        self.db.execute(
+            "UPDATE signal_jobs SET status = 'pending', payload = ?, attempts = ?, "
+            "next_attempt_at = ?, last_error = ? WHERE id = ?",
+            (json.dumps(job), attempts, time.time() + delay, error, job_id),
+        )
+
+    async def _fail(self, job_id: int, job: dict, attempts: int, error: Exception):
+        if attempts < self.max_attempts:
+            logger.warning(
+                f"Signal job {job_id} failed (attempt {attempts}), retrying: {error}"
+            )
+            self._retry(job_id, job, attempts, str(error))
+            return
+
+        logger.error(f"Signal job {job_id} failed after {attempts} attempts: {error}")
+        self.db.execute(
+            "UPDATE signal_jobs SET status = 'failed', payload = ?, attempts = ?, "
+            "last_error = ? WHERE id = ?",
+            (json.dumps(job), attempts, str(error), job_id),
+        )
+        if self.on_failed is not None:
+            try:
+                await self.on_failed(job, error)
+            except Exception as e:
+                logger.error(f"Signal job {job_id} failure callback raised: {e}")
+
+
+signal_queue = SignalQueue()
@@ -1,12 +1,11 @@
 
-import os, re, hmac, hashlib, uuid
+import os, hmac, hashlib, uuid
 from datetime import datetime, timezone
 from typing import Optional
 import httpx
 from fastapi import FastAPI, Request, HTTPException, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from supabase import create_client, Client
 from dotenv import load_dotenv
 
 
@@ -20,10 +19,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_KEY"), # Handling both possible names
-)
+try:
+    from backend.signal_parser import parse_signal
+    from backend.supabase_db import close_supabase, insert_signal
+except ImportError:  # Run from the backend directory (uvicorn signal_webhook:app)
+    from signal_parser import parse_signal
+    from supabase_db import close_supabase, insert_signal
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_supabase()
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET")
@@ -81,15 +86,14 @@ async def publish_signal(signal: SignalPayload) -> str:
         "created_at": now,
     }
     
-    result = supabase.table("signals").insert(record).execute()
-    if result.data:
+    if await insert_signal(record):
         return signal_id
     raise HTTPException(status_code=500, detail="Failed to write signal")
 
 # ── Telegram Parser ──────────────────────────────────────
 def parse_telegram_signal(text: str) -> Optional[SignalPayload]:
     """
-    Accepts messages in this format:
+    Accepts messages in this format (see signal_parser for provider variants):
       BUY XAUUSD
       Entry: 2345.50
       SL: 2330.00
@@ -98,35 +102,14 @@ def parse_telegram_signal(text: str) -> Optional[SignalPayload]:
       TF: H1
       Notes: Optional note
     """
-    text = text.strip()
-    direction = "BUY" if re.search(r"\bBUY\b", text, re.I) else None
-    if not direction:
-        direction = "SELL" if re.search(r"\bSELL\b", text, re.I) else None
-    if not direction: return None
-    
-    fallback = re.search(r"(?:BUY|SELL)\s+(\S+)", text, re.I)
-    symbol = fallback.group(1).upper() if fallback else None
-    if not symbol: return None
-    
-    def extract(pat): 
-        m = re.search(pat, text, re.I)
-        return float(m.group(1)) if m else None
-        
-    entry = extract(r"entry[:\s]+([0-9]+(?:\.[0-9]+)?)")
-    sl    = extract(r"sl[:\s]+([0-9]+(?:\.[0-9]+)?)")
-    tp    = extract(r"tp[:\s]+([0-9]+(?:\.[0-9]+)?)")
-    risk  = extract(r"risk[:\s]+([0-9]+(?:\.[0-9]+)?)%?") or 1.0
-    tf_m  = re.search(r"tf[:\s]+(M\d+|H\d+|D\d?|W\d?)", text, re.I)
-    notes_m = re.search(r"notes?[:\s]+(.+)", text, re.I)
-    
-    if not all([entry, sl, tp]): return None
-    
+    parsed = parse_signal(text.strip())
+    if not parsed: return None
+
     return SignalPayload(
-        symbol=symbol, direction=direction, entry=entry,
-        stop_loss=sl, take_profit=tp, risk_percent=risk,
-        timeframe=tf_m.group(1).upper() if tf_m else None,
-        notes=notes_m.group(1).strip() if notes_m else None,
-        source="telegram",
+        symbol=parsed.symbol, direction=parsed.direction, entry=parsed.entry,
+        stop_loss=parsed.stop_loss, take_profit=parsed.take_profit,
+        risk_percent=parsed.risk_percent, timeframe=parsed.timeframe,
+        notes=parsed.notes, source=parsed.source,
     )
 
 # ── Routes ───────────────────────────────────────────────
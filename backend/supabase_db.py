@@ -0,0 +1,259 @@
+"""
+Verstige OS — Supabase Data Access
+One async Supabase client, shared by the signal, account and execution paths.
+
+Queries go through a single pooled HTTP/2 httpx client, so they reuse warm
+connections and await instead of blocking the event loop. Import from here
+rather than calling create_client() in each module.
+"""
+
+import os
+import asyncio
+import logging
+from typing import Dict, List, Optional
+import httpx
+from supabase import AsyncClient, AsyncClientOptions, acreate_client
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
+
+SUPABASE_URL = os.getenv("SUPABASE_URL", "")
+SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_KEY", "")
+
+# Connection pool for the shared HTTP/2 client
+MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "10"))
+REQUEST_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "15"))
+
+logger = logging.getLogger("SupabaseDB")
+
+_client: Optional[AsyncClient] = None
+_client_lock = asyncio.Lock()
+# trading_platforms rows are static, so their IDs are looked up once
+_platform_ids: Dict[str, str] = {}
+
+
+async def get_supabase() -> AsyncClient:
+    """Returns the shared async Supabase client, creating it on first use."""
+    global _client
+    if _client is not None:
+        return _client
+
+    async with _client_lock:
+        if _client is None:
+            http_client = httpx.AsyncClient(
+                http2=True,
+                timeout=REQUEST_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                ),
+            )
+            _client = await acreate_client(
+                SUPABASE_URL,
+                SUPABASE_KEY,
+                options=AsyncClientOptions(httpx_client=http_client),
+            )
+            logger.info("Supabase async client initialized")
+    return _client
+
+
+async def close_supabase():
+    """Closes the shared client's connections. Call on application shutdown."""
+    global _client
+    if _client is None:
+        return
+
+    client, _client = _client, None
+    await client.options.httpx_client.aclose()
+
+
+# ── Auth ─────────────────────────────────────────────────
+async def get_user_id(token: str) -> Optional[str]:
+    """Resolves a Supabase session token to its user ID, or None if invalid."""
+    client = await get_supabase()
+    user_resp = await client.auth.get_user(token)
+    user = getattr(user_resp, "user", None)
+    return user.id if user else None
+
+
+# ── Platforms ────────────────────────────────────────────
+async def get_platform_id(code: str, create: Optional[dict] = None) -> Optional[str]:
+    """
+    Returns the trading_platforms ID for a platform code.
+
+    If the row is missing and `create` is given, it is inserted with those
+    columns (plus the code).
+    """
+    if code in _platform_ids:
+        return _platform_ids[code]
+
+    client = await get_supabase()
+    result = (
+        await client.table("trading_platforms").select("id").eq("code", code).execute()
+    )
+    if not result.data and create is not None:
+        result = (
+            await client.table("trading_platforms")
+            .insert({**create, "code": code})
+            .execute()
+        )
+    if not result.data:
+        return None
+
+    _platform_ids[code] = result.data[0]["id"]
+    return _platform_ids[code]
+
+
+# ── Trading accounts ─────────────────────────────────────
+async def get_trading_accounts(
+    user_id: str,
+    provider: Optional[str] = None,
+    platform_id: Optional[str] = None,
+    active_only: bool = False,
+    columns: str = "*",
+) -> List[dict]:
+    """Returns a user's trading_accounts rows, optionally filtered."""
+    client = await get_supabase()
+    query = client.table("trading_accounts").select(columns).eq("user_id", user_id)
+    if provider is not None:
+        query = query.eq("provider", provider)
+    if platform_id is not None:
+        query = query.eq("platform_id", platform_id)
+    if active_only:
+        query = query.eq("is_active", True)
+    result = await query.execute()
+    return result.data or []
+
+
+async def save_trading_account(user_id: str, provider: str, payload: dict):
+    """Updates the user's account for a provider, or inserts it if missing."""
+    client = await get_supabase()
+    existing = await get_trading_accounts(user_id, provider=provider, columns="id")
+    if existing:
+        await (
+            client.table("trading_accounts")
+            .update(payload)
+            .eq("id", existing[0]["id"])
+            .execute()
+        )
+    else:
+        await client.table("trading_accounts").insert(payload).execute()
+
+
+def _match_provider(query, provider: str, platform_id: Optional[str]):
+    # Older rows may carry only one of provider / platform_id
+    if platform_id is None:
+        return query.eq("provider", provider)
+    return query.or_(f"provider.eq.{provider},platform_id.eq.{platform_id}")
+
+
+async def get_provider_accounts(
+    user_id: str, provider: str, platform_id: Optional[str] = None
+) -> List[dict]:
+    """
+    Returns a user's accounts for a provider in one query, matching either
+    the provider or the platform_id column. Active accounts come first.
+    """
+    client = await get_supabase()
+    query = client.table("trading_accounts").select("*").eq("user_id", user_id)
+    query = _match_provider(query, provider, platform_id)
+    result = await query.order("is_active", desc=True, nullsfirst=False).execute()
+    return result.data or []
+
+
+async def deactivate_trading_accounts(
+    user_id: str, provider: str, platform_id: Optional[str] = None
+):
+    """Marks a user's accounts for a provider inactive."""
+    client = await get_supabase()
+    query = (
+        client.table("trading_accounts")
+        .update({"is_active": False})
+        .eq("user_id", user_id)
+    )
+    await _match_provider(query, provider, platform_id).execute()
+
+
+async def get_auto_execute_accounts(platform_id: str) -> List[dict]:
+    """Returns every active account on a platform that opted in to auto-execution."""
+    client = await get_supabase()
+    result = await (
+        client.table("trading_accounts")
+        .select("*")
+        .eq("platform_id", platform_id)
+        .eq("is_active", True)
+        .eq("auto_execute", True)
+        .execute()
+    )
+    return result.data or []
+
+
+async def set_auto_execute(user_id: str, platform_id: str, enabled: bool) -> List[dict]:
+    """Opts a user's accounts on a platform in or out of auto-execution."""
+    client = await get_supabase()
+    result = await (
+        client.table("trading_accounts")
+        .update({"auto_execute": enabled})
+        .eq("user_id", user_id)
+        .eq("platform_id", platform_id)
+        .execute()
+    )
+    return result.data or []
+
+
+# ── Signals ──────────────────────────────────────────────
+async def insert_signal(record: dict, upsert: bool = False) -> List[dict]:
+    """
+    Inserts a signals row and returns the inserted rows. With upsert, a row
+    with the same ID is overwritten, which makes retried writes idempotent.
+    """
+    client = await get_supabase()
+    table = client.table("signals")
+    query = table.upsert(record) if upsert else table.insert(record)
+    result = await query.execute()
+    return result.data or []
+
+
+async def get_signal(signal_id: str) -> Optional[dict]:
+    """Returns a signals row by ID, or None if it does not exist."""
+    client = await get_supabase()
+    result = (
+        await client.table("signals").select("*").eq("id", signal_id).limit(1).execute()
+    )
+    return result.data[0] if result.data else None
+
+
+async def update_signal_status(signal_id: str, status: str):
+    """Sets a signal's status, e.g. "executed" or "rejected"."""
+    client = await get_supabase()
+    await (
+        client.table("signals")
+        .update({"status": status})
+        .eq("id", str(signal_id))
+        .execute()
+    )
+
+
+async def update_signal_statuses(signal_ids: List[str], status: str):
+    """Sets the same status on several signals in one request."""
+    client = await get_supabase()
+    await (
+        client.table("signals")
+        .update({"status": status})
+        .in_("id", [str(signal_id) for signal_id in signal_ids])
+        .execute()
+    )
+
+
+# ── Executions ───────────────────────────────────────────
+async def insert_trade_execution(record: dict):
+    """Logs a trade_executions row."""
+    client = await get_supabase()
+    await client.table("trade_executions").insert(record).execute()
+
+
+async def insert_trade_executions(records: List[dict]):
+    """Logs several trade_executions rows in one request."""
+    client = await get_supabase()
+    await client.table("trade_executions").insert(records).execute()
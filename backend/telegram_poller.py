@@ -1,11 +1,19 @@
 import asyncio
 import os
+import json
+import time
+import sqlite3
 import httpx
 import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Set
 from dotenv import load_dotenv
 
-# Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+try:
+    from backend.signal_queue import QUEUE_PATH
+except ImportError:  # Run from the backend directory
+    from signal_queue import QUEUE_PATH
+
 logger = logging.getLogger("TelegramPoller")
 
 # Load environment variables
@@ -14,77 +22,202 @@ load_dotenv()
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 LOCAL_WEBHOOK_URL = "http://127.0.0.1:8001/api/telegram/webhook"
 
-if not TELEGRAM_BOT_TOKEN:
-    logger.error("Error: TELEGRAM_BOT_TOKEN not found in .env")
-    exit(1)
+BATCH_SIZE = 100  # getUpdates maximum
+POLL_TIMEOUT = 30  # seconds Telegram holds the long poll open
+RETRY_DELAY = 5
+MAX_ATTEMPTS = int(os.getenv("TELEGRAM_UPDATE_MAX_ATTEMPTS", "5"))
 
-async def delete_webhook(client):
-    """Delete any existing webhook to enable polling"""
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/deleteWebhook"
-    try:
-        resp = await client.get(url)
-        if resp.status_code == 200 and resp.json().get("ok"):
-            logger.info("Webhook deleted successfully. Polling enabled.")
-        else:
-            logger.error(f"Failed to delete webhook: {resp.text}")
-    except Exception as e:
-        logger.error(f"Error deleting webhook: {e}")
+UpdateHandler = Callable[[dict], Awaitable[None]]
 
-async def poll_updates():
-    offset = 0
-    async with httpx.AsyncClient() as client:
-        # First, ensure webhook is deleted
-        await delete_webhook(client)
-        
-        logger.info(f"Starting Telegram Long Polling | Forwarding to {LOCAL_WEBHOOK_URL}")
-        logger.info("Send a signal message to your bot now (e.g., 'BUY XAUUSD Entry: 2000 SL: 1990 TP: 2020')")
 
-        while True:
-            try:
-                # Poll Telegram
-                poll_url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/getUpdates?offset={offset}&timeout=30"
-                resp = await client.get(poll_url, timeout=40)
-                
-                if resp.status_code != 200:
-                    logger.error(f"Telegram API Error: {resp.status_code} - {resp.text}")
-                    await asyncio.sleep(5)
-                    continue
+def _chat_id(update: dict):
+    message = update.get("message") or update.get("channel_post") or {}
+    return (message.get("chat") or {}).get("id")
+
+
+class TelegramPoller:
+    """
+    Batched getUpdates long-poll loop.
+
+    Each call fetches up to 100 updates. Updates from different chats are
+    handled concurrently, while each chat's updates run in order. When an
+    update fails, the rest of its chat waits and the offset stops just before
+    it, so it is fetched again after RETRY_DELAY. Updates already handled are
+    skipped when re-fetched. After MAX_ATTEMPTS failures the update is
+    logged, stored in the dead_telegram_updates table and skipped, so one
+    bad update cannot stall ingestion. Handlers are expected to be idempotent
+    (the ingestion path dedupes on chat + message ID, and only records an
+    update once it is queued, so retried updates are not dropped).
 
-                data = resp.json()
-                if not data.get("ok"):
-                    logger.error(f"Telegram Response Not OK: {data}")
-                    await asyncio.sleep(5)
+    start() runs the loop as a task on the caller's event loop; in main that
+    is the app's loop, shared with the request handlers.
+    """
+
+    def __init__(self, handler: UpdateHandler, token: Optional[str] = TELEGRAM_BOT_TOKEN,
+                 dead_letter_path: str = QUEUE_PATH, max_attempts: int = MAX_ATTEMPTS):
+        self.handler = handler
+        self.token = token
+        self.dead_letter_path = dead_letter_path
+        self.max_attempts = max_attempts
+        self.offset = 0
+        # Failures per update_id, and updates handled at or past the offset
+        self._attempts: Dict[int, int] = {}
+        self._handled: Set[int] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def delete_webhook(self, client: httpx.AsyncClient):
+        """Delete any existing webhook to enable polling"""
+        url = f"https://api.telegram.org/bot{self.token}/deleteWebhook"
+        try:
+            resp = await client.get(url)
+            if resp.status_code == 200 and resp.json().get("ok"):
+                logger.info("Webhook deleted successfully. Polling enabled.")
+            else:
+                logger.error(f"Failed to delete webhook: {resp.text}")
+        except Exception as e:
+            logger.error(f"Error deleting webhook: {e}")
+
+    async def fetch(self, client: httpx.AsyncClient) -> List[dict]:
+        resp = await client.get(
+            f"https://api.telegram.org/bot{self.token}/getUpdates",
+            params={"offset": self.offset, "limit": BATCH_SIZE, "timeout": POLL_TIMEOUT},
+            timeout=POLL_TIMEOUT + 10,
+        )
+        if resp.status_code != 200:
+            raise RuntimeError(f"Telegram API Error: {resp.status_code} - {resp.text}")
+
+        data = resp.json()
+        if not data.get("ok"):
+            raise RuntimeError(f"Telegram Response Not OK: {data}")
+        return data.get("result", [])
+
+    async def process_batch(self, updates: List[dict]) -> int:
+        """
+        Runs the handler over a batch: chats concurrently, each chat in order.
+
+        Returns:
+            int: The offset to acknowledge, i.e. the first update to retry, or
+            past the batch if every update was handled or given up on.
+        """
+        by_chat: Dict[object, List[dict]] = OrderedDict()
+        for update in updates:
+            by_chat.setdefault(_chat_id(update), []).append(update)
+
+        retry: List[int] = []
+
+        async def run_chat(chat_updates: List[dict]):
+            for update in chat_updates:
+                update_id = update["update_id"]
+                if update_id in self._handled:
                     continue
+                try:
+                    await self.handler(update)
+                except Exception as e:
+                    if not self._give_up(update, e):
+                        retry.append(update_id)
+                        return  # The chat's later updates wait for this one
+                self._handled.add(update_id)
+
+        await asyncio.gather(*(run_chat(chat_updates) for chat_updates in by_chat.values()))
+
+        offset = min(retry) if retry else updates[-1]["update_id"] + 1
+        self._handled = {i for i in self._handled if i >= offset}
+        self._attempts = {i: n for i, n in self._attempts.items() if i >= offset}
+        return offset
+
+    def _give_up(self, update: dict, error: Exception) -> bool:
+        """Counts a failed update. Returns True once it was dead-lettered."""
+        update_id = update["update_id"]
+        attempts = self._attempts.get(update_id, 0) + 1
+        self._attempts[update_id] = attempts
+        if attempts < self.max_attempts:
+            logger.warning(f"Update {update_id} failed (attempt {attempts}), retrying: {error}")
+            return False
+
+        payload = json.dumps(update)
+        logger.error(f"Skipping update {update_id} after {attempts} attempts: {error}; {payload}")
+        try:
+            db = sqlite3.connect(self.dead_letter_path)
+            try:
+                with db:
+                    db.execute(
+                        "CREATE TABLE IF NOT EXISTS dead_telegram_updates ("
+                        "update_id INTEGER PRIMARY KEY, payload TEXT NOT NULL, "
+                        "error TEXT, failed_at REAL NOT NULL)"
+                    )
+                    db.execute(
+                        "INSERT OR REPLACE INTO dead_telegram_updates "
+                        "(update_id, payload, error, failed_at) VALUES (?, ?, ?, ?)",
+                        (update_id, payload, str(error), time.time()),
+                    )
+            finally:
+                db.close()
+        except sqlite3.Error as e:
+            logger.error(f"Could not store dead update {update_id}: {e}")
+        return True
+
+    async def run(self):
+        async with httpx.AsyncClient() as client:
+            # First, ensure webhook is deleted
+            await self.delete_webhook(client)
+            logger.info("Starting Telegram Long Polling")
+
+            while True:
+                try:
+                    updates = await self.fetch(client)
+                    if not updates:
+                        continue
+
+                    # Acknowledge up to the first update that has to be retried
+                    offset = await self.process_batch(updates)
+                    if offset != self.offset:
+                        logger.info(f"Processed updates up to offset={offset}")
+                    self.offset = offset
+                    if offset <= updates[-1]["update_id"]:
+                        await asyncio.sleep(RETRY_DELAY)
+
+                except asyncio.CancelledError:
+                    raise
+                except httpx.ReadTimeout:
+                    continue  # Normal timeout for long polling
+                except Exception as e:
+                    logger.error(f"Polling loop error: {e}")
+                    await asyncio.sleep(RETRY_DELAY)
+
+    def start(self):
+        """Runs the poller as a task on the current event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(), name="telegram-poller")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+async def poll_updates():
+    """Standalone mode: forward each update to the local webhook."""
+    headers = {"X-Telegram-Bot-Api-Secret-Token": os.getenv("TELEGRAM_WEBHOOK_SECRET", "")}
+
+    async with httpx.AsyncClient() as forward_client:
+
+        async def forward(update: dict):
+            local_resp = await forward_client.post(LOCAL_WEBHOOK_URL, json=update, headers=headers)
+            local_resp.raise_for_status()
+            logger.info(f"Forwarded Update {update.get('update_id')} -> Success")
+
+        logger.info(f"Forwarding updates to {LOCAL_WEBHOOK_URL}")
+        logger.info("Send a signal message to your bot now (e.g., 'BUY XAUUSD Entry: 2000 SL: 1990 TP: 2020')")
+        await TelegramPoller(forward).run()
 
-                updates = data.get("result", [])
-                
-                for update in updates:
-                    update_id = update.get("update_id")
-                    offset = update_id + 1  # Acknowledge logic
-                    
-                    # Forward to local webhook
-                    try:
-                        # Include secret header if backend expects it
-                        headers = {"X-Telegram-Bot-Api-Secret-Token": os.getenv("TELEGRAM_WEBHOOK_SECRET", "")}
-                        
-                        # We send the whole update object as the webhook payload
-                        local_resp = await client.post(LOCAL_WEBHOOK_URL, json=update, headers=headers)
-                        
-                        if local_resp.status_code == 200:
-                            logger.info(f"Forwarded Update {update_id} -> Success")
-                        else:
-                            logger.warning(f"Forwarded Update {update_id} -> Local Error: {local_resp.status_code} {local_resp.text}")
-                            
-                    except Exception as e:
-                        logger.error(f"Failed to forward update {update_id}: {e}")
-
-            except httpx.ReadTimeout:
-                continue # Normal timeout for long polling
-            except Exception as e:
-                logger.error(f"Polling loop error: {e}")
-                await asyncio.sleep(5)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if not TELEGRAM_BOT_TOKEN:
+        logger.error("Error: TELEGRAM_BOT_TOKEN not found in .env")
+        exit(1)
+
     try:
         asyncio.run(poll_updates())
     except KeyboardInterrupt:
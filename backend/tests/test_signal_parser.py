@@ -0,0 +1,186 @@
+"""
+Tests for backend.signal_parser.
+
+Every provider layout in CORPUS must parse to its expected fields, and the
+original layout must parse exactly as the legacy regex-per-field parser did.
+The benchmark in backend/benchmarks times the same corpus.
+
+Run from the project root:
+    python -m pytest backend/tests
+"""
+
+import os
+import re
+import sys
+
+# Add the project root to sys.path so we can import backend modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.signal_parser import ENTRY, SignalFormat, SignalParser, parse_signal, TP
+
+# (message, expected fields or None if the message must be rejected)
+CORPUS = [
+    (
+        "BUY XAUUSD\nEntry: 2345.50\nSL: 2330.00\nTP: 2375.00\n"
+        "Risk: 1%\nTF: H1\nNotes: Optional note",
+        dict(
+            symbol="XAUUSD",
+            direction="BUY",
+            entry=2345.5,
+            stop_loss=2330.0,
+            take_profits=[2375.0],
+            risk_percent=1.0,
+            timeframe="H1",
+            notes="Optional note",
+        ),
+    ),
+    (
+        "sell eurusd\nentry 1.0850\nsl 1.0900\ntp 1.0750",
+        dict(
+            symbol="EURUSD",
+            direction="SELL",
+            entry=1.085,
+            stop_loss=1.09,
+            take_profits=[1.075],
+        ),
+    ),
+    (
+        "🔴 SELL GBPJPY @ 191.20\n🛑 SL 191.80\n🎯 TP1 190.50\n🎯 TP2 189.90\n🎯 TP3 189.00",
+        dict(
+            symbol="GBPJPY",
+            direction="SELL",
+            entry=191.2,
+            stop_loss=191.8,
+            take_profits=[190.5, 189.9, 189.0],
+        ),
+    ),
+    (
+        "XAUUSD BUY NOW 2345-2350\nSL: 2330\nTP: 2360 / 2375 / 2390\nRisk: 0.5%",
+        dict(
+            symbol="XAUUSD",
+            direction="BUY",
+            entry=2347.5,
+            entry_range=(2345.0, 2350.0),
+            stop_loss=2330.0,
+            take_profits=[2360.0, 2375.0, 2390.0],
+            risk_percent=0.5,
+        ),
+    ),
+    (
+        "#US30 LONG\nEntry Zone: 38950 - 39000\nStop Loss: 38800\n"
+        "Take Profit 1: 39200\nTake Profit 2: 39400\nTimeframe: M15",
+        dict(
+            symbol="US30",
+            direction="BUY",
+            entry=38975.0,
+            stop_loss=38800.0,
+            take_profits=[39200.0, 39400.0],
+            timeframe="M15",
+        ),
+    ),
+    (
+        "SELL LIMIT XAU/USD\nPrice: 2360\nStop: 2372\nTarget: 2340\nGood luck 100 pips",
+        dict(
+            symbol="XAUUSD",
+            direction="SELL",
+            entry=2360.0,
+            stop_loss=2372.0,
+            take_profits=[2340.0],
+        ),
+    ),
+    ("Market update: gold is ranging today", None),
+    ("BUY XAUUSD\nEntry: 2345.50\nTP: 2375.00", None),
+]
+
+
+def legacy_parse(text: str):
+    text = text.strip()
+    direction = "BUY" if re.search(r"\bBUY\b", text, re.I) else None
+    if not direction:
+        direction = "SELL" if re.search(r"\bSELL\b", text, re.I) else None
+    if not direction:
+        return None
+
+    m = re.search(r"(?:BUY|SELL)\s+(\S+)", text, re.I)
+    symbol = m.group(1).upper() if m else None
+    if not symbol:
+        return None
+
+    def _extract(pat):
+        m = re.search(pat, text, re.I)
+        return float(m.group(1)) if m else None
+
+    entry = _extract(r"entry[:\s]+([0-9]+(?:\.[0-9]+)?)")
+    sl = _extract(r"sl[:\s]+([0-9]+(?:\.[0-9]+)?)")
+    tp = _extract(r"tp[:\s]+([0-9]+(?:\.[0-9]+)?)")
+    risk = _extract(r"risk[:\s]+([0-9]+(?:\.[0-9]+)?)%?") or 1.0
+    tf_m = re.search(r"tf[:\s]+(M\d+|H\d+|D\d?|W\d?)", text, re.I)
+    notes_m = re.search(r"notes?[:\s]+(.+)", text, re.I)
+
+    if not all([entry, sl, tp]):
+        return None
+
+    return {
+        "symbol": symbol,
+        "direction": direction,
+        "entry": entry,
+        "stop_loss": sl,
+        "take_profit": tp,
+        "risk_percent": risk,
+        "timeframe": tf_m.group(1).upper() if tf_m else None,
+        "notes": notes_m.group(1).strip() if notes_m else None,
+        "source": "telegram",
+    }
+
+
+def test_corpus():
+    for text, expected in CORPUS:
+        signal = parse_signal(text)
+        if expected is None:
+            assert signal is None, f"expected no signal for {text!r}, got {signal}"
+            continue
+
+        assert signal is not None, f"failed to parse {text!r}"
+        for name, value in expected.items():
+            actual = getattr(signal, name)
+            assert actual == value, f"{name}: {actual!r} != {value!r} in {text!r}"
+
+
+def test_matches_legacy_parser():
+    # The original layout must parse exactly as before
+    text = CORPUS[0][0]
+    legacy = legacy_parse(text)
+    current = parse_signal(text).to_dict()
+    assert {k: current[k] for k in legacy} == legacy
+
+
+def test_keyword_inside_word_is_ignored():
+    signal = parse_signal("Isle of gold: BUY XAUUSD\nEntry 2345\nSL 2330\nTP 2375")
+    assert signal.symbol == "XAUUSD" and signal.stop_loss == 2330.0
+
+
+def test_registered_format():
+    # Provider formats plug in without touching the parser
+    parser = SignalParser()
+    parser.register_format(SignalFormat(name="objetivo", aliases={"objetivo": TP}))
+    signal = parser.parse("BUY XAUUSD @ 2345\nSL 2330\nObjetivo 2375")
+    assert signal.take_profits == [2375.0] and signal.format == "standard"
+
+
+def test_longer_keyword_of_another_field_wins():
+    # "buy zone" (entry) starts with "buy" (direction) and must win over it
+    parser = SignalParser()
+    parser.register_format(SignalFormat(name="zones", aliases={"buy zone": ENTRY}))
+    signal = parser.parse("XAUUSD BUY\nBuy zone: 2345-2350\nSL 2330\nTP 2375")
+    assert signal.entry_range == (2345.0, 2350.0) and signal.format == "zones"
+
+
+def test_entry_keyword_beats_number_after_direction():
+    # "0.5" is the lot size, not the entry
+    signal = parse_signal("BUY XAUUSD 0.5 lots\nEntry: 2345\nSL: 2330\nTP: 2375")
+    assert signal.entry == 2345.0 and signal.entry_range is None
+
+
+def test_take_profit_ignores_unseparated_numbers():
+    signal = parse_signal("BUY XAUUSD @ 2345\nSL 2330\nTP 2375 50 pips")
+    assert signal.take_profits == [2375.0]
@@ -4,18 +4,21 @@ Verstige OS — TradeLocker Execution Service
 Authenticates, sizes position, and places trades on behalf of users.
 """
 
-import os, json, httpx
+import os, json, time, asyncio, httpx
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from cryptography.fernet import Fernet
-from supabase import create_client, Client
 from dotenv import load_dotenv
 
 load_dotenv()
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_KEY"),
-)
+try:
+    from backend.supabase_db import get_signal
+    from backend.write_behind import write_behind
+    from backend.account_repository import accounts
+except ImportError:  # Run from the backend directory
+    from supabase_db import get_signal
+    from write_behind import write_behind
+    from account_repository import accounts
 
 encryption_key = os.getenv("CREDENTIAL_ENCRYPTION_KEY")
 if not encryption_key:
@@ -27,6 +30,32 @@ fernet = Fernet(encryption_key.encode())
 TRADELOCKER_BASE = "https://demo.tradelocker.com/backend-api"
 # For live accounts swap to: https://live.tradelocker.com/backend-api
 
+# Logged-in sessions (token, accNum, resolved instruments) are reused for this long
+SESSION_TTL = float(os.getenv("TRADELOCKER_SESSION_TTL", "300"))
+MAX_CONNECTIONS = int(os.getenv("TRADELOCKER_MAX_CONNECTIONS", "50"))
+
+# One pooled client, so every order reuses warm TLS connections to TradeLocker
+_http: Optional[httpx.AsyncClient] = None
+_sessions: Dict[Tuple[str, str, str], dict] = {}
+_session_locks: Dict[Tuple[str, str, str], asyncio.Lock] = {}
+
+def _client() -> httpx.AsyncClient:
+    global _http
+    if _http is None:
+        _http = httpx.AsyncClient(
+            timeout=15,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                max_keepalive_connections=MAX_CONNECTIONS),
+        )
+    return _http
+
+async def close_http():
+    """Closes the pooled TradeLocker client. Call on application shutdown."""
+    global _http
+    if _http is not None:
+        client, _http = _http, None
+        await client.aclose()
+
 def decrypt(value: str) -> str:
     try:
         return fernet.decrypt(value.encode()).decode()
@@ -36,44 +65,22 @@ def decrypt(value: str) -> str:
 
 async def get_user_credentials(user_id: str) -> dict:
     print(f"DEBUG EXEC: Fetching credentials for user_id={user_id}")
-    # Step 1: Get TradeLocker platform ID
+    # Cached lookup across the local and Supabase account stores
     try:
-        platform_resp = (
-            supabase.table("trading_platforms")
-            .select("id")
-            .eq("code", "tradelocker")
-            .execute()
-        )
-        if not platform_resp.data:
-            raise ValueError("TradeLocker platform not found in database")
-        
-        platform_id = platform_resp.data[0]["id"]
-        print(f"DEBUG EXEC: Found TradeLocker platform_id={platform_id}")
-
-        # Step 2: Get Trading Account using platform_id (No JOIN)
-        response = (
-            supabase.table("trading_accounts")
-            .select("*")
-            .eq("user_id", user_id)
-            .eq("platform_id", platform_id)
-            .eq("is_active", True)
-            .execute()
-        )
-        print(f"DEBUG EXEC: Database response count: {len(response.data) if response.data else 0}")
+        row = await accounts.get_active_account(user_id, "tradelocker")
     except Exception as e:
         print(f"DEBUG EXEC: Database query failed: {e}")
         raise e
     
-    if not response.data:
+    if not row or row.get("is_active") is False:
         print(f"DEBUG EXEC: No active TradeLocker account found for {user_id}")
         raise ValueError(f"No active TradeLocker account for user {user_id}")
         
-    # Use the first active account found
-    row = response.data[0]
-    # Add server fallback if needed since we aren't joining anymore
-    # The 'server' field should exist on the trading_account row itself based on previous schema work
-    print(f"DEBUG EXEC: Found account row: {row.get('id')} - {row.get('account_number')}")
-    
+    print(f"DEBUG EXEC: Found account row: {row.get('id')} - {row.get('account_number') or row.get('account_id')}")
+    return parse_account_credentials(row)
+
+def parse_account_credentials(row: dict) -> dict:
+    """Extracts login credentials from a trading_accounts row."""
     # Parse credentials
     # main.py currently saves them as JSON string in 'encrypted_credentials'
     creds_str = row.get("encrypted_credentials", "{}")
@@ -102,39 +109,36 @@ async def get_user_credentials(user_id: str) -> dict:
     }
 
 async def get_tradelocker_token(email, password, server) -> dict:
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"{TRADELOCKER_BASE}/auth/jwt/token",
-            json={"email": email, "password": password, "server": server},
-            timeout=10,
-        )
-        resp.raise_for_status()
-        data = resp.json()
+    resp = await _client().post(
+        f"{TRADELOCKER_BASE}/auth/jwt/token",
+        json={"email": email, "password": password, "server": server},
+        timeout=10,
+    )
+    resp.raise_for_status()
+    data = resp.json()
     if "accessToken" not in data:
         raise ValueError(f"Auth failed: {data}")
     return {"access_token": data["accessToken"], "refresh_token": data.get("refreshToken")}
 
 async def get_account_details(access_token, account_id) -> dict:
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{TRADELOCKER_BASE}/auth/jwt/all-accounts",
-            headers={"Authorization": f"Bearer {access_token}"},
-        )
-        resp.raise_for_status()
-        accounts = resp.json().get("accounts", [])
+    resp = await _client().get(
+        f"{TRADELOCKER_BASE}/auth/jwt/all-accounts",
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    resp.raise_for_status()
+    accounts = resp.json().get("accounts", [])
     for acc in accounts:
         if str(acc.get("id")) == str(account_id):
             return acc
     raise ValueError(f"Account {account_id} not found")
 
 async def get_instrument_id(access_token, acc_num, symbol) -> str:
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{TRADELOCKER_BASE}/trade/instruments",
-            headers={"Authorization": f"Bearer {access_token}", "accNum": str(acc_num)},
-        )
-        resp.raise_for_status()
-        data = resp.json()
+    resp = await _client().get(
+        f"{TRADELOCKER_BASE}/trade/instruments",
+        headers={"Authorization": f"Bearer {access_token}", "accNum": str(acc_num)},
+    )
+    resp.raise_for_status()
+    data = resp.json()
     instruments = data.get("d", {}).get("instruments", [])
     for inst in instruments:
         if isinstance(inst, dict):
@@ -158,15 +162,56 @@ async def place_order(access_token, acc_num, instrument_id,
         "validity": "GTC",
     }
     if order_type == "limit": payload["price"] = entry
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"{TRADELOCKER_BASE}/trade/orders",
-            headers={"Authorization": f"Bearer {access_token}",
-                     "accNum": str(acc_num), "Content-Type": "application/json"},
-            json=payload, timeout=15,
-        )
-        resp.raise_for_status()
-        return resp.json()
+    resp = await _client().post(
+        f"{TRADELOCKER_BASE}/trade/orders",
+        headers={"Authorization": f"Bearer {access_token}",
+                 "accNum": str(acc_num), "Content-Type": "application/json"},
+        json=payload, timeout=15,
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+def _session_key(creds: dict) -> Tuple[str, str, str]:
+    return (creds["email"], creds["server"], str(creds["account_id"]))
+
+async def get_session(creds: dict) -> dict:
+    """
+    Returns a logged-in session for the account: access token, accNum and a
+    cache of resolved instrument IDs. Sessions are shared between swipes and
+    auto-execution and renewed after SESSION_TTL. The balance is not cached;
+    each order reads it fresh.
+    """
+    key = _session_key(creds)
+    session = _sessions.get(key)
+    if session and session["expires_at"] > time.time():
+        return session
+
+    # Concurrent orders for the same account log in once
+    async with _session_locks.setdefault(key, asyncio.Lock()):
+        session = _sessions.get(key)
+        if session and session["expires_at"] > time.time():
+            return session
+
+        tokens = await get_tradelocker_token(creds["email"], creds["password"], creds["server"])
+        account = await get_account_details(tokens["access_token"], creds["account_id"])
+        session = {
+            "access_token": tokens["access_token"],
+            "acc_num": account.get("accNum") or account.get("id"),
+            "instruments": {},
+            "expires_at": time.time() + SESSION_TTL,
+        }
+        _sessions[key] = session
+        return session
+
+def drop_session(creds: dict):
+    _sessions.pop(_session_key(creds), None)
+
+async def resolve_instrument(session: dict, symbol: str) -> str:
+    symbol = symbol.upper()
+    if symbol not in session["instruments"]:
+        session["instruments"][symbol] = await get_instrument_id(
+            session["access_token"], session["acc_num"], symbol)
+    return session["instruments"][symbol]
 
 def calculate_lot_size(balance, risk_percent, entry, stop_loss,
                        lot_step=0.01) -> float:
@@ -179,34 +224,37 @@ def calculate_lot_size(balance, risk_percent, entry, stop_loss,
     lots = round(round(raw_lots / lot_step) * lot_step, 2)
     return max(0.01, min(lots, 100.0))
 
-async def execute_signal_for_user(user_id: str, signal_id: str) -> dict:
-    # 1. Fetch signal
-    sig_result = supabase.table("signals").select("*").eq("id", signal_id).single().execute()
-    sig = sig_result.data
-    if not sig: raise ValueError(f"Signal {signal_id} not found")
-    
-    # 2. Get credentials
-    creds = await get_user_credentials(user_id)
-    
-    # 3. Authenticate
-    tokens = await get_tradelocker_token(creds["email"], creds["password"], creds["server"])
-    access_token = tokens["access_token"]
-    
-    # 4. Get account details
-    account = await get_account_details(access_token, creds["account_id"])
-    acc_num = account.get("accNum") or account.get("id")
-    balance = float(account.get("balance", 10000))
-    
-    # 5. Resolve instrument
-    instrument_id = await get_instrument_id(access_token, acc_num, sig["symbol"])
+async def execute_signal_with_credentials(user_id: str, sig: dict, creds: dict) -> dict:
+    """
+    Sizes and places a signals row on one account and logs the execution.
+    Does not change the signal's status.
+    """
+    try:
+        return await _execute(user_id, sig, creds, await get_session(creds))
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 401:
+            raise
+        # Token expired before the session did: log in again once
+        drop_session(creds)
+        return await _execute(user_id, sig, creds, await get_session(creds))
+
+async def _execute(user_id: str, sig: dict, creds: dict, session: dict) -> dict:
+    access_token, acc_num = session["access_token"], session["acc_num"]
+
+    # 1. Resolve instrument and read the current balance
+    instrument_id, account = await asyncio.gather(
+        resolve_instrument(session, sig["symbol"]),
+        get_account_details(access_token, creds["account_id"]),
+    )
     
-    # 6. Size position
+    # 2. Size position
     lot_size = calculate_lot_size(
-        balance=balance, risk_percent=sig.get("risk_percent", 1.0),
+        balance=float(account.get("balance", 10000)),
+        risk_percent=sig.get("risk_percent", 1.0),
         entry=sig["entry"], stop_loss=sig["stop_loss"],
     )
     
-    # 7. Place order
+    # 3. Place order
     order_result = await place_order(
         access_token=access_token, acc_num=acc_num,
         instrument_id=instrument_id, direction=sig["direction"],
@@ -214,9 +262,9 @@ async def execute_signal_for_user(user_id: str, signal_id: str) -> dict:
         stop_loss=sig["stop_loss"], take_profit=sig["take_profit"],
     )
     
-    # 8. Log to Supabase
-    supabase.table("trade_executions").insert({
-        "user_id": user_id, "signal_id": signal_id,
+    # 4. Log to Supabase (batched with other executions)
+    write_behind.add_execution({
+        "user_id": user_id, "signal_id": str(sig["id"]),
         "broker": "tradelocker", "account_id": str(creds["account_id"]),
         "symbol": sig["symbol"], "direction": sig["direction"],
         "lot_size": lot_size, "entry": sig["entry"],
@@ -225,10 +273,7 @@ async def execute_signal_for_user(user_id: str, signal_id: str) -> dict:
         "status": "executed",
         "executed_at": datetime.now(timezone.utc).isoformat(),
         "raw_response": order_result,
-    }).execute()
-    
-    # 9. Update signal status
-    supabase.table("signals").update({"status": "executed"}).eq("id", signal_id).execute()
+    })
     
     return {
         "success": True, 
@@ -236,3 +281,19 @@ async def execute_signal_for_user(user_id: str, signal_id: str) -> dict:
         "order": order_result,
         "message": f"{sig['direction']} {sig['symbol']} executed — {lot_size} lots",
     }
+
+async def execute_signal_for_user(user_id: str, signal_id: str) -> dict:
+    # 1. Fetch signal
+    sig = await get_signal(signal_id)
+    if not sig: raise ValueError(f"Signal {signal_id} not found")
+    
+    # 2. Get credentials
+    creds = await get_user_credentials(user_id)
+    
+    # 3. Log in (or reuse the session), size, place and log the order
+    result = await execute_signal_with_credentials(user_id, sig, creds)
+    
+    # 4. Update signal status
+    write_behind.set_signal_status(signal_id, "executed")
+    
+    return result
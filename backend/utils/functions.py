@@ -1,8 +1,9 @@
 import os
 import re
 import shutil
-from typing import List
-from datetime import datetime, timezone
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 from backend.models import ServerTimeResponse
 
 
@@ -18,43 +19,199 @@ def get_server_time() -> ServerTimeResponse:
     return ServerTimeResponse(**response)
 
 
+EPOCH_NAIVE = datetime(1970, 1, 1)
+
+# List of potential date formats
+DATE_FORMATS = [
+    "%Y-%m-%d %H:%M:%S.%f",
+    "%Y.%m.%d %H:%M",
+    "%Y.%m.%d %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S.%f%z",
+    "%Y-%m-%d %H:%M:%S%z",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y/%m/%d %H:%M:%S.%f%z",
+    "%Y/%m/%d %H:%M:%S%z",
+    "%Y/%m/%d %H:%M:%S",
+    "%Y/%m/%d %H:%M",
+]
+
+# Last format that matched, per source (e.g. "orders", "historic")
+_last_formats: Dict[str, str] = {}
+
+# Byte offsets of the separators in the MT "YYYY.MM.DD HH:MM[:SS]" layout
+_MT_SEPARATORS = {4: ".", 7: ".", 10: " ", 13: ":", 16: ":"}
+
+
 def detect_format(date_str: str, formats: List[str]) -> str:
+    return _parse_with_formats(date_str, formats)[0]
+
+
+def _parse_with_formats(date_str: str, formats: List[str]) -> Tuple[str, datetime]:
     for date_format in formats:
         try:
-            datetime.strptime(date_str, date_format)
-            return date_format
+            return date_format, datetime.strptime(date_str, date_format)
         except ValueError:
             continue
 
     raise ValueError(f"Time data '{date_str}' does not match any known formats.")
 
 
-def date_to_timestamp(date_str: str) -> int:
-    # List of potential date formats
-    date_formats = [
-        "%Y-%m-%d %H:%M:%S.%f",
-        "%Y.%m.%d %H:%M",
-        "%Y.%m.%d %H:%M:%S",
-        "%Y-%m-%d %H:%M:%S.%f%z",
-        "%Y-%m-%d %H:%M:%S%z",
-        "%Y-%m-%d %H:%M:%S",
-        "%Y-%m-%d %H:%M",
-        "%Y/%m/%d %H:%M:%S.%f%z",
-        "%Y/%m/%d %H:%M:%S%z",
-        "%Y/%m/%d %H:%M:%S",
-        "%Y/%m/%d %H:%M",
-    ]
-
-    # Detect the correct date format
-    date_format = detect_format(date_str, date_formats)
-
-    # Convert the date string to a datetime object
-    dt_obj = datetime.strptime(date_str, date_format)
-
-    # Convert the datetime object to a timestamp
-    timestamp = int(dt_obj.timestamp())
-
-    return timestamp
+def _parse_mt_date(date_str: str) -> Optional[datetime]:
+    """
+    Parses the MT "YYYY.MM.DD HH:MM[:SS]" layout without strptime.
+
+    Returns None if the string is not in that layout.
+    """
+    length = len(date_str)
+    if length != 16 and length != 19:
+        return None
+
+    for idx, sep in _MT_SEPARATORS.items():
+        if idx < length and date_str[idx] != sep:
+            return None
+
+    try:
+        return datetime(
+            int(date_str[0:4]),
+            int(date_str[5:7]),
+            int(date_str[8:10]),
+            int(date_str[11:13]),
+            int(date_str[14:16]),
+            int(date_str[17:19]) if length == 19 else 0,
+        )
+    except ValueError:
+        return None
+
+
+def date_to_timestamp(date_str: str, source: str = "default") -> int:
+    """
+    Converts a date string to a Unix timestamp.
+
+    The MT layout is parsed directly. Other layouts try the format that last
+    matched for `source` before falling back to every known format.
+
+    Args:
+        date_str (str): The date string. Naive dates are taken as local time.
+        source (str): Where the dates come from; each source remembers its own format.
+
+    Returns:
+        int: The Unix timestamp in seconds.
+    """
+    dt_obj = _parse_mt_date(date_str)
+    if dt_obj is not None:
+        return int(dt_obj.timestamp())
+
+    last_format = _last_formats.get(source)
+    if last_format is not None:
+        try:
+            return int(datetime.strptime(date_str, last_format).timestamp())
+        except ValueError:
+            pass
+
+    date_format, dt_obj = _parse_with_formats(date_str, DATE_FORMATS)
+    _last_formats[source] = date_format
+
+    return int(dt_obj.timestamp())
+
+
+def _local_utc_offsets(naive_seconds: np.ndarray) -> np.ndarray:
+    """
+    Returns the local UTC offset, in seconds, for naive wall-clock times given as
+    seconds since 1970-01-01. Offsets are computed once per distinct hour.
+    """
+    hours, inverse = np.unique(naive_seconds // 3600, return_inverse=True)
+    offsets = np.empty(len(hours), dtype=np.int64)
+    for i, hour in enumerate(hours.tolist()):
+        wall_clock = EPOCH_NAIVE + timedelta(hours=hour)
+        offsets[i] = hour * 3600 - int(wall_clock.timestamp())
+
+    return offsets[inverse.ravel()]
+
+
+def dates_to_timestamps(date_strs: List[str], source: str = "default") -> np.ndarray:
+    """
+    Converts a column of date strings to Unix timestamps.
+
+    Strings in the MT "YYYY.MM.DD HH:MM[:SS]" layout are decoded with NumPy in one
+    pass; anything else goes through date_to_timestamp.
+
+    Args:
+        date_strs (List[str]): The date strings. Naive dates are taken as local time.
+        source (str): Where the dates come from; each source remembers its own format.
+
+    Returns:
+        np.ndarray: int64 Unix timestamps in seconds, in input order.
+    """
+    count = len(date_strs)
+    timestamps = np.zeros(count, dtype=np.int64)
+    if count == 0:
+        return timestamps
+
+    try:
+        raw = np.asarray(date_strs, dtype="S19")
+    except (UnicodeEncodeError, ValueError):
+        raw = None
+
+    if raw is None:
+        valid = np.zeros(count, dtype=bool)
+    else:
+        # Measured on the input, since the S19 cast truncates longer strings
+        lengths = np.fromiter(map(len, date_strs), dtype=np.int64, count=count)
+        chars = raw.view(np.uint8).reshape(count, 19)
+        digits = chars.astype(np.int64) - ord("0")
+
+        has_seconds = lengths == 19
+        valid = (lengths == 16) | has_seconds
+        for idx, sep in _MT_SEPARATORS.items():
+            matches = chars[:, idx] == ord(sep)
+            valid &= matches | ((idx >= 16) & ~has_seconds)
+
+        digit_cols = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15]
+        valid &= ((digits[:, digit_cols] >= 0) & (digits[:, digit_cols] <= 9)).all(
+            axis=1
+        )
+        second_digits = digits[:, [17, 18]]
+        valid &= ~has_seconds | ((second_digits >= 0) & (second_digits <= 9)).all(
+            axis=1
+        )
+
+        year = (
+            digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+        )
+        month = digits[:, 5] * 10 + digits[:, 6]
+        day = digits[:, 8] * 10 + digits[:, 9]
+        hour = digits[:, 11] * 10 + digits[:, 12]
+        minute = digits[:, 14] * 10 + digits[:, 15]
+        second = np.where(has_seconds, digits[:, 17] * 10 + digits[:, 18], 0)
+
+        valid &= (month >= 1) & (month <= 12) & (day >= 1) & (hour <= 23)
+        valid &= (minute <= 59) & (second <= 59)
+
+        if valid.any():
+            year, month, day = year[valid], month[valid], day[valid]
+            months = (year - 1970) * 12 + (month - 1)
+            month_start = months.astype("datetime64[M]")
+            days = month_start.astype("datetime64[D]") + (day - 1)
+
+            # Reject days that rolled into the next month, e.g. 2024.02.30
+            in_month = days.astype("datetime64[M]") == month_start
+            valid_idx = np.flatnonzero(valid)
+            valid[valid_idx[~in_month]] = False
+
+            naive_seconds = (
+                days[in_month].astype(np.int64) * 86400
+                + hour[valid] * 3600
+                + minute[valid] * 60
+                + second[valid]
+            )
+            if len(naive_seconds):
+                timestamps[valid] = naive_seconds - _local_utc_offsets(naive_seconds)
+
+    for idx in np.flatnonzero(~valid).tolist():
+        timestamps[idx] = date_to_timestamp(date_strs[idx], source)
+
+    return timestamps
 
 
 def split_by_number(timeframe: str):
@@ -0,0 +1,278 @@
+"""
+Verstige OS — Execution Write-Behind Buffer
+Batches trade_executions inserts and coalesces signal status updates.
+
+When many users execute the same signal, each execution would otherwise
+write its own trade_executions row and its own signals status update to
+Supabase. Instead, writes collect here. They are flushed as one bulk insert
+plus one update per distinct status, once the batch size is reached or the
+flush interval passes. Every buffered write is also journaled to the local
+SQLite file, so writes that have not been flushed survive a crash or a
+failed shutdown flush and are replayed on the next start.
+
+A row Supabase keeps rejecting would otherwise be retried forever. After
+MAX_ATTEMPTS rejections it is moved to the dead_executions table, with the
+last error, for someone to inspect.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from postgrest.exceptions import APIError
+
+try:
+    from backend.signal_queue import QUEUE_PATH
+    from backend.supabase_db import insert_trade_executions, update_signal_statuses
+except ImportError:  # Run from the backend directory
+    from signal_queue import QUEUE_PATH
+    from supabase_db import insert_trade_executions, update_signal_statuses
+
+FLUSH_SIZE = int(os.getenv("WRITE_BEHIND_FLUSH_SIZE", "100"))
+FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.5"))
+MAX_ATTEMPTS = int(os.getenv("WRITE_BEHIND_MAX_ATTEMPTS", "5"))
+
+logger = logging.getLogger("WriteBehind")
+
+
+class WriteBehindBuffer:
+    """
+    Journaled write-behind buffer for execution rows and signal statuses.
+
+    Statuses are coalesced per signal, and the last status set wins. Each
+    status carries a sequence number, so a status set while a flush is in
+    flight is not lost when that flush completes.
+    """
+
+    def __init__(
+        self,
+        path: str = QUEUE_PATH,
+        flush_size: int = FLUSH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        self.path = path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.db: Optional[sqlite3.Connection] = None
+        # (journal id, record)
+        self.executions: List[Tuple[int, dict]] = []
+        # journal id -> rejections so far
+        self.attempts: Dict[int, int] = {}
+        # signal id -> (status, seq)
+        self.statuses: Dict[str, Tuple[str, int]] = {}
+        self._seq = 0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # Flush started early because the batch filled up
+        self._size_flush: Optional[asyncio.Task] = None
+
+    def open(self):
+        if self.db is not None:
+            return
+
+        self.db = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS pending_executions ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {
+            row[1] for row in self.db.execute("PRAGMA table_info(pending_executions)")
+        }
+        if "attempts" not in columns:  # Journal from before the attempt cap
+            self.db.execute(
+                "ALTER TABLE pending_executions "
+                "ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0"
+            )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS dead_executions ("
+            "id INTEGER PRIMARY KEY, payload TEXT NOT NULL, error TEXT, "
+            "failed_at REAL NOT NULL)"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS pending_signal_status ("
+            "signal_id TEXT PRIMARY KEY, status TEXT NOT NULL, seq INTEGER NOT NULL)"
+        )
+
+        # Replay writes left over from the last run
+        self.executions = []
+        for id_, payload, attempts in self.db.execute(
+            "SELECT id, payload, attempts FROM pending_executions ORDER BY id"
+        ):
+            self.executions.append((id_, json.loads(payload)))
+            if attempts:
+                self.attempts[id_] = attempts
+        for signal_id, status, seq in self.db.execute(
+            "SELECT signal_id, status, seq FROM pending_signal_status"
+        ):
+            self.statuses[signal_id] = (status, seq)
+            self._seq = max(self._seq, seq)
+        if self.executions or self.statuses:
+            logger.info(
+                f"Replaying {len(self.executions)} executions and "
+                f"{len(self.statuses)} status updates"
+            )
+
+    def start(self):
+        """Starts the periodic flush on the running event loop."""
+        self.open()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="write-behind")
+
+    async def stop(self):
+        """Flushes everything still buffered. Writes that fail stay journaled."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._size_flush is not None:
+            await self._size_flush
+            self._size_flush = None
+
+        if self.db is not None:
+            await self.flush()
+            self.db.close()
+            self.db = None
+
+    def add_execution(self, record: dict):
+        """Buffers a trade_executions row."""
+        self.start()
+        cursor = self.db.execute(
+            "INSERT INTO pending_executions (payload) VALUES (?)",
+            (json.dumps(record, default=str),),
+        )
+        self.executions.append((cursor.lastrowid, record))
+        if len(self.executions) >= self.flush_size and (
+            self._size_flush is None or self._size_flush.done()
+        ):
+            # Kept referenced so the task is not collected mid-flush
+            self._size_flush = asyncio.create_task(
+                self._flush_logged(), name="write-behind-size-flush"
+            )
+
+    def set_signal_status(self, signal_id: str, status: str):
+        """Buffers a signal status; replaces any status not yet flushed."""
+        self.start()
+        signal_id = str(signal_id)
+        self._seq += 1
+        self.db.execute(
+            "INSERT INTO pending_signal_status (signal_id, status, seq) VALUES (?, ?, ?) "
+            "ON CONFLICT(signal_id) DO UPDATE SET status = excluded.status, seq = excluded.seq",
+            (signal_id, status, self._seq),
+        )
+        self.statuses[signal_id] = (status, self._seq)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush_logged()
+
+    async def _flush_logged(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Write-behind flush failed: {e}")
+
+    async def flush(self):
+        async with self._lock:
+            if self.executions:
+                await self._flush_executions()
+            if self.statuses:
+                await self._flush_statuses()
+
+    async def _flush_executions(self):
+        batch, self.executions = self.executions, []
+        try:
+            await insert_trade_executions([record for _, record in batch])
+            done = batch
+        except APIError as e:
+            # Supabase rejected the batch: isolate the bad rows so the rest land
+            logger.warning(f"Bulk insert of {len(batch)} executions rejected: {e}")
+            done = []
+            for entry in batch:
+                try:
+                    await insert_trade_executions([entry[1]])
+                    done.append(entry)
+                except APIError as row_error:
+                    if self._reject(entry, row_error):
+                        done.append(entry)
+                except Exception:
+                    break  # Unreachable now; the rest wait for the next flush
+        except Exception as e:
+            # Supabase unreachable: keep the whole batch for the next flush
+            logger.warning(f"Bulk insert of {len(batch)} executions failed: {e}")
+            done = []
+
+        self.db.executemany(
+            "DELETE FROM pending_executions WHERE id = ?", [(id_,) for id_, _ in done]
+        )
+        flushed = {id_ for id_, _ in done}
+        for id_ in flushed:
+            self.attempts.pop(id_, None)
+        failed = [entry for entry in batch if entry[0] not in flushed]
+        self.executions = failed + self.executions
+
+    def _reject(self, entry: Tuple[int, dict], error: APIError) -> bool:
+        """
+        Counts a rejection of one execution row. Returns True once the row
+        has used up its attempts and was moved to dead_executions.
+        """
+        id_, record = entry
+        attempts = self.attempts.get(id_, 0) + 1
+        if attempts < self.max_attempts:
+            self.attempts[id_] = attempts
+            self.db.execute(
+                "UPDATE pending_executions SET attempts = ? WHERE id = ?",
+                (attempts, id_),
+            )
+            logger.warning(
+                f"Execution row kept for retry ({attempts}/{self.max_attempts}): {error}"
+            )
+            return False
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO dead_executions (id, payload, error, failed_at) "
+            "VALUES (?, ?, ?, ?)",
+            (id_, json.dumps(record, default=str), str(error), time.time()),
+        )
+        logger.error(
+            f"Execution row {id_} rejected {attempts} times, moved to "
+            f"dead_executions: {error}"
+        )
+        return True
+
+    async def _flush_statuses(self):
+        snapshot = dict(self.statuses)
+        by_status: Dict[str, List[str]] = defaultdict(list)
+        for signal_id, (status, _) in snapshot.items():
+            by_status[status].append(signal_id)
+
+        for status, signal_ids in by_status.items():
+            try:
+                await update_signal_statuses(signal_ids, status)
+            except Exception as e:
+                logger.error(f"Status update to {status!r} kept for retry: {e}")
+                continue
+
+            for signal_id in signal_ids:
+                seq = snapshot[signal_id][1]
+                # Drop only if no newer status arrived during the flush
+                if self.statuses.get(signal_id, (None, None))[1] == seq:
+                    del self.statuses[signal_id]
+                self.db.execute(
+                    "DELETE FROM pending_signal_status WHERE signal_id = ? AND seq = ?",
+                    (signal_id, seq),
+                )
+
+
+write_behind = WriteBehindBuffer()
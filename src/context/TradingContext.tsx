@@ -91,6 +91,38 @@ interface TradingContextType {
     refreshDxTradeData: () => Promise<void>;
 }
 
+const toSignalData = (raw: any): SignalData => ({
+    id: raw.id || Date.now(),
+    provider: raw.provider || "Unknown",
+    providerRank: raw.providerRank || "Pro",
+    pair: raw.pair,
+    action: raw.action as 'BUY' | 'SELL',
+    pips: raw.pips || 0,
+    price: raw.price,
+    sl: raw.sl,
+    tp1: raw.tp1,
+    tp2: raw.tp2 || "0",
+    tp3: raw.tp3 || "0",
+    category: raw.category || "FOREX",
+    timestamp: raw.timestamp || "Just now",
+    winRate: raw.winRate || 0,
+    lotSize: raw.lotSize || 0.01,
+    profit: raw.profit || 0
+});
+
+const toSignalResult = (raw: any): SignalResult => ({
+    id: raw.id || Date.now(),
+    pair: raw.pair,
+    type: raw.type,
+    entryPrice: raw.entryPrice,
+    closePrice: raw.closePrice,
+    netProfit: raw.netProfit,
+    pips: raw.pips || 0,
+    lotSize: raw.lotSize || 0.01,
+    timestamp: raw.timestamp || new Date().toISOString(),
+    provider: raw.provider || "Verstige AI"
+});
+
 const TradingContext = createContext<TradingContextType | undefined>(undefined);
 
 export const useTrading = () => {
@@ -219,26 +251,22 @@ export const TradingProvider: React.FC<{ children: ReactNode }> = ({ children })
             }));
         });
 
+        // Batched latest prices from the bridge (one message per flush interval)
+        newSocket.on("price_snapshot", (data: any) => {
+            const snapshot = data.prices || [];
+            if (!snapshot.length) return;
+            setPrices(prev => {
+                const next = { ...prev };
+                for (const p of snapshot) {
+                    next[p.symbol] = (p.bid + p.ask) / 2;
+                }
+                return next;
+            });
+        });
+
         newSocket.on("new_signal", (newSignal: any) => {
             console.log("Context New Signal:", newSignal);
-            const signal: SignalData = {
-                id: newSignal.id || Date.now(),
-                provider: newSignal.provider || "Unknown",
-                providerRank: newSignal.providerRank || "Pro",
-                pair: newSignal.pair,
-                action: newSignal.action as 'BUY' | 'SELL',
-                pips: newSignal.pips || 0,
-                price: newSignal.price,
-                sl: newSignal.sl,
-                tp1: newSignal.tp1,
-                tp2: newSignal.tp2 || "0",
-                tp3: newSignal.tp3 || "0",
-                category: newSignal.category || "FOREX",
-                timestamp: newSignal.timestamp || "Just now",
-                winRate: newSignal.winRate || 0,
-                lotSize: newSignal.lotSize || 0.01,
-                profit: newSignal.profit || 0
-            };
+            const signal = toSignalData(newSignal);
             // Deduplicate: if position already exists, update its profit; otherwise add it
             setSignals(prev => {
                 const idx = prev.findIndex(s => String(s.id) === String(signal.id));
@@ -254,18 +282,7 @@ export const TradingProvider: React.FC<{ children: ReactNode }> = ({ children })
 
         newSocket.on("signal_result", (result: any) => {
             console.log("Context Signal Result:", result);
-            const formattedResult: SignalResult = {
-                id: result.id || Date.now(),
-                pair: result.pair,
-                type: result.type,
-                entryPrice: result.entryPrice,
-                closePrice: result.closePrice,
-                netProfit: result.netProfit,
-                pips: result.pips || 0,
-                lotSize: result.lotSize || 0.01,
-                timestamp: result.timestamp || new Date().toISOString(),
-                provider: result.provider || "Verstige AI"
-            };
+            const formattedResult = toSignalResult(result);
 
             // Deduplicate: don't add if a result with the same ID already exists
             setResults(prev => {
@@ -278,6 +295,27 @@ export const TradingProvider: React.FC<{ children: ReactNode }> = ({ children })
             setSignals(prev => prev.filter(s => s.id !== result.id && s.id !== Number(result.id)));
         });
 
+        // Bridge startup replay: open positions and recent closures in one message
+        newSocket.on("signal_replay", (replay: any) => {
+            const replayed: SignalData[] = (replay.signals || []).map(toSignalData);
+            const replayedResults: SignalResult[] = (replay.results || []).map(toSignalResult);
+            const closedIds = new Set(replayedResults.map(r => String(r.id)));
+
+            setSignals(prev => {
+                const byId = new Map(prev.map(s => [String(s.id), s]));
+                for (const signal of replayed) {
+                    const existing = byId.get(String(signal.id));
+                    byId.set(String(signal.id), existing ? { ...existing, profit: signal.profit } : signal);
+                }
+                return Array.from(byId.values()).filter(s => !closedIds.has(String(s.id)));
+            });
+            setResults(prev => {
+                const known = new Set(prev.map(r => String(r.id)));
+                const fresh = replayedResults.filter(r => !known.has(String(r.id)));
+                return fresh.length ? [...fresh, ...prev] : prev;
+            });
+        });
+
         newSocket.on("account_update", (data: any) => {
             console.log("Context Account Update:", data);
             const d = data.data || data;
@@ -315,6 +353,27 @@ export const TradingProvider: React.FC<{ children: ReactNode }> = ({ children })
         };
     }, []);
 
+    // Price and position updates are scoped to per-symbol rooms on the backend.
+    // Join the rooms for every pair on screen; rooms belong to a connection,
+    // so re-join whenever the socket (re)connects.
+    const watchedSymbols = useMemo(
+        () => Array.from(new Set(signals.map(s => s.pair).filter(Boolean))).sort(),
+        [signals]
+    );
+    const watchedSymbolsKey = watchedSymbols.join(',');
+
+    useEffect(() => {
+        if (!socket || watchedSymbols.length === 0) return;
+        const subscribe = () => socket.emit("subscribe_symbols", { symbols: watchedSymbols });
+        if (socket.connected) subscribe();
+        socket.on("connect", subscribe);
+        return () => {
+            socket.off("connect", subscribe);
+            if (socket.connected) socket.emit("unsubscribe_symbols", { symbols: watchedSymbols });
+        };
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [socket, watchedSymbolsKey]);
+
     // ---------------------------------------------------------------
     // Auto-reconnect from localStorage on every page load / refresh.
     // We persist credentials in 'tl_session' so we never lose the